@@ -0,0 +1,92 @@
+"""Compile and run many scripts in parallel on a process pool.
+
+Usage: python batch.py <directory or files...> [--workers N] [--chunksize N]
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from compiler import parse_source
+from engines import load_program
+from output import ListSink
+
+
+class ScriptResult:
+    """Output of one script, plus the error that stopped it (if any)."""
+
+    def __init__(self, name: str, output: str, error: str | None = None):
+        self.name = name
+        self.output = output
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def __repr__(self) -> str:
+        return f"ScriptResult(name={self.name!r}, ok={self.ok})"
+
+
+def run_script(name: str, source: str, engine: str = "sam") -> ScriptResult:
+    """Run the whole pipeline on one script, capturing output and errors."""
+    output = ListSink()
+    try:
+        load_program(parse_source(source), engine, output=output).run()
+    except Exception as error:
+        return ScriptResult(name, output.getvalue(), f"{type(error).__name__}: {error}")
+    return ScriptResult(name, output.getvalue())
+
+
+def _run_job(job: tuple) -> ScriptResult:
+    return run_script(*job)
+
+
+def load_sources(paths) -> list[tuple[str, str]]:
+    """Read ``(name, source)`` pairs from a directory (every file in it,
+    sorted by name) or from a list of file paths."""
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(sorted(child for child in path.iterdir() if child.is_file()))
+        else:
+            files.append(path)
+    return [(str(file), file.read_text()) for file in files]
+
+
+def run_batch(sources, workers: int | None = None, chunksize: int = 16,
+              engine: str = "sam") -> list[ScriptResult]:
+    """Compile and run many scripts across a ProcessPoolExecutor.
+
+    ``sources`` is a list of source strings or of ``(name, source)`` pairs.
+    Scripts are submitted in chunks of ``chunksize`` to amortise the
+    inter-process overhead; results come back in input order.
+    """
+    jobs = []
+    for index, source in enumerate(sources):
+        name, text = source if isinstance(source, tuple) else (f"<script {index}>", source)
+        jobs.append((name, text, engine))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_run_job, jobs, chunksize=chunksize))
+
+
+def main():
+    arguments = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arguments.add_argument("paths", nargs="+", help="script files or directories of scripts")
+    arguments.add_argument("--workers", type=int, default=None)
+    arguments.add_argument("--chunksize", type=int, default=16)
+    arguments.add_argument("--engine", default="sam")
+    options = arguments.parse_args()
+
+    results = run_batch(load_sources(options.paths), options.workers, options.chunksize, options.engine)
+    for result in results:
+        print(f"== {result.name}")
+        print(result.output, end="")
+        if result.error:
+            print(f"error: {result.error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""Micro benchmarks for the compiler and the SAM virtual machine.
+
+Run them from the ``src`` directory, e.g. ``python -m benchmarks.linking``.
+"""
+import contextlib
+import io
+import time
+
+from sam_vm import SAMVirtualMachine
+
+
+def best_of(function, repeat: int = 5) -> float:
+    """Return the best wall time, in seconds, of ``repeat`` calls."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def silenced(function):
+    """Wrap ``function`` so that anything it prints is discarded."""
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return function()
+    return run
+
+
+def executed_steps(instructions) -> int:
+    """Run a linked program and return how many instructions it dispatched."""
+    vm = SAMVirtualMachine(instructions)
+    code, pc, steps = vm.code, 0, 0
+    while pc < len(code):
+        pc = code[pc]()
+        steps += 1
+    return steps
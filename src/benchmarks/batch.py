@@ -0,0 +1,46 @@
+"""Batch throughput: scripts per second for 1..N worker processes.
+
+Each script goes through the full pipeline (lexing, parsing, analysis,
+code generation and a short VM run), like the small scripts of a production
+batch. Pass the largest worker count to try as the first argument; it
+defaults to the number of CPUs.
+"""
+import os
+import sys
+import time
+
+from batch import run_batch, run_script
+
+TEMPLATE = """
+let n: int = {n};
+let a: int = 0;
+let b: int = 1;
+let i: int = 0;
+while (i < n) {{
+  let c: int = a + b;
+  a = b;
+  b = c;
+  i = i + 1;
+}}
+print(b);
+"""
+
+
+def main():
+    scripts = [TEMPLATE.format(n=20 + i % 50) for i in range(4000)]
+    start = time.perf_counter()
+    expected = [run_script("", script).output for script in scripts]
+    serial = time.perf_counter() - start
+    print(f"{'workers':>8} {'scripts/s':>10} {'speedup':>8}")
+    print(f"{'serial':>8} {len(scripts) / serial:>10.0f} {1.0:>7.2f}x")
+    max_workers = int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count() or 1
+    for workers in range(1, max_workers + 1):
+        start = time.perf_counter()
+        results = run_batch(scripts, workers=workers, chunksize=64)
+        elapsed = time.perf_counter() - start
+        assert [result.output for result in results] == expected
+        print(f"{workers:>8} {len(scripts) / elapsed:>10.0f} {serial / elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
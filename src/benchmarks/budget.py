@@ -0,0 +1,59 @@
+"""Cost of step budgets: the old unbounded loop vs. budgeted and sliced runs.
+
+run() executes in chunks of BUDGET_CHUNK instructions and only checks
+``max_steps`` and ``deadline`` between chunks, so budgets should cost at most
+a few percent. Sliced runs resume the VM repeatedly, as a scheduler would.
+"""
+import time
+
+from benchmarks import best_of
+from compiler import compile_source
+from output import ListSink
+from sam_vm import SAMVirtualMachine, VMStatus
+
+LOOP = """
+let i: int = 0;
+let total: int = 0;
+while (i < 100000) {
+  total = total + i * 3 - i / 2;
+  i = i + 1;
+}
+print(total);
+"""
+
+
+def plain_loop(instructions):
+    """The run loop before step budgets: one bounds check per instruction."""
+    vm = SAMVirtualMachine(instructions, ListSink())
+    code, end, pc = vm.code, len(vm.code), vm.pc
+    while pc < end:
+        pc = code[pc]()
+
+
+def sliced(instructions, quantum: int):
+    vm = SAMVirtualMachine(instructions, ListSink())
+    while vm.run(max_steps=quantum) != VMStatus.HALTED:
+        pass
+
+
+def main():
+    instructions = compile_source(LOOP)
+    runs = {
+        "plain loop": lambda: plain_loop(instructions),
+        "run()": lambda: SAMVirtualMachine(instructions, ListSink()).run(),
+        "max_steps=10**9": lambda: SAMVirtualMachine(instructions, ListSink()).run(max_steps=10**9),
+        "deadline +1h": lambda: SAMVirtualMachine(instructions, ListSink()).run(deadline=time.monotonic() + 3600),
+        "slices of 10000": lambda: sliced(instructions, 10000),
+        "slices of 1000": lambda: sliced(instructions, 1000),
+        "slices of 100": lambda: sliced(instructions, 100),
+    }
+    baseline = None
+    print(f"{'mode':>16} {'ms':>9} {'overhead':>9}")
+    for name, run in runs.items():
+        elapsed = best_of(run, repeat=7)
+        baseline = baseline or elapsed
+        print(f"{name:>16} {elapsed * 1000:>9.1f} {elapsed / baseline - 1:>+9.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Memory footprint of Instruction lists vs. the array-backed Bytecode.
+
+The scripts are generated straight-line programs of increasing size, the
+shape our large machine-generated scripts have. They print their variables
+at the end, so the dead-code pass keeps every statement.
+"""
+import tracemalloc
+
+from benchmarks import best_of, silenced
+from bytecode import encode
+from compiler import compile_source
+from sam_vm import SAMVirtualMachine
+
+
+def generated_script(statements: int) -> str:
+    lines = ["let a: int = 1;", "let b: float = 0.5;"]
+    for i in range(statements):
+        lines.append(f"a = a + {i % 7} * 2;")
+        lines.append(f"b = b * 1.5 - {i % 3}.25;")
+    lines += ["print(a);", "print(b);"]
+    return "\n".join(lines)
+
+
+def allocated(build) -> tuple[object, int]:
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def main():
+    print(f"{'instructions':>12} {'list (KiB)':>11} {'bytecode (KiB)':>15} {'constants':>10} "
+          f"{'load list (ms)':>15} {'load bytecode (ms)':>19}")
+    for statements in (100, 1000, 10000):
+        source = generated_script(statements)
+        instructions, list_size = allocated(lambda: compile_source(source))
+        bytecode, bytecode_size = allocated(lambda: encode(instructions))
+        load_list = best_of(silenced(lambda: SAMVirtualMachine(instructions)))
+        load_bytecode = best_of(silenced(lambda: SAMVirtualMachine(bytecode)))
+        print(f"{len(instructions):>12} {list_size / 1024:>11.1f} {bytecode_size / 1024:>15.1f} "
+              f"{len(bytecode.constants):>10} {load_list * 1000:>15.2f} {load_bytecode * 1000:>19.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Cold vs. warm compile latency with the on-disk bytecode cache.
+
+Cold compiles run the whole front end and write the cache entry; warm ones
+map the cached file. The last timing column is building the VM from the
+warm bytecode, which every caller pays before the first instruction runs.
+"""
+import tempfile
+
+from benchmarks import best_of
+from benchmarks.bytecode_size import generated_script
+from cache import BytecodeCache
+from main import example_9
+from output import ListSink
+from sam_vm import SAMVirtualMachine
+
+SCRIPTS = {
+    "example_9": example_9,
+    "100 statements": generated_script(50),
+    "2000 statements": generated_script(1000),
+    "20000 statements": generated_script(10000),
+}
+
+
+def main():
+    print(f"{'script':>18} {'cold ms':>9} {'warm ms':>9} {'speedup':>8} {'VM ms':>9} {'file KiB':>9}")
+    for name, source in SCRIPTS.items():
+        with tempfile.TemporaryDirectory() as directory:
+            cache = BytecodeCache(directory)
+
+            def cold():
+                cache.clear()
+                cache.compile(source)
+            cold_time = best_of(cold)
+            warm_time = best_of(lambda: cache.compile(source))
+            bytecode, frame = cache.compile(source)
+            vm_time = best_of(lambda: SAMVirtualMachine(bytecode, ListSink(), frame))
+            size = cache.size()
+        print(f"{name:>18} {cold_time * 1000:>9.2f} {warm_time * 1000:>9.2f} "
+              f"{cold_time / warm_time:>7.1f}x {vm_time * 1000:>9.2f} {size / 1024:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""How long checkpoints hold up execution, for growing memory sizes.
+
+Each script declares ``slots`` variables, runs a long loop and prints them
+all, so every one of them stays in memory; it is compiled without the AST
+passes, which would propagate their constant values and drop them. The
+Checkpointer writes a checkpoint every 50000 instructions. Reported are the
+median and worst stall per checkpoint, the file size and the total run time
+against an uncheckpointed run; both VMs are built before their timers start.
+
+Before the table, ``round_trip`` checks that a run stopped at several
+points, checkpointed, restored into a fresh VM and resumed prints the same
+output and ends with the same memory as an uninterrupted run, with plain
+and with typed memory.
+"""
+import os
+import statistics
+import tempfile
+import time
+
+from checkpoint import Checkpoint, Checkpointer
+from code_gen import CodeGenerator
+from compiler import compile_source, parse_source
+from linker import link
+from output import ListSink
+from sam_vm import SAMVirtualMachine, VMStatus
+
+LOOP = """
+let i: int = 0;
+while (i < 300000) {
+  v0 = v0 + i;
+  i = i + 1;
+}
+"""
+
+
+# Ints, floats and bools in memory, output before and after every stop
+ROUND_TRIP = """
+let i: int = 0;
+let total: int = 0;
+let x: float = 0.5;
+let even: bool = true;
+while (i < 20000) {
+  total = total + i * 3 - i / 7;
+  x = x * 1.0001 + 0.25;
+  even = !even;
+  if (i / 1000 * 1000 == i) {
+    print(total);
+    print(x);
+    print(even);
+  }
+  i = i + 1;
+}
+print(total);
+print(x);
+"""
+
+
+def script(slots: int) -> str:
+    declarations = "\n".join(f"let v{slot}: int = {slot * 7919};" for slot in range(slots))
+    prints = "\n".join(f"print(v{slot});" for slot in range(slots))
+    return declarations + LOOP + prints
+
+
+def round_trip(source: str, typed_memory: bool, stops=(1, 100, 5000, 100000)):
+    generator = CodeGenerator()
+    instructions = link(generator.generate(parse_source(source)))
+    frame = generator.frame_layout()
+
+    def fresh():
+        return SAMVirtualMachine(instructions, ListSink(), frame, typed_memory)
+
+    reference = fresh()
+    reference.run()
+    for stop in stops:
+        first = fresh()
+        if first.run(max_steps=stop) == VMStatus.HALTED:
+            continue
+        resumed = fresh()
+        Checkpoint.loads(Checkpoint.capture(first).dumps()).restore(resumed)
+        resumed.run()
+        if first.output.values + resumed.output.values != reference.output.values \
+                or list(resumed.memory) != list(reference.memory):
+            raise Exception(f"Resuming after {stop} instructions changed the result "
+                            f"(typed_memory={typed_memory})")
+
+
+def main():
+    for typed_memory in (False, True):
+        round_trip(ROUND_TRIP, typed_memory)
+    print("Checkpoint round trips match uninterrupted runs.")
+    print(f"{'slots':>7} {'median ms':>10} {'max ms':>8} {'file KiB':>9} {'plain s':>8} {'checkpointed s':>15}")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "state")
+        for slots in (10, 1000, 20000, 100000):
+            instructions = compile_source(script(slots), optimize=False)
+            vm = SAMVirtualMachine(instructions, ListSink())
+            start = time.perf_counter()
+            vm.run()
+            plain = time.perf_counter() - start
+
+            checkpointer = Checkpointer(SAMVirtualMachine(instructions, ListSink()), path, every=50000)
+            start = time.perf_counter()
+            checkpointer.run()
+            checkpointed = time.perf_counter() - start
+            stalls = checkpointer.stalls
+            print(f"{slots:>7} {statistics.median(stalls) * 1000:>10.3f} {max(stalls) * 1000:>8.3f} "
+                  f"{os.path.getsize(path) / 1024:>9.1f} {plain:>8.2f} {checkpointed:>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Dispatch counts with and without dead-code elimination.
+
+Compiles the valid scripts from ``main.py`` plus a loop full of dead code,
+once with constant folding only and once with optimizer.DeadCodeEliminator
+as well, and reports how many instructions the VM dispatched and what the
+eliminator removed.
+"""
+import main as examples
+from benchmarks import best_of, executed_steps, silenced
+from code_gen import CodeGenerator
+from compiler import parse_source
+from linker import link
+from optimizer import DeadCodeEliminator, fold_constants
+from sam_vm import SAMVirtualMachine
+
+DEAD = """
+let debug: bool = false;
+let i: int = 0;
+let total: int = 0;
+while (i < 20000) {
+    let scratch: int = i * i - 1;
+    scratch = scratch / 3;
+    if (debug) {
+        print(i);
+    }
+    total = total + i;
+    i = i + 1;
+}
+print(total);
+"""
+
+PROGRAMS = [(name, getattr(examples, name)) for name in
+            ["example_1", "example_5", "example_6", "example_7", "example_8", "example_9"]]
+PROGRAMS.append(("dead", DEAD))
+
+
+def compiled(source: str, eliminate: bool):
+    ast = fold_constants(parse_source(source, optimize=False))
+    eliminator = DeadCodeEliminator()
+    if eliminate:
+        eliminator.eliminate(ast)
+    return link(CodeGenerator().generate(ast)), eliminator.removed
+
+
+def main():
+    print(f"{'program':>10} {'folded':>8} {'eliminated':>11} {'saved':>7} "
+          f"{'folded (ms)':>12} {'eliminated (ms)':>16}  removed")
+    for name, source in PROGRAMS:
+        plain, _ = compiled(source, False)
+        optimized, removed = compiled(source, True)
+        plain_steps = silenced(lambda: executed_steps(plain))()
+        optimized_steps = silenced(lambda: executed_steps(optimized))()
+        plain_time = best_of(silenced(lambda: SAMVirtualMachine(plain).run()))
+        optimized_time = best_of(silenced(lambda: SAMVirtualMachine(optimized).run()))
+        saved = 1 - optimized_steps / plain_steps
+        print(f"{name:>10} {plain_steps:>8} {optimized_steps:>11} {saved:>7.1%} "
+              f"{plain_time * 1000:>12.3f} {optimized_time * 1000:>16.3f}  {', '.join(removed) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
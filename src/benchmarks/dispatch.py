@@ -0,0 +1,42 @@
+"""Instructions per second: original interpreter loop vs. dispatch table.
+
+Both engines run the same linked programs; the instruction count is taken
+from a counting run so that the rates are directly comparable.
+"""
+from benchmarks import best_of, executed_steps, silenced
+from benchmarks.legacy import LegacyVM
+from compiler import compile_source
+from main import example_1, example_5, example_7
+from sam_vm import SAMVirtualMachine
+
+LOOP = """
+let i: int = 0;
+let total: int = 0;
+while (i < 20000) {
+  total = total + i * 3 - i / 2;
+  i = i + 1;
+}
+print(total);
+"""
+
+PROGRAMS = {
+    "example_1": example_1,
+    "example_5": example_5,
+    "example_7": example_7,
+    "arith loop": LOOP,
+}
+
+
+def main():
+    print(f"{'program':>12} {'steps':>8} {'legacy (Mi/s)':>14} {'table (Mi/s)':>13} {'speedup':>8}")
+    for name, source in PROGRAMS.items():
+        instructions = compile_source(source)
+        steps = silenced(lambda: executed_steps(instructions))()
+        legacy = best_of(silenced(lambda: LegacyVM(instructions).run()))
+        table = best_of(silenced(lambda: SAMVirtualMachine(instructions).run()))
+        print(f"{name:>12} {steps:>8} {steps / legacy / 1e6:>14.2f} "
+              f"{steps / table / 1e6:>13.2f} {legacy / table:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
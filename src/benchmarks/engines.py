@@ -0,0 +1,90 @@
+"""Instruction counts and wall time of every engine on loop-heavy scripts.
+
+Use it to pick the faster engine for a workload: the fastest engine for each
+script is marked with ``*``.
+"""
+from benchmarks import best_of, silenced
+from compiler import parse_source
+from engines import ENGINES, load_program
+from main import example_1, example_5
+
+NESTED = """
+let i: int = 0;
+let total: int = 0;
+while (i < 300) {
+  let j: int = 0;
+  while (j < 100) {
+    total = total + i * j - j;
+    j = j + 1;
+  }
+  i = i + 1;
+}
+print(total);
+"""
+
+FLOAT_SERIES = """
+let i: int = 0;
+let x: float = 0.0;
+let step: float = 0.001;
+while (i < 30000) {
+  x = x + step * 2.0 - x / 1000.0;
+  i = i + 1;
+}
+print(x);
+"""
+
+BRANCHY = """
+let i: int = 0;
+let evens: int = 0;
+let odds: int = 0;
+while (i < 20000) {
+  if (i - i / 2 * 2 == 0) {
+    evens = evens + 1;
+  } else {
+    odds = odds + 1;
+  }
+  i = i + 1;
+}
+print(evens);
+print(odds);
+"""
+
+WORKLOADS = {
+    "example_1": example_1,
+    "example_5": example_5,
+    "nested": NESTED,
+    "float series": FLOAT_SERIES,
+    "branchy": BRANCHY,
+}
+
+
+def dispatch_count(machine) -> int | None:
+    """Steps a closure-dispatched machine takes; None for other engines."""
+    code = getattr(machine, "code", None)
+    if not isinstance(code, list):
+        return None
+    pc, steps = machine.pc, 0
+    while pc < len(code):
+        pc = code[pc]()
+        steps += 1
+    return steps
+
+
+def main():
+    names = list(ENGINES)
+    print(f"{'workload':>13} " + " ".join(f"{name + ' steps':>16} {name + ' ms':>13}" for name in names))
+    for workload, source in WORKLOADS.items():
+        ast = parse_source(source)
+        steps = {name: silenced(lambda: dispatch_count(load_program(ast, name)))() for name in names}
+        times = {name: best_of(silenced(lambda: load_program(ast, name).run()), repeat=3) for name in names}
+        fastest = min(times, key=times.get)
+        cells = []
+        for name in names:
+            count = "-" if steps[name] is None else str(steps[name])
+            mark = "*" if name == fastest else " "
+            cells.append(f"{count:>16} {times[name] * 1000:>12.2f}{mark}")
+        print(f"{workload:>13} " + " ".join(cells))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Interpreted vs. hot-loop-compiled runs of the SAM VM.
+
+Each workload runs on a fresh VM (so compilation is included in the time)
+with and without a HotLoopCompiler, on plain and fused instruction streams.
+The last column shows how many loops were compiled and rejected.
+"""
+from benchmarks import best_of
+from benchmarks.engines import WORKLOADS
+from code_gen import CodeGenerator
+from compiler import parse_source
+from hotloop import HotLoopCompiler
+from linker import link
+from output import ListSink
+from sam_vm import SAMVirtualMachine
+from superinstructions import fuse
+
+
+def build(source: str, superinstructions: bool):
+    generator = CodeGenerator()
+    program = generator.generate(parse_source(source))
+    if superinstructions:
+        program = fuse(program)
+    return link(program), generator.frame_layout()
+
+
+def main():
+    print(f"{'workload':>14} {'stream':>6} {'interp ms':>10} {'hot ms':>9} {'speedup':>8} {'loops':>6}")
+    for name, source in WORKLOADS.items():
+        for superinstructions in (False, True):
+            instructions, frame = build(source, superinstructions)
+            interpreted = best_of(lambda: SAMVirtualMachine(instructions, ListSink(), frame).run())
+            compilers = []
+
+            def hot():
+                compilers.append(HotLoopCompiler())
+                SAMVirtualMachine(instructions, ListSink(), frame, hot_loops=compilers[-1]).run()
+            compiled = best_of(hot)
+            loops = f"{len(compilers[-1].compiled)}/{len(compilers[-1].rejected)}"
+            print(f"{name:>14} {'fused' if superinstructions else 'plain':>6} {interpreted * 1000:>10.2f} "
+                  f"{compiled * 1000:>9.2f} {interpreted / compiled:>7.1f}x {loops:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""The original SAM interpreter, kept as a baseline for the benchmarks.
+
+Every step goes through an ``isinstance`` check and a chain of opcode string
+comparisons. Jumps whose operand is still a label name search the instruction
+list for it; linked (integer) operands jump directly. It runs what
+CodeGenerator emits, but not superinstructions.
+"""
+from sam_vm import Instruction, Opcode
+
+
+class LegacyVM:
+    def __init__(self, instructions: list):
+        self.instructions = instructions
+        self.stack = []
+        self.memory = [0] * 1024
+        self.pc = 0
+
+    def run(self):
+        while True:
+            if self.pc >= len(self.instructions):
+                break
+            instruction = self.instructions[self.pc]
+            self.execute(instruction)
+            self.pc += 1
+
+    def execute(self, instruction: Instruction):
+        if not isinstance(instruction, Instruction):
+            return
+
+        if instruction.opcode == Opcode.PUSH:
+            self.stack.append(instruction.operand)
+        elif instruction.opcode == Opcode.POP:
+            self.stack.pop()
+        elif instruction.opcode == Opcode.DUP:
+            self.stack.append(self.stack[-1])
+        elif instruction.opcode == Opcode.SWAP:
+            a, b = self.stack.pop(), self.stack.pop()
+            self.stack.append(a)
+            self.stack.append(b)
+        elif instruction.opcode == Opcode.ADD:
+            b, a = self.stack.pop(), self.stack.pop()
+            self.stack.append(a + b)
+        elif instruction.opcode == Opcode.SUB:
+            b, a = self.stack.pop(), self.stack.pop()
+            self.stack.append(a - b)
+        elif instruction.opcode == Opcode.MUL:
+            b, a = self.stack.pop(), self.stack.pop()
+            self.stack.append(a * b)
+        elif instruction.opcode == Opcode.DIV:
+            b, a = self.stack.pop(), self.stack.pop()
+            if type(a) is int and type(b) is int:
+                self.stack.append(a // b)
+            else:
+                self.stack.append(a / b)
+        elif instruction.opcode == Opcode.IDIV:
+            b, a = self.stack.pop(), self.stack.pop()
+            self.stack.append(a // b)
+        elif instruction.opcode == Opcode.FDIV:
+            b, a = self.stack.pop(), self.stack.pop()
+            self.stack.append(a / b)
+        elif instruction.opcode == Opcode.LT:
+            b, a = self.stack.pop(), self.stack.pop()
+            self.stack.append(int(a < b))
+        elif instruction.opcode == Opcode.GT:
+            b, a = self.stack.pop(), self.stack.pop()
+            self.stack.append(int(a > b))
+        elif instruction.opcode == Opcode.LE:
+            b, a = self.stack.pop(), self.stack.pop()
+            self.stack.append(int(a <= b))
+        elif instruction.opcode == Opcode.GE:
+            b, a = self.stack.pop(), self.stack.pop()
+            self.stack.append(int(a >= b))
+        elif instruction.opcode == Opcode.NE:
+            b, a = self.stack.pop(), self.stack.pop()
+            self.stack.append(int(a != b))
+        elif instruction.opcode == Opcode.EQ:
+            b, a = self.stack.pop(), self.stack.pop()
+            self.stack.append(int(a == b))
+        elif instruction.opcode == Opcode.AND:
+            b, a = self.stack.pop(), self.stack.pop()
+            self.stack.append(int(a and b))
+        elif instruction.opcode == Opcode.OR:
+            b, a = self.stack.pop(), self.stack.pop()
+            self.stack.append(int(a or b))
+        elif instruction.opcode == Opcode.NOT:
+            a = self.stack.pop()
+            self.stack.append(int(not a))
+        elif instruction.opcode == Opcode.NEG:
+            self.stack.append(0 - self.stack.pop())
+        elif instruction.opcode == Opcode.JMP:
+            self.pc = self.find_label(instruction.operand) - 1
+        elif instruction.opcode == Opcode.JZ:
+            if self.stack.pop() == 0:
+                self.pc = self.find_label(instruction.operand) - 1
+        elif instruction.opcode == Opcode.STORE:
+            self.memory[instruction.operand] = self.stack.pop()
+        elif instruction.opcode == Opcode.LOAD:
+            self.stack.append(self.memory[instruction.operand])
+        elif instruction.opcode == Opcode.PRINT:
+            print(self.stack.pop())
+        elif instruction.opcode == Opcode.HALT:
+            self.pc = len(self.instructions)
+        else:
+            raise Exception(f"Unknown opcode: {instruction.opcode}")
+
+    def find_label(self, label):
+        if isinstance(label, int):
+            return label
+        for i, instruction in enumerate(self.instructions):
+            if isinstance(instruction, str) and instruction.endswith(':'):
+                if instruction[:-1] == label:
+                    return i
+        raise ValueError(f"Label not found: {label}")
@@ -0,0 +1,35 @@
+"""Jump cost as the program grows: label scan vs. linked addresses.
+
+The nested loops of ``example_5`` are preceded by an increasing number of
+filler statements that are never executed. With label scanning every taken
+jump walks the instruction list, so the loop gets slower as the program
+grows; with linked jump targets the time stays flat. Both columns use the original interpreter
+loop so that only the cost of resolving jumps differs. The filler is dead
+code, so the program is built without the AST passes and the peephole
+optimizer, which would remove it.
+"""
+from benchmarks import best_of, silenced
+from benchmarks.legacy import LegacyVM
+from code_gen import CodeGenerator
+from compiler import parse_source
+from linker import link
+from main import example_5
+
+
+def padded_program(filler: int) -> str:
+    filler_block = "let pad: int = 0;\nif (false) {\n" + "pad = pad + 1;\n" * filler + "}\n"
+    return filler_block + example_5
+
+
+def main():
+    print(f"{'filler':>8} {'instructions':>13} {'label scan (ms)':>16} {'linked (ms)':>12}")
+    for filler in (0, 100, 1000, 5000):
+        program = CodeGenerator(peephole=False).generate(parse_source(padded_program(filler), optimize=False))
+        linked = link(program)
+        scan = best_of(silenced(lambda: LegacyVM(program).run()), repeat=3)
+        direct = best_of(silenced(lambda: LegacyVM(linked).run()), repeat=3)
+        print(f"{filler:>8} {len(linked):>13} {scan * 1000:>16.2f} {direct * 1000:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
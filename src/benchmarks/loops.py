@@ -0,0 +1,84 @@
+"""Dispatch counts with and without loop-invariant code motion and strength
+reduction (optimizer.LoopOptimizer), on loops written the naive way.
+"""
+from benchmarks import best_of, executed_steps, silenced
+from code_gen import CodeGenerator
+from compiler import parse_source
+from linker import link
+from optimizer import LoopOptimizer, eliminate_dead_code, fold_constants
+from sam_vm import SAMVirtualMachine
+
+INVARIANT = """
+let pi: float = 3.14159;
+let r: float = 2.0;
+let n: int = 1000;
+r = r * 1.5;
+n = n * 5;
+let i: int = 0;
+let area: float = 0.0;
+while (i < n * 2) {
+    area = area + pi * r * r;
+    i = i + 1;
+}
+print(area);
+"""
+
+INDUCTION = """
+let n: int = 5000;
+let k: int = 7;
+let i: int = 0;
+let total: int = 0;
+while (i < n) {
+    total = total + i * k;
+    if (i * k > 100) {
+        total = total - i * k / 100;
+    }
+    i = i + 1;
+}
+print(total);
+"""
+
+NESTED = """
+let n: int = 120;
+let w: int = 3;
+let i: int = 0;
+let total: int = 0;
+while (i < n) {
+    let j: int = 0;
+    while (j < n) {
+        total = total + (w * n + i * w) - j * 2 + j * 2 / 2;
+        j = j + 1;
+    }
+    i = i + 1;
+}
+print(total);
+"""
+
+PROGRAMS = [("invariant", INVARIANT), ("induction", INDUCTION), ("nested", NESTED)]
+
+
+def compiled(source: str, loops: bool):
+    ast = eliminate_dead_code(fold_constants(parse_source(source, optimize=False)))
+    optimizer = LoopOptimizer()
+    if loops:
+        optimizer.optimize(ast)
+    return link(CodeGenerator().generate(ast)), optimizer
+
+
+def main():
+    print(f"{'program':>10} {'hoisted':>8} {'reduced':>8} {'plain':>8} {'optimized':>10} {'saved':>7} "
+          f"{'plain (ms)':>11} {'optimized (ms)':>15}")
+    for name, source in PROGRAMS:
+        plain, _ = compiled(source, False)
+        optimized, optimizer = compiled(source, True)
+        plain_steps = silenced(lambda: executed_steps(plain))()
+        optimized_steps = silenced(lambda: executed_steps(optimized))()
+        plain_time = best_of(silenced(lambda: SAMVirtualMachine(plain).run()))
+        optimized_time = best_of(silenced(lambda: SAMVirtualMachine(optimized).run()))
+        saved = 1 - optimized_steps / plain_steps
+        print(f"{name:>10} {optimizer.hoisted:>8} {optimizer.reduced:>8} {plain_steps:>8} {optimized_steps:>10} "
+              f"{saved:>7.1%} {plain_time * 1000:>11.3f} {optimized_time * 1000:>15.3f}")
+
+
+if __name__ == "__main__":
+    main()
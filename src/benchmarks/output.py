@@ -0,0 +1,60 @@
+"""Throughput of print-heavy scripts with each output sink.
+
+Everything is written to ``os.devnull`` so the numbers measure formatting and
+I/O call overhead, not the terminal. ``print()`` is the builtin the VM used to
+call once per value.
+"""
+import os
+
+from benchmarks import best_of
+from compiler import compile_source
+from output import BufferedTextSink, FdSink, ListSink, TextSink
+from sam_vm import SAMVirtualMachine
+
+TABLE = """
+let i: int = 1;
+while (i <= 300) {
+  let j: int = 1;
+  while (j <= 300) {
+    print(i * j);
+    j = j + 1;
+  }
+  i = i + 1;
+}
+"""
+
+
+class BuiltinPrintSink:
+    """The old behaviour: one builtin ``print`` call per value."""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, value):
+        print(value, file=self.stream)
+
+    def flush(self):
+        self.stream.flush()
+
+
+def main():
+    instructions = compile_source(TABLE)
+    lines = 300 * 300
+    with open(os.devnull, "w") as devnull:
+        fd = devnull.fileno()
+        sinks = {
+            "builtin print": lambda: BuiltinPrintSink(devnull),
+            "text": lambda: TextSink(devnull),
+            "buffered 4 KiB": lambda: BufferedTextSink(devnull, flush_size=4 * 1024),
+            "buffered 64 KiB": lambda: BufferedTextSink(devnull),
+            "fd 64 KiB": lambda: FdSink(fd),
+            "list": lambda: ListSink(),
+        }
+        print(f"{'sink':>16} {'ms':>9} {'lines/s':>12}")
+        for name, make_sink in sinks.items():
+            elapsed = best_of(lambda: SAMVirtualMachine(instructions, make_sink()).run(), repeat=3)
+            print(f"{name:>16} {elapsed * 1000:>9.1f} {lines / elapsed:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""Static and dynamic instruction counts with and without the peephole pass.
+
+Runs the valid scripts from ``main.py`` and reports how many instructions
+peephole.PeepholeOptimizer removed from each program, how many fewer the VM
+dispatched and the wall time before and after. The AST passes are off:
+they fold most of ``example_6`` to ``example_9`` away before the peephole
+pass sees them.
+"""
+import main as examples
+from benchmarks import best_of, executed_steps, silenced
+from code_gen import CodeGenerator
+from compiler import parse_source
+from linker import link
+from sam_vm import SAMVirtualMachine
+
+EXAMPLES = ["example_1", "example_5", "example_6", "example_7", "example_8", "example_9"]
+
+
+def main():
+    print(f"{'program':>10} {'removed':>8} {'plain':>7} {'peephole':>9} {'saved':>7} "
+          f"{'plain (ms)':>11} {'peephole (ms)':>14}")
+    for name in EXAMPLES:
+        source = getattr(examples, name)
+        plain = link(CodeGenerator(peephole=False).generate(parse_source(source, optimize=False)))
+        generator = CodeGenerator()
+        optimized = link(generator.generate(parse_source(source, optimize=False)))
+        plain_steps = silenced(lambda: executed_steps(plain))()
+        optimized_steps = silenced(lambda: executed_steps(optimized))()
+        plain_time = best_of(silenced(lambda: SAMVirtualMachine(plain).run()))
+        optimized_time = best_of(silenced(lambda: SAMVirtualMachine(optimized).run()))
+        saved = 1 - optimized_steps / plain_steps
+        print(f"{name:>10} {generator.peephole.removed:>8} {plain_steps:>7} {optimized_steps:>9} "
+              f"{saved:>7.1%} {plain_time * 1000:>11.3f} {optimized_time * 1000:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Latency under load for the asyncio time-slicing scheduler.
+
+A number of long-running tenants keep the scheduler busy while short scripts
+are submitted at a steady rate. For each quantum size the benchmark reports
+percentiles of the short scripts' turnaround (submit to halt) and of the
+event loop's lag (how late a 1 ms timer fires), plus total VM throughput.
+"""
+import asyncio
+import statistics
+import time
+
+from compiler import compile_source
+from scheduler import Scheduler
+
+HEAVY = """
+let i: int = 0;
+let total: int = 0;
+while (i < 60000) {
+  total = total + i * 3;
+  i = i + 1;
+}
+print(total);
+"""
+
+SHORT = """
+let i: int = 0;
+while (i < 50) {
+  i = i + 1;
+}
+print(i);
+"""
+
+
+def percentiles(samples: list) -> str:
+    cuts = statistics.quantiles(samples, n=100)
+    return " ".join(f"{cuts[p - 1] * 1000:>8.2f}" for p in (50, 95, 99))
+
+
+async def measure_lag(stop: asyncio.Event, lags: list):
+    interval = 0.001
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+async def scenario(quantum: int, heavy_count: int, short_count: int):
+    heavy, short = compile_source(HEAVY), compile_source(SHORT)
+    turnaround, lags = [], []
+    stop = asyncio.Event()
+    start = time.perf_counter()
+    async with Scheduler(quantum) as scheduler:
+        lag_task = asyncio.create_task(measure_lag(stop, lags))
+        for index in range(heavy_count):
+            scheduler.submit(f"heavy-{index}", heavy)
+        for index in range(short_count):
+            submitted = time.perf_counter()
+            await scheduler.submit(f"short-{index}", short).wait()
+            turnaround.append(time.perf_counter() - submitted)
+            await asyncio.sleep(0.002)
+        await scheduler.join()
+        stop.set()
+        await lag_task
+    return turnaround, lags, time.perf_counter() - start
+
+
+def main():
+    heavy_count, short_count = 20, 200
+    print(f"{heavy_count} heavy tenants, {short_count} short scripts (times in ms)")
+    print(f"{'quantum':>8} {'':>10} {'p50':>8} {'p95':>8} {'p99':>8}  {'total s':>8}")
+    for quantum in (100, 1000, 10000):
+        turnaround, lags, elapsed = asyncio.run(scenario(quantum, heavy_count, short_count))
+        print(f"{quantum:>8} {'turnaround':>10} {percentiles(turnaround)}  {elapsed:>8.2f}")
+        print(f"{'':>8} {'loop lag':>10} {percentiles(lags)}")
+
+
+if __name__ == "__main__":
+    main()
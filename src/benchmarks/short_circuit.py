@@ -0,0 +1,65 @@
+"""Eager versus short-circuit ``&&``/``||`` in CodeGenerator.
+
+Compiles condition-heavy scripts with ``short_circuit=False`` (both operands
+evaluated, then AND/OR) and with the default jumps, and reports dispatched
+instructions and wall time. ``example_9`` is compiled without the AST passes,
+which would otherwise fold its constant conditions away.
+"""
+import main as examples
+from benchmarks import best_of, executed_steps, silenced
+from code_gen import CodeGenerator
+from compiler import parse_source
+from linker import link
+from sam_vm import SAMVirtualMachine
+
+GUARDS = """
+let i: int = 0;
+let hits: int = 0;
+let limit: int = 3000;
+while (i < limit && hits < limit) {
+    if (i < 10 || i > 2990 || i == 1500) {
+        hits = hits + 1;
+    }
+    if (i > 100 && i < 200 && hits > 5) {
+        hits = hits + 2;
+    }
+    i = i + 1;
+}
+print(hits);
+"""
+
+FLAGS = """
+let i: int = 0;
+let count: int = 0;
+let ready: bool = false;
+let done: bool = false;
+while (!done) {
+    ready = i > 1000;
+    if (!ready || count > 10 && i / 3 > 2) {
+        count = count + 1;
+    }
+    i = i + 1;
+    done = i > 4000;
+}
+print(count);
+"""
+
+PROGRAMS = [("example_9", examples.example_9, False), ("guards", GUARDS, True), ("flags", FLAGS, True)]
+
+
+def main():
+    print(f"{'program':>10} {'eager':>8} {'short':>8} {'saved':>7} {'eager (ms)':>11} {'short (ms)':>11}")
+    for name, source, optimize in PROGRAMS:
+        eager = link(CodeGenerator(short_circuit=False).generate(parse_source(source, optimize)))
+        short = link(CodeGenerator().generate(parse_source(source, optimize)))
+        eager_steps = silenced(lambda: executed_steps(eager))()
+        short_steps = silenced(lambda: executed_steps(short))()
+        eager_time = best_of(silenced(lambda: SAMVirtualMachine(eager).run()))
+        short_time = best_of(silenced(lambda: SAMVirtualMachine(short).run()))
+        saved = 1 - short_steps / eager_steps
+        print(f"{name:>10} {eager_steps:>8} {short_steps:>8} {saved:>7.1%} "
+              f"{eager_time * 1000:>11.3f} {short_time * 1000:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Frame size with one slot per ``let`` versus SlotAllocator's slot reuse.
+
+Compiles the valid scripts from ``main.py`` plus a generated script made of
+many sibling blocks full of block-local temporaries, and reports the peak
+slot count (the frame size the VM allocates) both ways.
+"""
+import main as examples
+from code_gen import CodeGenerator
+from compiler import parse_source
+
+
+def temporaries(blocks: int = 300, per_block: int = 6) -> str:
+    lines = ["let total: int = 0;", "let i: int = 0;", "while (i < 3) {"]
+    for block in range(blocks):
+        lines.append(f"    if (i < {block % 3}) {{")
+        previous = "i"
+        for temporary in range(per_block):
+            lines.append(f"        let t{temporary}: int = {previous} * {temporary + 2} + {block};")
+            previous = f"t{temporary}"
+        lines.append(f"        total = total + {previous};")
+        lines.append("    }")
+    lines += ["    i = i + 1;", "}", "print(total);"]
+    return "\n".join(lines)
+
+
+PROGRAMS = [(name, getattr(examples, name)) for name in
+            ["example_1", "example_5", "example_6", "example_7", "example_8", "example_9"]]
+PROGRAMS.append(("temporaries", temporaries()))
+
+
+def slot_count(source: str, reuse_slots: bool) -> int:
+    generator = CodeGenerator(reuse_slots=reuse_slots)
+    generator.generate(parse_source(source))
+    return generator.frame_layout().slot_count
+
+
+def main():
+    print(f"{'program':>12} {'one per let':>12} {'reused':>7} {'saved':>7}")
+    for name, source in PROGRAMS:
+        flat, reused = slot_count(source, False), slot_count(source, True)
+        saved = 1 - reused / flat if flat else 0
+        print(f"{name:>12} {flat:>12} {reused:>7} {saved:>7.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""Dispatch counts with and without superinstruction fusion.
+
+Runs the valid scripts from ``main.py`` and reports how many instructions
+the VM dispatched before and after superinstructions.fuse, plus wall time.
+The AST passes are off: they fold most of ``example_6`` to ``example_9``
+away, leaving nothing to fuse.
+"""
+import main as examples
+from benchmarks import best_of, executed_steps, silenced
+from compiler import compile_source
+from sam_vm import SAMVirtualMachine
+
+EXAMPLES = ["example_1", "example_5", "example_6", "example_7", "example_8", "example_9"]
+
+
+def main():
+    print(f"{'program':>10} {'plain':>7} {'fused':>7} {'saved':>7} {'plain (ms)':>11} {'fused (ms)':>11}")
+    for name in EXAMPLES:
+        source = getattr(examples, name)
+        plain = compile_source(source, optimize=False)
+        fused = compile_source(source, superinstructions=True, optimize=False)
+        plain_steps = silenced(lambda: executed_steps(plain))()
+        fused_steps = silenced(lambda: executed_steps(fused))()
+        plain_time = best_of(silenced(lambda: SAMVirtualMachine(plain).run()))
+        fused_time = best_of(silenced(lambda: SAMVirtualMachine(fused).run()))
+        saved = 1 - fused_steps / plain_steps
+        print(f"{name:>10} {plain_steps:>7} {fused_steps:>7} {saved:>7.1%} "
+              f"{plain_time * 1000:>11.3f} {fused_time * 1000:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
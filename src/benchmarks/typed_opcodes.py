@@ -0,0 +1,77 @@
+"""Typed opcodes against the old untyped lowering.
+
+CodeGenerator now emits IDIV/FDIV, LE, GE and NE from the types
+SemanticAnalyzer stores on the AST. ``untyped`` rewrites a program back to
+what it used to emit (a DIV that checks its operand types, ``<=`` as
+``PUSH 1; ADD; LT`` and ``>=`` as ``PUSH 1; SUB; GT``), which is only
+equivalent because the scripts below compare ints; ``!=`` had no lowering
+at all, so they do not use it. Reports dispatched instructions and wall
+time for both.
+"""
+from benchmarks import best_of, executed_steps, silenced
+from code_gen import CodeGenerator
+from compiler import parse_source
+from linker import link
+from sam_vm import Instruction, Opcode, SAMVirtualMachine
+
+DIVISIONS = """
+let i: int = 1;
+let total: int = 0;
+let ratio: float = 0.0;
+while (i <= 20000) {
+    total = total + 100000 / i;
+    ratio = ratio + 1.0 / 3.0 * ratio / 2.0;
+    i = i + 1;
+}
+print(total);
+print(ratio);
+"""
+
+BOUNDS = """
+let i: int = 0;
+let inside: int = 0;
+while (i <= 20000) {
+    if (i >= 500 && i <= 15000) {
+        inside = inside + 1;
+    }
+    i = i + 1;
+}
+print(inside);
+"""
+
+PROGRAMS = [("divisions", DIVISIONS), ("bounds", BOUNDS)]
+
+LOWERINGS = {
+    Opcode.IDIV: [Instruction(Opcode.DIV)],
+    Opcode.FDIV: [Instruction(Opcode.DIV)],
+    Opcode.LE: [Instruction(Opcode.PUSH, 1), Instruction(Opcode.ADD), Instruction(Opcode.LT)],
+    Opcode.GE: [Instruction(Opcode.PUSH, 1), Instruction(Opcode.SUB), Instruction(Opcode.GT)],
+}
+
+
+def untyped(program: list) -> list:
+    lowered = []
+    for entry in program:
+        if isinstance(entry, Instruction) and entry.opcode in LOWERINGS:
+            lowered.extend(LOWERINGS[entry.opcode])
+        else:
+            lowered.append(entry)
+    return lowered
+
+
+def main():
+    print(f"{'program':>10} {'untyped':>8} {'typed':>8} {'saved':>7} {'untyped (ms)':>13} {'typed (ms)':>11}")
+    for name, source in PROGRAMS:
+        typed = CodeGenerator().generate(parse_source(source))
+        old, new = link(untyped(typed)), link(typed)
+        old_steps = silenced(lambda: executed_steps(old))()
+        new_steps = silenced(lambda: executed_steps(new))()
+        old_time = best_of(silenced(lambda: SAMVirtualMachine(old).run()))
+        new_time = best_of(silenced(lambda: SAMVirtualMachine(new).run()))
+        saved = 1 - new_steps / old_steps
+        print(f"{name:>10} {old_steps:>8} {new_steps:>8} {saved:>7.1%} "
+              f"{old_time * 1000:>13.3f} {new_time * 1000:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
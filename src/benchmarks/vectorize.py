@@ -0,0 +1,70 @@
+"""Interpreted vs. NumPy-vectorized counted loops.
+
+Needs NumPy; each workload runs on a fresh VM, so the time includes
+matching the loop and checking its run-time values.
+"""
+from benchmarks import best_of
+from compiler import compile_source
+from output import ListSink
+from sam_vm import SAMVirtualMachine
+from vectorize import LoopVectorizer, numpy
+
+AFFINE = """
+let n: int = 1000000;
+let k: int = 7;
+let i: int = 0;
+let x: int = 0;
+while (i < n) {
+  x = x + i * k;
+  i = i + 1;
+}
+print(x);
+"""
+
+MIXED = """
+let n: int = 1000000;
+let i: int = 0;
+let total: int = 0;
+let last: int = 0;
+let f: float = 0.0;
+while (i <= n) {
+  total = total - i / 3 + 5;
+  last = i * i / 7;
+  f = f + 0.001;
+  i = i + 2;
+}
+print(total);
+print(last);
+print(f);
+"""
+
+SHORT = """
+let i: int = 0;
+let x: int = 0;
+while (i < 40) {
+  x = x + i;
+  i = i + 1;
+}
+print(x);
+"""
+
+WORKLOADS = {"affine sum": AFFINE, "mixed updates": MIXED, "40 iterations": SHORT}
+
+
+def main():
+    if numpy is None:
+        print("NumPy is not installed; the vectorizer is disabled")
+        return
+    print(f"{'workload':>14} {'stream':>6} {'interp ms':>10} {'numpy ms':>9} {'speedup':>8}")
+    for name, source in WORKLOADS.items():
+        for superinstructions in (False, True):
+            instructions = compile_source(source, superinstructions)
+            interpreted = best_of(lambda: SAMVirtualMachine(instructions, ListSink()).run(), repeat=3)
+            vectorized = best_of(lambda: SAMVirtualMachine(instructions, ListSink(),
+                                                           vectorizer=LoopVectorizer()).run(), repeat=3)
+            print(f"{name:>14} {'fused' if superinstructions else 'plain':>6} {interpreted * 1000:>10.2f} "
+                  f"{vectorized * 1000:>9.2f} {interpreted / vectorized:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+import marshal
+import mmap
+import struct
+import sys
+from array import array
+
+from sam_vm import FrameLayout, Opcode, Instruction
+
+# Integer encoding of every opcode: its index in this list. Only append to it,
+# existing numbers must stay stable.
+OPCODES = [
+    Opcode.PUSH,
+    Opcode.POP,
+    Opcode.ADD,
+    Opcode.SUB,
+    Opcode.MUL,
+    Opcode.DIV,
+    Opcode.LT,
+    Opcode.GT,
+    Opcode.EQ,
+    Opcode.AND,
+    Opcode.OR,
+    Opcode.NOT,
+    Opcode.JMP,
+    Opcode.JZ,
+    Opcode.STORE,
+    Opcode.LOAD,
+    Opcode.HALT,
+    Opcode.SWAP,
+    Opcode.DUP,
+    Opcode.PRINT,
+    Opcode.LOAD_LOAD_ADD,
+    Opcode.LOAD_LOAD_SUB,
+    Opcode.LOAD_LOAD_MUL,
+    Opcode.CMP_LT_JZ,
+    Opcode.CMP_GT_JZ,
+    Opcode.CMP_EQ_JZ,
+    Opcode.INC_SLOT,
+    Opcode.NEG,
+    Opcode.IDIV,
+    Opcode.FDIV,
+    Opcode.LE,
+    Opcode.GE,
+    Opcode.NE,
+]
+OPCODE_NUMBERS = {opcode: number for number, opcode in enumerate(OPCODES)}
+
+
+class OperandKind:
+    NONE = "NONE"          # operand slot unused (stored as 0)
+    CONSTANT = "CONSTANT"  # index into the constant pool (also holds operand tuples)
+    SLOT = "SLOT"          # memory slot number
+    ADDRESS = "ADDRESS"    # absolute jump target
+
+
+OPERAND_KINDS = {
+    Opcode.PUSH: OperandKind.CONSTANT,
+    Opcode.LOAD: OperandKind.SLOT,
+    Opcode.STORE: OperandKind.SLOT,
+    Opcode.JMP: OperandKind.ADDRESS,
+    Opcode.JZ: OperandKind.ADDRESS,
+    Opcode.LOAD_LOAD_ADD: OperandKind.CONSTANT,
+    Opcode.LOAD_LOAD_SUB: OperandKind.CONSTANT,
+    Opcode.LOAD_LOAD_MUL: OperandKind.CONSTANT,
+    Opcode.CMP_LT_JZ: OperandKind.CONSTANT,
+    Opcode.CMP_GT_JZ: OperandKind.CONSTANT,
+    Opcode.CMP_EQ_JZ: OperandKind.CONSTANT,
+    Opcode.INC_SLOT: OperandKind.CONSTANT,
+}
+
+
+class Bytecode:
+    """Array-backed encoding of a linked SAM program.
+
+    ``opcodes[pc]`` holds the integer opcode of instruction ``pc`` and
+    ``operands[pc]`` its operand: a constant pool index, a memory slot or a
+    jump address depending on the opcode (see OPERAND_KINDS). Constants are
+    deduplicated, so a loop that pushes ``1`` a hundred times stores it once.
+    """
+
+    def __init__(self, opcodes: array, operands: array, constants: list):
+        self.opcodes = opcodes
+        self.operands = operands
+        self.constants = constants
+
+    def __len__(self) -> int:
+        return len(self.opcodes)
+
+    def operations(self):
+        """Yield ``(opcode, operand)`` pairs straight from the arrays."""
+        constants = self.constants
+        for number, operand in zip(self.opcodes, self.operands):
+            opcode = OPCODES[number]
+            kind = OPERAND_KINDS.get(opcode, OperandKind.NONE)
+            if kind == OperandKind.CONSTANT:
+                yield opcode, constants[operand]
+            elif kind == OperandKind.NONE:
+                yield opcode, None
+            else:
+                yield opcode, operand
+
+
+def encode(instructions: list[Instruction]) -> Bytecode:
+    """Encode linked instructions (see linker.link) into a Bytecode."""
+    opcodes = array('B')
+    operands = array('i')
+    constants = []
+    pool = {}
+    for instruction in instructions:
+        if not isinstance(instruction, Instruction):
+            raise ValueError(f"Cannot encode unlinked program entry: {instruction}")
+        kind = OPERAND_KINDS.get(instruction.opcode, OperandKind.NONE)
+        operand = instruction.operand
+        if kind == OperandKind.CONSTANT:
+            # Keyed by type and repr so that True, 1, 1.0 and -0.0 stay distinct
+            key = (type(operand), repr(operand))
+            if key not in pool:
+                pool[key] = len(constants)
+                constants.append(operand)
+            operand = pool[key]
+        elif kind == OperandKind.NONE:
+            operand = 0
+        elif not isinstance(operand, int):
+            raise ValueError(f"Unresolved operand in instruction: {instruction}")
+        opcodes.append(OPCODE_NUMBERS[instruction.opcode])
+        operands.append(operand)
+    return Bytecode(opcodes, operands, constants)
+
+
+def decode(bytecode: Bytecode) -> list[Instruction]:
+    """Expand a Bytecode back into Instruction objects, e.g. for printing."""
+    return [Instruction(opcode, operand) for opcode, operand in bytecode.operations()]
+
+
+# On-disk format (little-endian): HEADER, then ``count`` int32 operands, then
+# ``count`` opcode bytes, then a marshal blob of ``(constants, slot_types)``.
+# The header is a multiple of 4 bytes, so the operands stay aligned.
+MAGIC = b"SAMC"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHHI32sII")  # magic, format, compiler, flags, hash, count, blob size
+
+# Header flags
+FLAG_SUPERINSTRUCTIONS = 1
+
+
+class BytecodeHeader:
+    def __init__(self, compiler_version: int, flags: int, source_hash: bytes, count: int,
+                 format_version: int = FORMAT_VERSION):
+        self.format_version = format_version
+        self.compiler_version = compiler_version
+        self.flags = flags
+        self.source_hash = source_hash
+        self.count = count
+
+
+def write_file(path, bytecode: Bytecode, frame: FrameLayout, header: BytecodeHeader):
+    """Write a Bytecode and its frame layout to ``path`` in the format above."""
+    operands = array('i', bytecode.operands)
+    if sys.byteorder != "little":
+        operands.byteswap()
+    blob = marshal.dumps((list(bytecode.constants), list(frame.slot_types)))
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, header.format_version, header.compiler_version, header.flags,
+                               header.source_hash, len(bytecode), len(blob)))
+        file.write(operands.tobytes())
+        file.write(bytes(bytecode.opcodes))
+        file.write(blob)
+
+
+def read_header(data) -> BytecodeHeader:
+    if len(data) < HEADER.size:
+        raise ValueError("Truncated bytecode file")
+    magic, format_version, compiler_version, flags, source_hash, count, _ = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a SAM bytecode file")
+    if format_version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported bytecode format version: {format_version}")
+    return BytecodeHeader(compiler_version, flags, source_hash, count, format_version)
+
+
+def read_file(path) -> tuple[BytecodeHeader, Bytecode, FrameLayout]:
+    """Load a file written by write_file through a read-only memory map.
+
+    The opcode and operand arrays of the returned Bytecode are memoryviews
+    straight into the mapping, so nothing is copied or parsed up front; the
+    mapping stays open for as long as the Bytecode uses it.
+    """
+    with open(path, "rb") as file:
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    header = read_header(data)
+    _, _, _, _, _, count, blob_size = HEADER.unpack_from(data)
+    operands_end = HEADER.size + 4 * count
+    opcodes_end = operands_end + count
+    if len(data) != opcodes_end + blob_size:
+        raise ValueError("Truncated bytecode file")
+    view = memoryview(data)
+    if sys.byteorder == "little":
+        operands = view[HEADER.size:operands_end].cast('i')
+    else:
+        operands = array('i', view[HEADER.size:operands_end])
+        operands.byteswap()
+    opcodes = view[operands_end:opcodes_end]
+    constants, slot_types = marshal.loads(view[opcodes_end:])
+    return header, Bytecode(opcodes, operands, constants), FrameLayout(slot_types)
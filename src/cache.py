@@ -0,0 +1,103 @@
+"""On-disk cache of compiled bytecode, keyed by the hash of the source.
+
+A hit loads the program straight from its bytecode file (see
+bytecode.write_file/read_file) and skips lexing, parsing, analysis and code
+generation. Entries are rebuilt when COMPILER_VERSION changes, and the cache
+directory is kept under ``max_size`` bytes by evicting the least recently
+used files (every hit refreshes a file's modification time).
+"""
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+from bytecode import FLAG_SUPERINSTRUCTIONS, BytecodeHeader, encode, read_file, write_file
+from code_gen import CodeGenerator
+from compiler import COMPILER_VERSION, parse_source
+from linker import link
+from sam_vm import SAMVirtualMachine
+from superinstructions import fuse
+
+CACHE_SUFFIX = ".samc"
+
+
+class BytecodeCache:
+    def __init__(self, directory, max_size: int = 64 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, source_hash: bytes, flags: int) -> Path:
+        return self.directory / f"{source_hash.hex()}-{flags}{CACHE_SUFFIX}"
+
+    def compile(self, source: str, superinstructions: bool = False):
+        """Return ``(bytecode, frame)`` for a script, from the cache if possible."""
+        source_hash = hashlib.sha256(source.encode()).digest()
+        flags = FLAG_SUPERINSTRUCTIONS if superinstructions else 0
+        path = self.path(source_hash, flags)
+        try:
+            header, bytecode, frame = read_file(path)
+        except (OSError, ValueError, EOFError, TypeError):
+            pass  # missing or unreadable: compile it again
+        else:
+            if header.compiler_version == COMPILER_VERSION and header.source_hash == source_hash:
+                self.hits += 1
+                os.utime(path)
+                return bytecode, frame
+        self.misses += 1
+        generator = CodeGenerator()
+        program = generator.generate(parse_source(source))
+        if superinstructions:
+            program = fuse(program)
+        bytecode, frame = encode(link(program)), generator.frame_layout()
+        self.store(path, bytecode, frame, BytecodeHeader(COMPILER_VERSION, flags, source_hash, len(bytecode)))
+        return bytecode, frame
+
+    def load(self, source: str, output=None, superinstructions: bool = False) -> SAMVirtualMachine:
+        bytecode, frame = self.compile(source, superinstructions)
+        return SAMVirtualMachine(bytecode, output, frame)
+
+    def store(self, path: Path, bytecode, frame, header: BytecodeHeader):
+        # Write to a temporary file and rename it, so that concurrent readers
+        # never see a partial entry
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        os.close(descriptor)
+        try:
+            write_file(temporary, bytecode, frame, header)
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+        self.evict()
+
+    def entries(self) -> list:
+        """``(mtime, size, path)`` of every cache file, least recently used first."""
+        entries = []
+        for path in self.directory.glob(f"*{CACHE_SUFFIX}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+        return sorted(entries)
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_size:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        for _, _, path in self.entries():
+            path.unlink(missing_ok=True)
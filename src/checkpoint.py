@@ -0,0 +1,188 @@
+"""Checkpoint and restore of SAMVirtualMachine state.
+
+A Checkpoint is the pc, the operand stack, the memory slots and a hash of
+the program they belong to. Restoring one into a fresh VM built from the
+same program resumes execution exactly where the checkpoint was taken.
+
+Checkpointer runs a VM in slices (see SAMVirtualMachine.run's
+``max_steps``) and takes checkpoints every ``every`` instructions and/or
+when a signal arrives. Taking a checkpoint only copies the stack and memory
+on the running thread; encoding, compression and the atomic file write
+happen on a background thread, so execution is not held up by disk I/O; a
+checkpoint that falls due while the previous one is still being written is
+taken at the next slice boundary instead of waiting for it. Output printed
+after the last checkpoint is printed again when a run is resumed.
+"""
+import hashlib
+import marshal
+import os
+import signal
+import threading
+import time
+import zlib
+
+from sam_vm import VMStatus
+
+MAGIC = b"SAMS"
+FORMAT_VERSION = 1
+
+# How often, in instructions, Checkpointer checks for a requested checkpoint
+SIGNAL_POLL_STEPS = 16 * 1024
+
+
+def program_hash(vm) -> bytes:
+    """SHA-256 of the VM's program, as ``(opcode, operand)`` pairs."""
+    digest = hashlib.sha256()
+    for opcode, operand in vm.operations():
+        digest.update(f"{opcode} {operand!r}\n".encode())
+    return digest.digest()
+
+
+class Checkpoint:
+    def __init__(self, program_hash: bytes, pc: int, stack: list, memory: list):
+        self.program_hash = program_hash
+        self.pc = pc
+        self.stack = stack
+        self.memory = memory
+
+    @classmethod
+    def capture(cls, vm, digest: bytes | None = None) -> 'Checkpoint':
+        """Copy the VM's state; ``digest`` saves rehashing the program."""
+        return cls(digest or program_hash(vm), vm.pc, vm.stack_values(), list(vm.memory))
+
+    def dumps(self) -> bytes:
+        state = marshal.dumps((self.program_hash, self.pc, self.stack, self.memory))
+        return MAGIC + bytes([FORMAT_VERSION]) + zlib.compress(state, 1)
+
+    @classmethod
+    def loads(cls, data: bytes) -> 'Checkpoint':
+        if len(data) <= len(MAGIC) or data[:len(MAGIC)] != MAGIC:
+            raise ValueError("Not a SAM checkpoint")
+        if data[len(MAGIC)] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported checkpoint version: {data[len(MAGIC)]}")
+        try:
+            return cls(*marshal.loads(zlib.decompress(data[len(MAGIC) + 1:])))
+        except (zlib.error, EOFError, TypeError, ValueError) as error:
+            raise ValueError("Truncated or corrupt SAM checkpoint") from error
+
+    def save(self, path):
+        """Write the checkpoint to ``path`` atomically."""
+        temporary = f"{path}.tmp"
+        with open(temporary, "wb") as file:
+            file.write(self.dumps())
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path) -> 'Checkpoint':
+        with open(path, "rb") as file:
+            return cls.loads(file.read())
+
+    def restore(self, vm, digest: bytes | None = None):
+        """Load this state into ``vm``, which must run the same program."""
+        if (digest or program_hash(vm)) != self.program_hash:
+            raise ValueError("Checkpoint was taken from a different program")
+        if len(self.memory) != len(vm.memory):
+            raise ValueError(f"Checkpoint has {len(self.memory)} memory slots, the VM has {len(vm.memory)}")
+        # The dispatch closures hold on to the stack and memory objects, so
+        # they are refilled in place
+        vm.pc = self.pc
+        vm.load_stack(self.stack)
+        for slot, value in enumerate(self.memory):
+            vm.memory[slot] = value
+
+
+class Checkpointer:
+    """Runs a VM, checkpointing it to ``path`` every ``every`` instructions
+    and whenever signal ``signum`` (e.g. ``signal.SIGUSR1``) is received.
+
+    ``stalls`` records how long each checkpoint held up execution, in
+    seconds; ``checkpoints`` counts the ones written.
+    """
+
+    def __init__(self, vm, path, every: int | None = None, signum: int | None = None):
+        self.vm = vm
+        self.path = path
+        self.every = every
+        self.signum = signum
+        self.digest = program_hash(vm)
+        self.requested = False
+        self.writer = None
+        self.error = None
+        self.stalls = []
+        self.checkpoints = 0
+
+    def resume(self) -> bool:
+        """Restore the checkpoint at ``path`` if there is one."""
+        if not os.path.exists(self.path):
+            return False
+        Checkpoint.load(self.path).restore(self.vm, self.digest)
+        return True
+
+    def request(self, *_):
+        """Ask for a checkpoint at the next slice boundary (signal-safe)."""
+        self.requested = True
+
+    def busy(self) -> bool:
+        return self.writer is not None and self.writer.is_alive()
+
+    def checkpoint(self):
+        start = time.perf_counter()
+        self.wait()
+        # Output printed so far must not be lost if we crash after this point
+        self.vm.output.flush()
+        checkpoint = Checkpoint.capture(self.vm, self.digest)
+        self.writer = threading.Thread(target=self.write, args=(checkpoint,))
+        self.writer.start()
+        self.stalls.append(time.perf_counter() - start)
+
+    def write(self, checkpoint: Checkpoint):
+        try:
+            checkpoint.save(self.path)
+            self.checkpoints += 1
+        except Exception as error:
+            self.error = error
+
+    def wait(self):
+        """Wait for the checkpoint being written, if any, to reach the disk."""
+        if self.writer is not None:
+            self.writer.join()
+            self.writer = None
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def run(self, max_steps: int | None = None) -> str:
+        """Run the VM until it halts, checkpointing along the way. Returns
+        BUDGET_EXHAUSTED if ``max_steps`` ran out first."""
+        previous = None
+        if self.signum is not None:
+            previous = signal.signal(self.signum, self.request)
+        slice_steps = min(self.every or SIGNAL_POLL_STEPS, SIGNAL_POLL_STEPS) \
+            if self.signum is not None else self.every
+        since_checkpoint = 0
+        due = False
+        try:
+            while True:
+                steps = slice_steps
+                if max_steps is not None:
+                    if max_steps <= 0:
+                        return VMStatus.BUDGET_EXHAUSTED
+                    steps = max_steps if steps is None else min(steps, max_steps)
+                    max_steps -= steps
+                status = self.vm.run(max_steps=steps)
+                if status == VMStatus.HALTED:
+                    return status
+                since_checkpoint += steps
+                if self.requested or (self.every is not None and since_checkpoint >= self.every):
+                    self.requested = False
+                    since_checkpoint = 0
+                    due = True
+                if due and not self.busy():
+                    due = False
+                    self.checkpoint()
+        finally:
+            if self.signum is not None:
+                signal.signal(self.signum, previous)
+            self.wait()
@@ -0,0 +1,227 @@
+import operator
+
+from lexer import TokenType
+from output import TextSink
+from parser import (
+    ASTNode,
+    Program,
+    VariableDecl,
+    WhileLoop,
+    IfStatement,
+    AssignmentStmt,
+    BinaryOp,
+    UnaryOp,
+    Identifier,
+    Literal,
+    BreakStatement,
+    PrintStatement,
+    ElseStatement
+)
+
+ARITHMETIC_OPERATORS = {
+    TokenType.PLUS: operator.add,
+    TokenType.MINUS: operator.sub,
+    TokenType.MULTIPLY: operator.mul,
+}
+COMPARISON_OPERATORS = {
+    TokenType.LESS_THAN: operator.lt,
+    TokenType.GREATER_THAN: operator.gt,
+    TokenType.EQUAL_EQUAL: operator.eq,
+    TokenType.NOT_EQUAL: operator.ne,
+    TokenType.LESS_EQUAL: operator.le,
+    TokenType.GREATER_EQUAL: operator.ge,
+}
+
+
+class ClosureProgram:
+    """A program compiled to closures; ``run()`` calls the root closure.
+
+    ``slots`` is the preallocated variable storage shared by all closures.
+    """
+
+    def __init__(self, root, slots: list, output):
+        self.root = root
+        self.slots = slots
+        self.output = output
+
+    def run(self):
+        try:
+            self.root()
+        finally:
+            self.output.flush()
+
+
+class ClosureCompiler:
+    """Compiles the analyzed AST into a tree of pre-bound Python closures.
+
+    Expression nodes become zero-argument closures returning the same values
+    the SAM VM would compute (comparisons and logic yield 0/1, integer
+    division floors). Statement closures return a true value only when a
+    ``break`` ran, which the enclosing loop consumes.
+    """
+
+    def __init__(self, output=None):
+        self.output = output if output is not None else TextSink()
+        self.scopes: list[dict[str, int]] = [{}]
+        self.slot_count = 0
+        self.slots = []
+        self.loop_depth = 0
+
+    def compile(self, ast: Program) -> ClosureProgram:
+        root = self.visit(ast)
+        # Filled in place so every closure already bound to ``self.slots`` sees it
+        self.slots.extend([0] * self.slot_count)
+        return ClosureProgram(root, self.slots, self.output)
+
+    def visit(self, node: ASTNode):
+        method_name = f"visit_{type(node).__name__}"
+        visit_method = getattr(self, method_name, self.generic_visit)
+        return visit_method(node)
+
+    def generic_visit(self, node: ASTNode):
+        raise Exception(f"No visit method for {type(node).__name__}")
+
+    def lookup(self, name: str) -> int:
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        raise Exception(f"Variable '{name}' not declared")
+
+    def block(self, statements: list[ASTNode]):
+        self.scopes.append({})
+        compiled = tuple(self.visit(statement) for statement in statements)
+        self.scopes.pop()
+
+        def block():
+            for statement in compiled:
+                if statement():
+                    return True
+        return block
+
+    def visit_Program(self, node: Program):
+        statements = tuple(self.visit(statement) for statement in node.statements)
+
+        def program():
+            for statement in statements:
+                statement()
+        return program
+
+    def visit_VariableDecl(self, node: VariableDecl):
+        value = self.visit(node.value)
+        slot = self.slot_count
+        self.slot_count += 1
+        self.scopes[-1][node.name] = slot
+        slots = self.slots
+
+        def declare():
+            slots[slot] = value()
+        return declare
+
+    def condition(self, node: ASTNode):
+        """Closure for a branch condition; only its truth value matters, so
+        comparisons skip the conversion to 0/1."""
+        if isinstance(node, BinaryOp) and node.operator in COMPARISON_OPERATORS:
+            return self.binary(COMPARISON_OPERATORS[node.operator], node.left, node.right)
+        return self.visit(node)
+
+    def visit_WhileLoop(self, node: WhileLoop):
+        condition = self.condition(node.condition)
+        self.loop_depth += 1
+        body = self.block(node.body)
+        self.loop_depth -= 1
+
+        def while_loop():
+            while condition():
+                if body():
+                    break
+        return while_loop
+
+    def visit_IfStatement(self, node: IfStatement):
+        branches = [(self.condition(node.condition), self.block(node.if_body))]
+        otherwise = None
+        for else_if in node.else_if_list:
+            if isinstance(else_if, ElseStatement):  # This is the final 'else'
+                otherwise = self.block(else_if.body)
+            else:
+                branches.append((self.condition(else_if.condition), self.block(else_if.if_body)))
+        branches = tuple(branches)
+
+        def if_statement():
+            for condition, body in branches:
+                if condition():
+                    return body()
+            if otherwise is not None:
+                return otherwise()
+        return if_statement
+
+    def visit_AssignmentStmt(self, node: AssignmentStmt):
+        value = self.visit(node.value)
+        slot = self.lookup(node.name)
+        slots = self.slots
+
+        def assign():
+            slots[slot] = value()
+        return assign
+
+    def visit_BreakStatement(self, node: BreakStatement):
+        if self.loop_depth == 0:
+            raise Exception("Break statement outside of loop")
+
+        def break_():
+            return True
+        return break_
+
+    def visit_PrintStatement(self, node: PrintStatement):
+        value = self.visit(node.expr)
+        write = self.output.write
+
+        def print_():
+            write(value())
+        return print_
+
+    def binary(self, function, left: ASTNode, right: ASTNode):
+        """Closure applying ``function``, with variable and literal operands inlined."""
+        slots = self.slots
+        if isinstance(left, Identifier) and isinstance(right, Literal):
+            a, b = self.lookup(left.name), right.value
+            return lambda: function(slots[a], b)
+        if isinstance(left, Identifier) and isinstance(right, Identifier):
+            a, b = self.lookup(left.name), self.lookup(right.name)
+            return lambda: function(slots[a], slots[b])
+        left, right = self.visit(left), self.visit(right)
+        return lambda: function(left(), right())
+
+    def visit_BinaryOp(self, node: BinaryOp):
+        if node.operator in ARITHMETIC_OPERATORS:
+            return self.binary(ARITHMETIC_OPERATORS[node.operator], node.left, node.right)
+        if node.operator == TokenType.DIVIDE:
+            divide = operator.floordiv if node.type == 'int' else operator.truediv
+            return self.binary(divide, node.left, node.right)
+        if node.operator in COMPARISON_OPERATORS:
+            compare = COMPARISON_OPERATORS[node.operator]
+            return self.binary(lambda a, b: int(compare(a, b)), node.left, node.right)
+        if node.operator == TokenType.AND:
+            # Short-circuits, as in the SAM VM
+            left, right = self.visit(node.left), self.visit(node.right)
+            return lambda: int(left() and right())
+        if node.operator == TokenType.OR:
+            left, right = self.visit(node.left), self.visit(node.right)
+            return lambda: int(left() or right())
+        raise Exception(f"Unknown binary operator: {node.operator}")
+
+    def visit_UnaryOp(self, node: UnaryOp):
+        operand = self.visit(node.operand)
+        if node.operator == TokenType.MINUS:
+            return lambda: 0 - operand()  # see CodeGenerator.visit_UnaryOp
+        if node.operator == TokenType.NOT:
+            return lambda: int(not operand())
+        raise Exception(f"Unknown unary operator: {node.operator}")
+
+    def visit_Identifier(self, node: Identifier):
+        slots = self.slots
+        slot = self.lookup(node.name)
+        return lambda: slots[slot]
+
+    def visit_Literal(self, node: Literal):
+        value = node.value
+        return lambda: value
@@ -14,20 +14,43 @@ from parser import (
     PrintStatement,
     ElseStatement
 )
-from sam_vm import Opcode, Instruction
+from peephole import PeepholeOptimizer
+from sam_vm import Opcode, Instruction, FrameLayout
+from slot_allocator import SlotAllocator
 
 class CodeGenerator:
-    def __init__(self):
+    """Generates SAM stack code from an analyzed AST.
+
+    ``&&`` and ``||`` short-circuit: they compile to conditional jumps, and
+    in ``if``/``while`` conditions they jump straight to the branch targets
+    without materializing a boolean. ``short_circuit=False`` evaluates both
+    operands and combines them with AND/OR instead.
+
+    Variables get memory slots from SlotAllocator, which follows block
+    scopes and lets variables whose live ranges do not overlap share a slot;
+    ``reuse_slots=False`` gives every ``let`` its own slot.
+    """
+
+    def __init__(self, peephole: bool = True, short_circuit: bool = True, reuse_slots: bool = True):
         self.instructions = []
-        self.symbol_table = {}
+        self.peephole = PeepholeOptimizer() if peephole else None
+        self.short_circuit = short_circuit
+        self.allocator = SlotAllocator(reuse_slots)
         self.label_counter = 0
         self.loop_end_labels = []
 
     def generate(self, ast: Program):
+        self.allocator.allocate(ast)
         self.visit(ast)
         self.emit(Opcode.HALT)
+        if self.peephole is not None:
+            self.instructions = self.peephole.optimize(self.instructions)
         return self.instructions
 
+    def frame_layout(self) -> FrameLayout:
+        """Slot count and per-slot types of the generated program."""
+        return FrameLayout(list(self.allocator.slot_types))
+
     def visit(self, node: ASTNode):
         method_name = f"visit_{type(node).__name__}"
         visit_method = getattr(self, method_name, self.generic_visit)
@@ -52,8 +75,7 @@ class CodeGenerator:
 
     def visit_VariableDecl(self, node: VariableDecl):
         self.visit(node.value)
-        self.symbol_table[node.name] = len(self.symbol_table)
-        self.emit(Opcode.STORE, self.symbol_table[node.name])
+        self.emit(Opcode.STORE, self.allocator.slot(node))
 
     def visit_WhileLoop(self, node: WhileLoop):
         start_label = self.create_label()
@@ -64,8 +86,7 @@ class CodeGenerator:
         self.current_end_label = end_label
         self.emit(Opcode.JMP, start_label)
         self.emit_label(start_label + ":")
-        self.visit(node.condition)
-        self.emit(Opcode.JZ, end_label)
+        self.jump_if_false(node.condition, end_label)
 
         for statement in node.body:
             self.visit(statement)
@@ -77,9 +98,8 @@ class CodeGenerator:
     
     def visit_IfStatement(self, node: IfStatement):
         end_label = self.create_label()
-        self.visit(node.condition)
         next_label = self.create_label()
-        self.emit(Opcode.JZ, next_label)
+        self.jump_if_false(node.condition, next_label)
         
         for statement in node.if_body:
             self.visit(statement)
@@ -93,8 +113,7 @@ class CodeGenerator:
                     self.visit(statement)
             else:
                 next_label = self.create_label()
-                self.visit(else_if.condition)
-                self.emit(Opcode.JZ, next_label)
+                self.jump_if_false(else_if.condition, next_label)
                 
                 for statement in else_if.if_body:
                     self.visit(statement)
@@ -106,9 +125,54 @@ class CodeGenerator:
 
     def visit_AssignmentStmt(self, node: AssignmentStmt):
         self.visit(node.value)
-        self.emit(Opcode.STORE, self.symbol_table[node.name])
+        self.emit(Opcode.STORE, self.allocator.slot(node))
+
+    def jump_if_false(self, node: ASTNode, label: str):
+        """Jump to ``label`` if condition ``node`` is false, else fall through."""
+        if self.short_circuit and isinstance(node, BinaryOp) and node.operator == TokenType.AND:
+            self.jump_if_false(node.left, label)
+            self.jump_if_false(node.right, label)
+        elif self.short_circuit and isinstance(node, BinaryOp) and node.operator == TokenType.OR:
+            true_label = self.create_label()
+            self.jump_if_true(node.left, true_label)
+            self.jump_if_false(node.right, label)
+            self.emit_label(true_label + ":")
+        elif self.short_circuit and isinstance(node, UnaryOp) and node.operator == TokenType.NOT:
+            self.jump_if_true(node.operand, label)
+        else:
+            self.visit(node)
+            self.emit(Opcode.JZ, label)
+
+    def jump_if_true(self, node: ASTNode, label: str):
+        """Jump to ``label`` if condition ``node`` is true, else fall through."""
+        if isinstance(node, BinaryOp) and node.operator == TokenType.AND:
+            false_label = self.create_label()
+            self.jump_if_false(node.left, false_label)
+            self.jump_if_true(node.right, label)
+            self.emit_label(false_label + ":")
+        elif isinstance(node, BinaryOp) and node.operator == TokenType.OR:
+            self.jump_if_true(node.left, label)
+            self.jump_if_true(node.right, label)
+        elif isinstance(node, UnaryOp) and node.operator == TokenType.NOT:
+            self.jump_if_false(node.operand, label)
+        else:
+            # There is no jump-if-true opcode
+            self.visit(node)
+            self.emit(Opcode.NOT)
+            self.emit(Opcode.JZ, label)
 
     def visit_BinaryOp(self, node: BinaryOp):
+        if self.short_circuit and node.operator in (TokenType.AND, TokenType.OR):
+            # Materialize the condition as 0 or 1, like AND/OR do
+            false_label = self.create_label()
+            end_label = self.create_label()
+            self.jump_if_false(node, false_label)
+            self.emit(Opcode.PUSH, 1)
+            self.emit(Opcode.JMP, end_label)
+            self.emit_label(false_label + ":")
+            self.emit(Opcode.PUSH, 0)
+            self.emit_label(end_label + ":")
+            return
         self.visit(node.left)
         self.visit(node.right)
         if node.operator == TokenType.PLUS:
@@ -118,7 +182,8 @@ class CodeGenerator:
         elif node.operator == TokenType.MULTIPLY:
             self.emit(Opcode.MUL)
         elif node.operator == TokenType.DIVIDE:
-            self.emit(Opcode.DIV)
+            # SemanticAnalyzer guarantees both operands have the node's type
+            self.emit(Opcode.IDIV if node.type == 'int' else Opcode.FDIV)
         elif node.operator == TokenType.LESS_THAN:
             self.emit(Opcode.LT)
         elif node.operator == TokenType.GREATER_THAN:
@@ -130,18 +195,19 @@ class CodeGenerator:
         elif node.operator == TokenType.OR:
             self.emit(Opcode.OR)
         elif node.operator == TokenType.LESS_EQUAL:
-            self.emit(Opcode.PUSH, 1)
-            self.emit(Opcode.ADD)
-            self.emit(Opcode.LT)
+            self.emit(Opcode.LE)
         elif node.operator == TokenType.GREATER_EQUAL:
-            self.emit(Opcode.PUSH, 1)
-            self.emit(Opcode.SUB)
-            self.emit(Opcode.GT)
-            
+            self.emit(Opcode.GE)
+        elif node.operator == TokenType.NOT_EQUAL:
+            self.emit(Opcode.NE)
+
 
     def visit_UnaryOp(self, node: UnaryOp):
         self.visit(node.operand)
         if node.operator == TokenType.MINUS:
+            # -x is computed as 0 - x, so negating 0.0 gives 0.0, not -0.0.
+            # NEG and the other backends compute 0 - x as well, so that every
+            # engine prints the same zero
             self.emit(Opcode.PUSH, 0)
             self.emit(Opcode.SWAP)
             self.emit(Opcode.SUB)
@@ -149,7 +215,7 @@ class CodeGenerator:
             self.emit(Opcode.NOT)
 
     def visit_Identifier(self, node: Identifier):
-        self.emit(Opcode.LOAD, self.symbol_table[node.name])
+        self.emit(Opcode.LOAD, self.allocator.slot(node))
 
     def visit_Literal(self, node: Literal):
         self.emit(Opcode.PUSH, node.value)
@@ -0,0 +1,36 @@
+from code_gen import CodeGenerator
+from lexer import Lexer
+from linker import link
+from optimizer import optimize_program
+from parser import Parser, Program, SemanticAnalyzer
+from sam_vm import Instruction
+from superinstructions import fuse
+
+# Version of the code generator's output. Bump it whenever the instructions
+# generated for a script change, so cached bytecode (cache.py) is rebuilt.
+COMPILER_VERSION = 8
+
+
+def parse_source(source: str, optimize: bool = True) -> Program:
+    """Lex, parse and type check a script, returning its AST.
+
+    With ``optimize`` the AST also goes through optimizer.optimize_program.
+    """
+    tokens = Lexer(source).tokenize()
+    ast = Parser(tokens).parse()
+    SemanticAnalyzer().analyze(ast)
+    if optimize:
+        optimize_program(ast)
+    return ast
+
+
+def compile_source(source: str, superinstructions: bool = False, optimize: bool = True) -> list[Instruction]:
+    """Compile a script down to linked SAM instructions, ready for the VM.
+
+    With ``superinstructions`` the stream goes through superinstructions.fuse
+    before linking; ``optimize`` is passed on to parse_source.
+    """
+    program = CodeGenerator().generate(parse_source(source, optimize))
+    if superinstructions:
+        program = fuse(program)
+    return link(program)
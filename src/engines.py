@@ -0,0 +1,65 @@
+"""Selectable execution engines for an analyzed Program.
+
+Every engine turns the AST from Parser.parse (after SemanticAnalyzer) into a
+machine object with a ``run()`` method. Every loader takes an ``output``
+sink from output.py (stdout by default):
+
+- ``sam``: stack code from CodeGenerator on SAMVirtualMachine, with memory
+  sized from the frame layout; ``typed_memory=True`` uses typed stores and
+  ``hot_loops=True`` compiles hot loops to Python at run time (hotloop.py);
+  ``vectorize=True`` runs simple counted loops with NumPy (vectorize.py)
+- ``register``: three-address code from RegisterCodeGenerator on
+  RegisterVirtualMachine
+- ``closure``: a tree of Python closures from ClosureCompiler
+- ``python``: Python source from PythonTranspiler, run as a code object;
+  ``show_source=True`` prints the generated source
+"""
+from closure_compiler import ClosureCompiler, ClosureProgram
+from code_gen import CodeGenerator
+from hotloop import HotLoopCompiler
+from linker import link
+from parser import Program
+from register_gen import RegisterCodeGenerator
+from register_vm import RegisterVirtualMachine
+from sam_vm import SAMVirtualMachine
+from transpiler import PythonProgram, transpile
+from vectorize import LoopVectorizer
+
+
+def load_sam(ast: Program, output=None, typed_memory: bool = False,
+             hot_loops: bool = False, vectorize: bool = False) -> SAMVirtualMachine:
+    generator = CodeGenerator()
+    instructions = link(generator.generate(ast))
+    return SAMVirtualMachine(instructions, output, generator.frame_layout(), typed_memory,
+                             hot_loops=HotLoopCompiler() if hot_loops else None,
+                             vectorizer=LoopVectorizer() if vectorize else None)
+
+
+def load_register(ast: Program, output=None) -> RegisterVirtualMachine:
+    return RegisterVirtualMachine(RegisterCodeGenerator().generate(ast), output)
+
+
+def load_closure(ast: Program, output=None) -> ClosureProgram:
+    return ClosureCompiler(output).compile(ast)
+
+
+def load_python(ast: Program, output=None, show_source: bool = False) -> PythonProgram:
+    return transpile(ast, show_source, output)
+
+
+ENGINES = {
+    "sam": load_sam,
+    "register": load_register,
+    "closure": load_closure,
+    "python": load_python,
+}
+
+
+def load_program(ast: Program, engine: str = "sam", **options):
+    """Build the machine for ``ast`` on the named engine, ready to ``run()``.
+
+    ``options`` are passed on to the engine's loader.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine: {engine} (expected one of {', '.join(ENGINES)})")
+    return ENGINES[engine](ast, **options)
@@ -0,0 +1,359 @@
+"""Run-time compilation of hot SAM loops into Python functions.
+
+Attached to a SAMVirtualMachine (``SAMVirtualMachine(..., hot_loops=
+HotLoopCompiler())``), the compiler replaces every backward ``JMP`` with a
+closure that counts how often the loop closes. Once a loop head passes
+``threshold``, the region between the head and the backward jump is
+translated to Python source, compiled with ``compile()``, and installed as
+the closure at the loop head, so the run loop dispatches straight into it.
+
+The generated function keeps SAM semantics exactly: stack values become
+Python expressions, memory is read and written in place on every LOAD and
+STORE, and any exit from the region (the loop condition failing, a
+``break``, HALT) stores whatever the region left on the stack and returns
+the pc the interpreter would have reached. A compiled loop runs at most
+``iterations`` iterations per dispatch, which ``max_steps`` counts as one
+step, so budgets and deadlines still get a chance to stop it.
+
+Loops the translator cannot handle (nested loops, unbalanced stack heights
+between blocks) are left to the interpreter; inner loops of a nest are
+compiled on their own. Cold code is never translated.
+"""
+import math
+
+from sam_vm import Opcode
+
+HOT_LOOP_THRESHOLD = 100
+HOT_LOOP_ITERATIONS = 256
+
+BINARY_OPERATORS = {
+    Opcode.ADD: "({} + {})",
+    Opcode.SUB: "({} - {})",
+    Opcode.MUL: "({} * {})",
+    Opcode.DIV: "_div({}, {})",
+    Opcode.IDIV: "({} // {})",
+    Opcode.FDIV: "({} / {})",
+    Opcode.AND: "_and({}, {})",
+    Opcode.OR: "_or({}, {})",
+}
+
+COMPARISON_OPERATORS = {
+    Opcode.LT: "({} < {})",
+    Opcode.GT: "({} > {})",
+    Opcode.EQ: "({} == {})",
+    Opcode.LE: "({} <= {})",
+    Opcode.GE: "({} >= {})",
+    Opcode.NE: "({} != {})",
+}
+
+LOAD_LOAD_OPERATORS = {
+    Opcode.LOAD_LOAD_ADD: Opcode.ADD,
+    Opcode.LOAD_LOAD_SUB: Opcode.SUB,
+    Opcode.LOAD_LOAD_MUL: Opcode.MUL,
+}
+
+COMPARE_JUMP_OPERATORS = {
+    Opcode.CMP_LT_JZ: Opcode.LT,
+    Opcode.CMP_GT_JZ: Opcode.GT,
+    Opcode.CMP_EQ_JZ: Opcode.EQ,
+}
+
+JUMPS = {Opcode.JMP, Opcode.JZ, *COMPARE_JUMP_OPERATORS}
+
+
+def _div(a, b):
+    if type(a) is int and type(b) is int:
+        return a // b  # Integer division, as in the SAM DIV
+    return a / b
+
+
+def _and(a, b):
+    return int(a and b)
+
+
+def _or(a, b):
+    return int(a or b)
+
+
+def jump_target(opcode, operand):
+    if opcode in COMPARE_JUMP_OPERATORS:
+        return operand[-1]
+    return operand
+
+
+class Unsupported(Exception):
+    """Raised by LoopTranslator for regions it cannot compile."""
+
+
+class Value:
+    """A value on the translator's symbolic stack.
+
+    ``simple`` values (constants, memory reads, temporaries) cannot raise and
+    may be evaluated late; anything else is spilled to a temporary before a
+    side effect, so errors and output happen in the interpreter's order.
+    ``slots`` are the memory slots the expression reads and ``condition``
+    marks a raw comparison that still needs ``int()`` to become a value.
+    """
+
+    def __init__(self, expr: str, simple: bool = False, slots: frozenset = frozenset(),
+                 condition: bool = False):
+        self.expr = expr
+        self.simple = simple
+        self.slots = slots
+        self.condition = condition
+
+    def value(self) -> str:
+        return f"int{self.expr}" if self.condition else self.expr
+
+
+class LoopTranslator:
+    """Translates the loop region ``operations[head:back + 1]`` of a linked
+    program, whose last instruction is ``JMP head``, into Python source."""
+
+    def __init__(self, vm, operations: list, head: int, back: int, iterations: int):
+        self.vm = vm
+        self.operations = operations
+        self.head = head
+        self.back = back
+        self.iterations = iterations
+        self.end = len(operations)
+        self.base = vm.depths[head]  # stack depth on entry, see verify_stack
+        self.lines = []
+        self.stack = []
+        self.temp_count = 0
+        self.stores = {}   # id(store) -> name
+        self.bindings = {}  # name -> object passed to the factory
+
+    def translate(self) -> str:
+        starts = self.block_starts()
+        self.emit(2, "for _ in _iterations:")
+        for start, stop in zip(starts, starts[1:] + [self.back + 1]):
+            depth = 3
+            if start != self.head:
+                self.emit(3, f"if go == {start}:")
+                depth = 4
+            self.block(start, stop, depth)
+        self.emit(2, f"return {self.head}")
+        parameters = ", ".join(["_iterations", "_div", "_and", "_or", "_stack", "_write", *self.bindings])
+        header = [f"def make({parameters}):", "    def loop():"]
+        return "\n".join(header + self.lines + ["    return loop", ""])
+
+    def namespace_arguments(self) -> list:
+        return [range(self.iterations), _div, _and, _or, self.vm.stack,
+                self.vm.output.write, *self.bindings.values()]
+
+    def block_starts(self) -> list:
+        starts = {self.head}
+        for pc in range(self.head, self.back + 1):
+            opcode, operand = self.operations[pc]
+            if opcode in JUMPS:
+                target = jump_target(opcode, operand)
+                if self.head < target <= self.back:
+                    if target < pc:
+                        raise Unsupported("nested loop")
+                    starts.add(target)
+                if pc < self.back:
+                    starts.add(pc + 1)
+            elif opcode == Opcode.HALT and pc < self.back:
+                starts.add(pc + 1)
+        return sorted(starts)
+
+    def emit(self, depth: int, line: str):
+        self.lines.append("    " * depth + line)
+
+    def temporary(self) -> str:
+        self.temp_count += 1
+        return f"t{self.temp_count}"
+
+    def memory(self, slot: int) -> str:
+        store, index = self.vm.cell(slot)
+        name = self.stores.get(id(store))
+        if name is None:
+            name = self.stores[id(store)] = f"m{len(self.stores)}"
+            self.bindings[name] = store
+        return f"{name}[{index}]"
+
+    def constant(self, value) -> Value:
+        if isinstance(value, float) and not math.isfinite(value):
+            name = f"c{len(self.bindings)}"
+            self.bindings[name] = value
+            return Value(name, simple=True)
+        text = repr(value)
+        return Value(f"({text})" if text.startswith("-") else text, simple=True)
+
+    def load(self, slot: int) -> Value:
+        return Value(self.memory(slot), simple=True, slots=frozenset([slot]))
+
+    def pop(self) -> Value:
+        if not self.stack:
+            raise Unsupported("stack underflow in loop region")
+        return self.stack.pop()
+
+    def spill(self, depth: int, value: Value) -> Value:
+        name = self.temporary()
+        self.emit(depth, f"{name} = {value.value()}")
+        return Value(name, simple=True)
+
+    def settle(self, depth: int, slot: int | None = None):
+        """Evaluate pending expressions before a side effect, and reads of
+        ``slot`` before it is overwritten."""
+        for position, value in enumerate(self.stack):
+            if not value.simple or (slot is not None and slot in value.slots):
+                self.stack[position] = self.spill(depth, value)
+
+    def store(self, depth: int, slot: int, expr: str):
+        self.settle(depth, slot)
+        self.emit(depth, f"{self.memory(slot)} = {expr}")
+
+    def exit(self, depth: int, target: int):
+        if target == self.head and not self.stack:
+            self.emit(depth, "continue")
+            return
+        for position, value in enumerate(self.stack, self.base):
+            self.emit(depth, f"_stack[{position}] = {value.value()}")
+        self.emit(depth, f"return {target}")
+
+    def branch(self, depth: int, condition: str, target: int, next_pc: int):
+        """Leave the block for ``target`` unless ``condition`` holds."""
+        if self.stack:
+            raise Unsupported("values left on the stack at a branch")
+        if target == self.head:
+            self.emit(depth, f"if not {condition}:")
+            self.emit(depth + 1, "continue")
+        elif self.head < target <= self.back:
+            self.emit(depth, f"go = {next_pc} if {condition} else {target}")
+            return
+        else:
+            self.emit(depth, f"if not {condition}:")
+            self.exit(depth + 1, target)
+        self.emit(depth, f"go = {next_pc}")
+
+    def block(self, start: int, stop: int, depth: int):
+        self.stack = []
+        for pc in range(start, stop):
+            opcode, operand = self.operations[pc]
+            if opcode == Opcode.PUSH:
+                self.stack.append(self.constant(operand))
+            elif opcode == Opcode.POP:
+                value = self.pop()
+                if not value.simple:
+                    self.emit(depth, value.value())
+            elif opcode == Opcode.SWAP:
+                b, a = self.pop(), self.pop()
+                self.stack.append(a)
+                self.stack.append(b)
+                self.settle(depth)  # keep the original evaluation order
+                self.stack[-2:] = self.stack[-2:][::-1]
+            elif opcode == Opcode.DUP:
+                value = self.pop()
+                if not value.simple:
+                    value = self.spill(depth, value)
+                self.stack.extend([value, value])
+            elif opcode in BINARY_OPERATORS:
+                b, a = self.pop(), self.pop()
+                self.stack.append(Value(BINARY_OPERATORS[opcode].format(a.value(), b.value()),
+                                        slots=a.slots | b.slots))
+            elif opcode in COMPARISON_OPERATORS:
+                b, a = self.pop(), self.pop()
+                self.stack.append(Value(COMPARISON_OPERATORS[opcode].format(a.value(), b.value()),
+                                        simple=a.simple and b.simple, slots=a.slots | b.slots,
+                                        condition=True))
+            elif opcode == Opcode.NOT:
+                a = self.pop()
+                self.stack.append(Value(f"(not {a.value()})", simple=a.simple, slots=a.slots,
+                                        condition=True))
+            elif opcode == Opcode.NEG:
+                a = self.pop()
+                self.stack.append(Value(f"(0 - {a.value()})", slots=a.slots))
+            elif opcode == Opcode.LOAD:
+                self.stack.append(self.load(operand))
+            elif opcode == Opcode.STORE:
+                self.store(depth, operand, self.pop().value())
+            elif opcode in LOAD_LOAD_OPERATORS:
+                a, b = self.load(operand[0]), self.load(operand[1])
+                expr = BINARY_OPERATORS[LOAD_LOAD_OPERATORS[opcode]].format(a.expr, b.expr)
+                self.stack.append(Value(expr, slots=a.slots | b.slots))
+            elif opcode == Opcode.INC_SLOT:
+                slot, step = operand
+                self.store(depth, slot, f"{self.memory(slot)} + {self.constant(step).expr}")
+            elif opcode == Opcode.PRINT:
+                value = self.pop()
+                self.settle(depth)
+                self.emit(depth, f"_write({value.value()})")
+            elif opcode == Opcode.JZ:
+                condition = self.pop()
+                expr = condition.expr if condition.condition else f"({condition.expr} != 0)"
+                self.branch(depth, expr, operand, pc + 1)
+                return
+            elif opcode in COMPARE_JUMP_OPERATORS:
+                a, b, target = operand
+                expr = COMPARISON_OPERATORS[COMPARE_JUMP_OPERATORS[opcode]].format(
+                    self.load(a).expr, self.load(b).expr)
+                self.branch(depth, expr, target, pc + 1)
+                return
+            elif opcode == Opcode.JMP:
+                if self.head < operand <= self.back:
+                    if self.stack:
+                        raise Unsupported("values left on the stack at a jump")
+                    self.emit(depth, f"go = {operand}")
+                else:
+                    self.exit(depth, operand)
+                return
+            elif opcode == Opcode.HALT:
+                self.exit(depth, self.end)
+                return
+            else:
+                raise Unsupported(f"opcode {opcode}")
+        # Fell through into the next block
+        if self.stack:
+            raise Unsupported("values left on the stack between blocks")
+        self.emit(depth, f"go = {stop}")
+
+
+class HotLoopCompiler:
+    """Counts backward jumps and compiles loops that get hot.
+
+    ``compiled`` maps each compiled loop head to its generated source and
+    ``rejected`` holds heads the translator gave up on.
+    """
+
+    def __init__(self, threshold: int = HOT_LOOP_THRESHOLD, iterations: int = HOT_LOOP_ITERATIONS):
+        self.threshold = threshold
+        self.iterations = iterations
+        self.compiled = {}
+        self.rejected = set()
+
+    def attach(self, vm):
+        operations = list(vm.operations())
+        for pc, (opcode, operand) in enumerate(operations):
+            if opcode == Opcode.JMP and operand <= pc:
+                vm.code[pc] = self.counter(vm, operations, operand, pc)
+
+    def counter(self, vm, operations: list, head: int, back: int):
+        threshold = self.threshold
+        count = 0
+
+        def jmp():
+            nonlocal count
+            count += 1
+            if count == threshold:
+                self.compile_loop(vm, operations, head, back)
+            return head
+        return jmp
+
+    def compile_loop(self, vm, operations: list, head: int, back: int) -> bool:
+        """Install a compiled version of the loop at ``head``; False (and
+        the loop stays interpreted) if the region cannot be translated."""
+        if head in self.compiled or head in self.rejected:
+            return head in self.compiled
+        translator = LoopTranslator(vm, operations, head, back, self.iterations)
+        try:
+            source = translator.translate()
+        except Unsupported:
+            self.rejected.add(head)
+            return False
+        namespace = {}
+        exec(compile(source, f"<hot loop at {head}>", "exec"), namespace)
+        vm.code[head] = namespace["make"](*translator.namespace_arguments())
+        self.compiled[head] = source
+        return True
@@ -0,0 +1,42 @@
+from sam_vm import Opcode, Instruction
+
+JUMP_OPCODES = {Opcode.JMP, Opcode.JZ}
+# Superinstructions whose operand is a tuple ending with the jump target
+FUSED_JUMP_OPCODES = {Opcode.CMP_LT_JZ, Opcode.CMP_GT_JZ, Opcode.CMP_EQ_JZ}
+
+
+def is_label(entry) -> bool:
+    return isinstance(entry, str) and entry.endswith(':')
+
+
+def link(program: list) -> list[Instruction]:
+    """Resolve jump labels to absolute instruction addresses.
+
+    The code generator emits label strings such as "L1:" between instructions
+    and uses the bare label name as the operand of JMP/JZ. Linking drops the
+    label entries from the stream and rewrites every jump operand to the index
+    of the instruction the label points at, so the VM can jump without
+    searching. Already linked programs are returned unchanged (as a copy).
+    """
+    addresses = {}
+    address = 0
+    for entry in program:
+        if is_label(entry):
+            addresses[entry[:-1]] = address
+        elif isinstance(entry, Instruction):
+            address += 1
+
+    linked = []
+    for entry in program:
+        if not isinstance(entry, Instruction):
+            continue
+        if entry.opcode in JUMP_OPCODES and isinstance(entry.operand, str):
+            if entry.operand not in addresses:
+                raise ValueError(f"Label not found: {entry.operand}")
+            entry = Instruction(entry.opcode, addresses[entry.operand])
+        elif entry.opcode in FUSED_JUMP_OPCODES and isinstance(entry.operand[-1], str):
+            if entry.operand[-1] not in addresses:
+                raise ValueError(f"Label not found: {entry.operand[-1]}")
+            entry = Instruction(entry.opcode, entry.operand[:-1] + (addresses[entry.operand[-1]],))
+        linked.append(entry)
+    return linked
@@ -1,5 +1,7 @@
 from code_gen import CodeGenerator
 from lexer import Lexer
+from linker import link
+from optimizer import DeadCodeEliminator, LoopOptimizer, fold_constants
 from parser import Parser, SemanticAnalyzer
 from sam_vm import SAMVirtualMachine
 
@@ -139,25 +141,38 @@ if (true) {
 }
 """
 
-lexer = Lexer(example_11)
-tokens = lexer.tokenize()
-
-parser = Parser(tokens)
-ast = parser.parse()
-
-analyzer = SemanticAnalyzer()
-analyzer.analyze(ast)
-
-print("Semantic analysis completed successfully.")
-
-code_generator = CodeGenerator()
-bytecode = code_generator.generate(ast)
-
-# Print the generated bytecode
-for instruction in bytecode:
-    print(instruction)
-
-# Run the bytecode on the SAM virtual machine
-print("\nProgram output:")
-vm = SAMVirtualMachine(bytecode)
-vm.run()
+if __name__ == "__main__":
+    lexer = Lexer(example_11)
+    tokens = lexer.tokenize()
+
+    parser = Parser(tokens)
+    ast = parser.parse()
+
+    analyzer = SemanticAnalyzer()
+    analyzer.analyze(ast)
+
+    print("Semantic analysis completed successfully.")
+
+    fold_constants(ast)
+    eliminator = DeadCodeEliminator()
+    eliminator.eliminate(ast)
+    for removal in eliminator.removed:
+        print(f"Removed {removal}.")
+    loop_optimizer = LoopOptimizer()
+    loop_optimizer.optimize(ast)
+    print(f"Hoisted {loop_optimizer.hoisted} loop invariant(s), reduced {loop_optimizer.reduced} product(s).")
+
+    code_generator = CodeGenerator()
+    bytecode = code_generator.generate(ast)
+    print(f"Peephole optimizer removed {code_generator.peephole.removed} instructions.")
+    print(f"Allocated {code_generator.frame_layout().slot_count} memory slot(s) "
+          f"for {len(code_generator.allocator.slots)} variable(s).")
+
+    # Print the generated bytecode
+    for instruction in bytecode:
+        print(instruction)
+
+    # Run the bytecode on the SAM virtual machine
+    print("\nProgram output:")
+    vm = SAMVirtualMachine(link(bytecode))
+    vm.run()
@@ -0,0 +1,787 @@
+"""AST optimization passes, run between SemanticAnalyzer and the code
+generators.
+
+Each pass rewrites an analyzed Program in place and keeps the result
+observably identical on every engine: the same values are printed, in the
+same representation (comparisons and logical operators produce 0/1 while
+boolean literals print as True/False), and expressions that can fail at run
+time (divisions by anything other than a non-zero literal) are never
+removed or evaluated early.
+"""
+from lexer import TokenType
+from parser import (AssignmentStmt, BinaryOp, BreakStatement, ElseStatement, Identifier, IfStatement,
+                    Literal, PrintStatement, Program, UnaryOp, VariableDecl, WhileLoop)
+
+COMPARISONS = {
+    TokenType.LESS_THAN, TokenType.GREATER_THAN, TokenType.LESS_EQUAL,
+    TokenType.GREATER_EQUAL, TokenType.EQUAL_EQUAL, TokenType.NOT_EQUAL,
+}
+LOGICAL = {TokenType.AND, TokenType.OR}
+DEFAULT_VALUES = {'int': 0, 'float': 0.0, 'bool': False}
+
+
+def evaluate_binary(operator: TokenType, a, b):
+    """Value of ``a <operator> b`` as the SAM VM computes it, or None if it is
+    left for run time."""
+    if operator == TokenType.PLUS:
+        return a + b
+    if operator == TokenType.MINUS:
+        return a - b
+    if operator == TokenType.MULTIPLY:
+        return a * b
+    if operator == TokenType.DIVIDE:
+        if b == 0:
+            return None  # keep the run-time error
+        if type(a) is int and type(b) is int:
+            return a // b
+        return a / b
+    if operator == TokenType.LESS_THAN:
+        return int(a < b)
+    if operator == TokenType.GREATER_THAN:
+        return int(a > b)
+    if operator == TokenType.LESS_EQUAL:
+        return int(a <= b)
+    if operator == TokenType.GREATER_EQUAL:
+        return int(a >= b)
+    if operator == TokenType.EQUAL_EQUAL:
+        return int(a == b)
+    if operator == TokenType.NOT_EQUAL:
+        return int(a != b)
+    if operator == TokenType.AND:
+        return int(a and b)
+    if operator == TokenType.OR:
+        return int(a or b)
+    return None
+
+
+def can_fail(node) -> bool:
+    """Whether evaluating ``node`` may raise at run time."""
+    if isinstance(node, BinaryOp):
+        if node.operator == TokenType.DIVIDE and not (isinstance(node.right, Literal) and node.right.value != 0):
+            return True
+        return can_fail(node.left) or can_fail(node.right)
+    if isinstance(node, UnaryOp):
+        return can_fail(node.operand)
+    return False
+
+
+def normalized(node) -> bool:
+    """Whether ``node`` always evaluates to the int 0 or 1, as && and || do."""
+    if isinstance(node, BinaryOp):
+        return node.operator in COMPARISONS or node.operator in LOGICAL
+    if isinstance(node, UnaryOp):
+        return node.operator == TokenType.NOT
+    if isinstance(node, Literal):
+        return type(node.value) is int and node.value in (0, 1)
+    return False
+
+
+def identifiers(node):
+    """Every Identifier read by expression ``node``."""
+    if isinstance(node, Identifier):
+        yield node
+    elif isinstance(node, BinaryOp):
+        yield from identifiers(node.left)
+        yield from identifiers(node.right)
+    elif isinstance(node, UnaryOp):
+        yield from identifiers(node.operand)
+
+
+class ScopedVisitor:
+    """Walks statements with the scopes SemanticAnalyzer uses, mapping every
+    name to the VariableDecl it refers to."""
+
+    def __init__(self):
+        self.scopes = [{}]
+
+    def visit(self, node):
+        method_name = f'visit_{type(node).__name__}'
+        visitor = getattr(self, method_name, self.generic_visit)
+        return visitor(node)
+
+    def generic_visit(self, node):
+        raise Exception(f'No visit_{type(node).__name__} method')
+
+    def lookup(self, name: str) -> VariableDecl | None:
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        return None
+
+    def visit_block(self, statements: list):
+        self.scopes.append({})
+        for statement in statements:
+            self.visit(statement)
+        self.scopes.pop()
+
+    def visit_Program(self, node: Program):
+        for statement in node.statements:
+            self.visit(statement)
+
+    def visit_VariableDecl(self, node: VariableDecl):
+        self.scopes[-1][node.name] = node
+
+    def visit_WhileLoop(self, node: WhileLoop):
+        self.visit_block(node.body)
+
+    def visit_IfStatement(self, node: IfStatement):
+        self.visit_block(node.if_body)
+        for statement in node.else_if_list:
+            self.visit(statement)
+
+    def visit_ElseStatement(self, node: ElseStatement):
+        self.visit_block(node.body)
+
+    def visit_AssignmentStmt(self, node: AssignmentStmt):
+        pass
+
+    def visit_BreakStatement(self, node):
+        pass
+
+    def visit_PrintStatement(self, node: PrintStatement):
+        pass
+
+
+class AssignmentCollector(ScopedVisitor):
+    """Finds the declarations that are assigned to after being declared."""
+
+    def __init__(self):
+        super().__init__()
+        self.assigned = set()
+
+    def collect(self, ast: Program) -> set:
+        self.visit(ast)
+        return self.assigned
+
+    def visit_AssignmentStmt(self, node: AssignmentStmt):
+        self.assigned.add(id(self.lookup(node.name)))
+
+
+class NameResolver(ScopedVisitor):
+    """Maps every Identifier and AssignmentStmt, by id, to its VariableDecl."""
+
+    def __init__(self):
+        super().__init__()
+        self.declarations = {}
+
+    def resolve(self, ast: Program) -> dict:
+        self.visit(ast)
+        return self.declarations
+
+    def expression(self, node):
+        for identifier in identifiers(node):
+            self.declarations[id(identifier)] = self.lookup(identifier.name)
+
+    def visit_VariableDecl(self, node: VariableDecl):
+        self.expression(node.value)
+        super().visit_VariableDecl(node)
+
+    def visit_WhileLoop(self, node: WhileLoop):
+        self.expression(node.condition)
+        super().visit_WhileLoop(node)
+
+    def visit_IfStatement(self, node: IfStatement):
+        self.expression(node.condition)
+        super().visit_IfStatement(node)
+
+    def visit_AssignmentStmt(self, node: AssignmentStmt):
+        self.expression(node.value)
+        self.declarations[id(node)] = self.lookup(node.name)
+
+    def visit_PrintStatement(self, node: PrintStatement):
+        self.expression(node.expr)
+
+
+class ConstantFolder(ScopedVisitor):
+    """Folds literal subexpressions, replaces reads of ``let`` variables that
+    are never reassigned by their (literal) initial value, and simplifies
+    boolean identities such as ``x && true``.
+
+    ``folded`` and ``propagated`` count the expressions folded and the
+    variable reads replaced.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.assigned = set()
+        self.constants = {}  # id(VariableDecl) -> Literal
+        self.folded = 0
+        self.propagated = 0
+
+    def fold(self, ast: Program) -> Program:
+        self.assigned = AssignmentCollector().collect(ast)
+        self.visit(ast)
+        return ast
+
+    def visit_VariableDecl(self, node: VariableDecl):
+        # The initializer is evaluated before the name is in scope
+        node.value = self.expression(node.value)
+        super().visit_VariableDecl(node)
+        if isinstance(node.value, Literal) and id(node) not in self.assigned:
+            self.constants[id(node)] = node.value
+
+    def visit_WhileLoop(self, node: WhileLoop):
+        node.condition = self.expression(node.condition, condition=True)
+        super().visit_WhileLoop(node)
+
+    def visit_IfStatement(self, node: IfStatement):
+        node.condition = self.expression(node.condition, condition=True)
+        super().visit_IfStatement(node)
+
+    def visit_AssignmentStmt(self, node: AssignmentStmt):
+        node.value = self.expression(node.value)
+
+    def visit_PrintStatement(self, node: PrintStatement):
+        node.expr = self.expression(node.expr)
+
+    def expression(self, node, condition: bool = False):
+        """Fold ``node``. In a ``condition`` only its truth value matters, so
+        0/1 and False/True are interchangeable."""
+        if isinstance(node, Identifier):
+            constant = self.constants.get(id(self.lookup(node.name)))
+            if constant is None:
+                return node
+            self.propagated += 1
+            return Literal(constant.value, constant.type)
+        if isinstance(node, UnaryOp):
+            node.operand = self.expression(node.operand)
+            if isinstance(node.operand, Literal):
+                if node.operator == TokenType.MINUS:
+                    return self.literal(0 - node.operand.value, node.type)
+                if node.operator == TokenType.NOT:
+                    return self.literal(int(not node.operand.value), node.type)
+            return node
+        if isinstance(node, BinaryOp):
+            return self.binary(node, condition)
+        return node
+
+    def binary(self, node: BinaryOp, condition: bool):
+        logical = node.operator in LOGICAL
+        node.left = self.expression(node.left, condition and logical)
+        node.right = self.expression(node.right, condition and logical)
+        left, right = node.left, node.right
+        if isinstance(left, Literal) and isinstance(right, Literal):
+            value = evaluate_binary(node.operator, left.value, right.value)
+            if value is not None:
+                return self.literal(value, node.type)
+            return node
+        if not logical:
+            return node
+        # x && true, x || false: the result is x's truth value as 0/1
+        identity = node.operator == TokenType.AND
+        for constant, other in ((right, left), (left, right)):
+            if not isinstance(constant, Literal):
+                continue
+            if bool(constant.value) == identity:
+                if condition or normalized(other):
+                    self.folded += 1
+                    return other
+            elif constant is left or not can_fail(other):
+                # false && x, true || x never evaluate x; x && false and
+                # x || true still do
+                return self.literal(int(bool(constant.value)), node.type)
+        return node
+
+    def literal(self, value, type: str) -> Literal:
+        self.folded += 1
+        return Literal(value, type)
+
+
+def is_constant(node, value: bool) -> bool:
+    return isinstance(node, Literal) and bool(node.value) == value
+
+
+def declares(statements: list) -> bool:
+    return any(isinstance(statement, VariableDecl) for statement in statements)
+
+
+def breaks_out(statements: list) -> bool:
+    """Whether ``statements`` contain a break out of the loop around them."""
+    for statement in statements:
+        if isinstance(statement, BreakStatement):
+            return True
+        if isinstance(statement, IfStatement):
+            if breaks_out(statement.if_body) or breaks_out(statement.else_if_list):
+                return True
+        elif isinstance(statement, ElseStatement) and breaks_out(statement.body):
+            return True
+    return False
+
+
+def terminates(statement) -> bool:
+    """Whether control never reaches the statement after ``statement``."""
+    if isinstance(statement, BreakStatement):
+        return True
+    if isinstance(statement, WhileLoop):
+        return is_constant(statement.condition, True) and not breaks_out(statement.body)
+    if isinstance(statement, IfStatement):
+        if not statement.else_if_list or not isinstance(statement.else_if_list[-1], ElseStatement):
+            return False
+        bodies = [statement.if_body] + [branch.body if isinstance(branch, ElseStatement) else branch.if_body
+                                        for branch in statement.else_if_list]
+        return all(body and terminates(body[-1]) for body in bodies)
+    return False
+
+
+class DeadCodeEliminator:
+    """Removes statements that can never run or whose effect is never seen:
+
+    - statements after a break, or after an if whose every branch breaks
+      or a ``while (true)`` loop without a break
+    - ``if``/``else if`` branches and ``while`` loops whose condition is a
+      false literal, and the branches after one whose condition is true
+    - stores to a variable that no later load reads (by liveness analysis),
+      and variables that are never read at all
+
+    Stores whose value may fail at run time are kept, and print statements
+    are only removed when they can never run. ``removed`` describes every
+    removal, in order.
+    """
+
+    def __init__(self):
+        self.declarations = {}
+        self.loop_exits = []  # variables live after each enclosing loop
+        self.removed = []
+
+    def eliminate(self, ast: Program) -> Program:
+        # Removing a store can leave the stores feeding it dead, so repeat
+        # until nothing changes
+        while True:
+            count = len(self.removed)
+            ast.statements = self.simplify_block(ast.statements)
+            self.declarations = NameResolver().resolve(ast)
+            self.live_block(ast.statements, set(), remove=True)
+            used = {id(declaration) for declaration in NameResolver().resolve(ast).values()}
+            self.remove_unused(ast.statements, used)
+            if len(self.removed) == count:
+                return ast
+
+    # Reachability
+
+    def simplify_block(self, statements: list) -> list:
+        kept = []
+        for i, statement in enumerate(statements):
+            if isinstance(statement, WhileLoop):
+                if is_constant(statement.condition, False):
+                    self.removed.append("while (false) loop")
+                    continue
+                statement.body = self.simplify_block(statement.body)
+                kept.append(statement)
+            elif isinstance(statement, IfStatement):
+                kept.extend(self.simplify_if(statement))
+            else:
+                kept.append(statement)
+            if kept and terminates(kept[-1]) and i + 1 < len(statements):
+                self.removed.append(f"{len(statements) - i - 1} unreachable statement(s)")
+                break
+        return kept
+
+    def simplify_if(self, node: IfStatement) -> list:
+        """The statements that replace ``node``, without its dead branches."""
+        branches = [(node.condition, node.if_body)]
+        for branch in node.else_if_list:
+            if isinstance(branch, ElseStatement):
+                branches.append((None, branch.body))
+            else:
+                branches.append((branch.condition, branch.if_body))
+
+        live = []
+        for i, (condition, body) in enumerate(branches):
+            if is_constant(condition, False):
+                self.removed.append("if (false) branch")
+                continue
+            live.append((condition, self.simplify_block(body)))
+            if condition is None or is_constant(condition, True):
+                if i + 1 < len(branches):
+                    self.removed.append(f"{len(branches) - i - 1} branch(es) after if (true)")
+                break
+        if not live:
+            return []
+
+        condition, body = live[0]
+        if condition is None or is_constant(condition, True):
+            if not declares(body):
+                return body
+            # Keep the block so its declarations stay scoped to it
+            return [IfStatement(Literal(True, 'bool'), body, [])]
+        rest = []
+        for condition, body in live[1:]:
+            if condition is None or is_constant(condition, True):
+                rest.append(ElseStatement(body))
+            else:
+                rest.append(IfStatement(condition, body, []))
+        return [IfStatement(live[0][0], live[0][1], rest)]
+
+    # Liveness, over VariableDecl ids
+
+    def uses(self, node) -> set:
+        return {id(self.declarations[id(identifier)]) for identifier in identifiers(node)}
+
+    def live_block(self, statements: list, live: set, remove: bool) -> set:
+        """Variables live before ``statements`` given ``live`` after them.
+        With ``remove``, dead stores are removed on the way."""
+        kept = []
+        for statement in reversed(statements):
+            live, keep = self.live_statement(statement, live, remove)
+            if keep:
+                kept.append(statement)
+        if remove:
+            statements[:] = reversed(kept)
+        return live
+
+    def live_statement(self, node, live: set, remove: bool) -> tuple[set, bool]:
+        if isinstance(node, (VariableDecl, AssignmentStmt)):
+            declaration = node if isinstance(node, VariableDecl) else self.declarations[id(node)]
+            key = id(declaration)
+            if key not in live and not can_fail(node.value):
+                if isinstance(node, AssignmentStmt):
+                    if remove:
+                        self.removed.append(f"dead store to {node.name}")
+                    return live, False
+                # The declaration itself stays while the variable is used
+                if remove and not isinstance(node.value, Literal):
+                    self.removed.append(f"dead store to {node.name}")
+                    node.value = Literal(DEFAULT_VALUES[node.type], node.type)
+                return live, True
+            return (live - {key}) | self.uses(node.value), True
+        if isinstance(node, PrintStatement):
+            return live | self.uses(node.expr), True
+        if isinstance(node, BreakStatement):
+            return set(self.loop_exits[-1]), True
+        if isinstance(node, IfStatement):
+            entry = self.uses(node.condition) | self.live_block(node.if_body, live, remove)
+            has_else = False
+            for branch in node.else_if_list:
+                if isinstance(branch, ElseStatement):
+                    has_else = True
+                    entry |= self.live_block(branch.body, live, remove)
+                else:
+                    entry |= self.uses(branch.condition) | self.live_block(branch.if_body, live, remove)
+            return (entry if has_else else entry | live), True
+        if isinstance(node, WhileLoop):
+            self.loop_exits.append(live)
+            head = live | self.uses(node.condition)
+            while True:
+                entry = head | self.live_block(node.body, head, False)
+                if entry == head:
+                    break
+                head = entry
+            if remove:
+                self.live_block(node.body, head, True)
+            self.loop_exits.pop()
+            return head, True
+        raise Exception(f"No liveness rule for {type(node).__name__}")
+
+    # Unused variables
+
+    def remove_unused(self, statements: list, used: set):
+        kept = []
+        for statement in statements:
+            if isinstance(statement, VariableDecl) and id(statement) not in used \
+                    and not can_fail(statement.value):
+                self.removed.append(f"unused variable {statement.name}")
+                continue
+            if isinstance(statement, WhileLoop):
+                self.remove_unused(statement.body, used)
+            elif isinstance(statement, IfStatement):
+                self.remove_unused(statement.if_body, used)
+                for branch in statement.else_if_list:
+                    self.remove_unused(branch.body if isinstance(branch, ElseStatement) else branch.if_body, used)
+            kept.append(statement)
+        statements[:] = kept
+
+
+def statements_in(statements: list):
+    """Every statement in ``statements``, including those in nested blocks."""
+    for statement in statements:
+        yield statement
+        if isinstance(statement, WhileLoop):
+            yield from statements_in(statement.body)
+        elif isinstance(statement, IfStatement):
+            yield from statements_in(statement.if_body)
+            yield from statements_in(statement.else_if_list)
+        elif isinstance(statement, ElseStatement):
+            yield from statements_in(statement.body)
+
+
+def rewrite_expressions(statements: list, rewrite):
+    """Replace every top-level expression ``e`` in ``statements`` (and
+    nested blocks) by ``rewrite(e)``."""
+    for statement in statements:
+        if isinstance(statement, (VariableDecl, AssignmentStmt)):
+            statement.value = rewrite(statement.value)
+        elif isinstance(statement, PrintStatement):
+            statement.expr = rewrite(statement.expr)
+        elif isinstance(statement, WhileLoop):
+            statement.condition = rewrite(statement.condition)
+            rewrite_expressions(statement.body, rewrite)
+        elif isinstance(statement, IfStatement):
+            statement.condition = rewrite(statement.condition)
+            rewrite_expressions(statement.if_body, rewrite)
+            rewrite_expressions(statement.else_if_list, rewrite)
+        elif isinstance(statement, ElseStatement):
+            rewrite_expressions(statement.body, rewrite)
+
+
+def insert_after(statements: list, target, statement) -> bool:
+    """Insert ``statement`` right after ``target``, wherever it is nested."""
+    for i, candidate in enumerate(statements):
+        if candidate is target:
+            statements.insert(i + 1, statement)
+            return True
+    for candidate in statements:
+        if isinstance(candidate, WhileLoop) and insert_after(candidate.body, target, statement):
+            return True
+        if isinstance(candidate, IfStatement) and (insert_after(candidate.if_body, target, statement)
+                                                   or insert_after(candidate.else_if_list, target, statement)):
+            return True
+        if isinstance(candidate, ElseStatement) and insert_after(candidate.body, target, statement):
+            return True
+    return False
+
+
+class LoopOptimizer:
+    """Loop-invariant code motion and strength reduction on while loops,
+    innermost loops first.
+
+    A pure expression that cannot fail and only reads variables declared
+    outside the loop and never assigned in it is computed once, into a
+    temporary declared right before the loop (so in the block, and scope,
+    that encloses the loop). Identical expressions share a temporary.
+
+    An int variable ``i`` whose only assignment in the loop is
+    ``i = i + c`` or ``i = i - c`` is an induction variable; products
+    ``i * k`` with an invariant ``k`` become a temporary initialized to
+    ``i * k`` before the loop and advanced by ``c * k`` right after every
+    update of ``i``. The VM's multiplication is no dearer than its addition:
+    each replaced product saves two dispatches and the update costs four, so
+    this is only done for products that occur at least three times.
+
+    ``hoisted`` and ``reduced`` count the temporaries of each kind.
+    """
+
+    def __init__(self):
+        self.declarations = {}
+        self.names = set()
+        self.counter = 0
+        self.hoisted = 0
+        self.reduced = 0
+        # State of the loop being optimized
+        self.local = set()
+        self.assignments = {}
+        self.before = []
+        self.temporaries = {}
+
+    def optimize(self, ast: Program) -> Program:
+        self.declarations = NameResolver().resolve(ast)
+        self.names = {statement.name for statement in statements_in(ast.statements)
+                      if isinstance(statement, VariableDecl)}
+        ast.statements = self.block(ast.statements)
+        return ast
+
+    def block(self, statements: list) -> list:
+        optimized = []
+        for statement in statements:
+            if isinstance(statement, WhileLoop):
+                statement.body = self.block(statement.body)
+                optimized.extend(self.loop(statement))
+            elif isinstance(statement, IfStatement):
+                statement.if_body = self.block(statement.if_body)
+                for branch in statement.else_if_list:
+                    if isinstance(branch, ElseStatement):
+                        branch.body = self.block(branch.body)
+                    else:
+                        branch.if_body = self.block(branch.if_body)
+                optimized.append(statement)
+            else:
+                optimized.append(statement)
+        return optimized
+
+    def loop(self, node: WhileLoop) -> list:
+        """The statements that replace ``node``: temporaries, then the loop."""
+        body = list(statements_in(node.body))
+        self.local = {id(statement) for statement in body if isinstance(statement, VariableDecl)}
+        self.assignments = {}
+        for statement in body:
+            if isinstance(statement, AssignmentStmt):
+                self.assignments.setdefault(id(self.declarations[id(statement)]), []).append(statement)
+        self.before = []
+        self.temporaries = {}
+
+        def hoist(expression):
+            if isinstance(expression, (Literal, Identifier)):
+                return expression
+            if self.invariant(expression):
+                return self.temporary(expression)
+            if isinstance(expression, BinaryOp):
+                expression.left = hoist(expression.left)
+                expression.right = hoist(expression.right)
+            elif isinstance(expression, UnaryOp):
+                expression.operand = hoist(expression.operand)
+            return expression
+
+        node.condition = hoist(node.condition)
+        rewrite_expressions(node.body, hoist)
+        self.reduce(node)
+        return self.before + [node]
+
+    def invariant(self, node) -> bool:
+        if can_fail(node):
+            return False
+        if isinstance(node, BinaryOp):
+            return self.invariant(node.left) and self.invariant(node.right)
+        if isinstance(node, UnaryOp):
+            return self.invariant(node.operand)
+        if isinstance(node, Identifier):
+            key = id(self.declarations[id(node)])
+            return key not in self.local and key not in self.assignments
+        return True
+
+    def key(self, node):
+        """Structural identity of an expression, with names resolved."""
+        if isinstance(node, Identifier):
+            return id(self.declarations[id(node)])
+        if isinstance(node, Literal):
+            return type(node.value), node.value
+        if isinstance(node, UnaryOp):
+            return node.operator, self.key(node.operand)
+        return node.operator, self.key(node.left), self.key(node.right)
+
+    def declare(self, value) -> VariableDecl:
+        """Declare a new temporary before the loop, initialized to ``value``."""
+        while f"_t{self.counter}" in self.names:
+            self.counter += 1
+        declaration = VariableDecl(f"_t{self.counter}", value.type, value)
+        self.names.add(declaration.name)
+        self.before.append(declaration)
+        return declaration
+
+    def read(self, declaration: VariableDecl) -> Identifier:
+        identifier = Identifier(declaration.name)
+        identifier.type = declaration.type
+        self.declarations[id(identifier)] = declaration
+        return identifier
+
+    def temporary(self, expression) -> Identifier:
+        key = self.key(expression)
+        if key not in self.temporaries:
+            self.temporaries[key] = self.declare(expression)
+            self.hoisted += 1
+        return self.read(self.temporaries[key])
+
+    def copy(self, node):
+        if isinstance(node, Identifier):
+            return self.read(self.declarations[id(node)])
+        return Literal(node.value, node.type)
+
+    def product(self, left, right) -> BinaryOp:
+        product = BinaryOp(left, TokenType.MULTIPLY, right)
+        product.type = 'int'
+        return product
+
+    def induction_step(self, statement: AssignmentStmt):
+        """``(sign, c)`` if ``statement`` is ``i = i + c`` or ``i = i - c``."""
+        value = statement.value
+        if not isinstance(value, BinaryOp) or value.operator not in (TokenType.PLUS, TokenType.MINUS):
+            return None
+        declaration = self.declarations[id(statement)]
+        left, right = value.left, value.right
+        if isinstance(left, Identifier) and self.declarations[id(left)] is declaration:
+            step = right
+        elif value.operator == TokenType.PLUS and isinstance(right, Identifier) \
+                and self.declarations[id(right)] is declaration:
+            step = left
+        else:
+            return None
+        if not isinstance(step, (Literal, Identifier)) or not self.invariant(step):
+            return None
+        return value.operator, step
+
+    def reduce(self, node: WhileLoop):
+        inductions = {}
+        for key, statements in self.assignments.items():
+            declaration = self.declarations[id(statements[0])]
+            if len(statements) == 1 and declaration.type == 'int' and key not in self.local:
+                step = self.induction_step(statements[0])
+                if step is not None:
+                    inductions[key] = statements[0], step
+
+        def induction_product(expression):
+            """``(i, k)`` if ``expression`` is ``i * k`` or ``k * i``."""
+            if not isinstance(expression, BinaryOp) or expression.operator != TokenType.MULTIPLY:
+                return None
+            for i, k in ((expression.left, expression.right), (expression.right, expression.left)):
+                if isinstance(i, Identifier) and id(self.declarations[id(i)]) in inductions \
+                        and isinstance(k, (Literal, Identifier)) and self.invariant(k):
+                    return i, k
+            return None
+
+        products = {}  # (induction variable, key of k) -> (i, k)
+        counts = {}
+
+        def count(expression):
+            match = induction_product(expression)
+            if match is not None:
+                key = (id(self.declarations[id(match[0])]), self.key(match[1]))
+                products.setdefault(key, match)
+                counts[key] = counts.get(key, 0) + 1
+            elif isinstance(expression, BinaryOp):
+                count(expression.left)
+                count(expression.right)
+            elif isinstance(expression, UnaryOp):
+                count(expression.operand)
+            return expression
+
+        count(node.condition)
+        rewrite_expressions(node.body, count)
+
+        reduced = {}
+        for key, (i, k) in products.items():
+            if counts[key] < 3:
+                continue
+            statement, (operator, c) = inductions[key[0]]
+            temporary = self.declare(self.product(self.copy(i), self.copy(k)))
+            if isinstance(c, Literal) and isinstance(k, Literal):
+                step = Literal(c.value * k.value, 'int')
+            else:
+                step = self.read(self.declare(self.product(self.copy(c), self.copy(k))))
+            update = BinaryOp(self.read(temporary), operator, step)
+            update.type = 'int'
+            advance = AssignmentStmt(temporary.name, update)
+            self.declarations[id(advance)] = temporary
+            insert_after(node.body, statement, advance)
+            reduced[key] = temporary
+            self.reduced += 1
+
+        def replace(expression):
+            match = induction_product(expression)
+            if match is not None:
+                key = (id(self.declarations[id(match[0])]), self.key(match[1]))
+                return self.read(reduced[key]) if key in reduced else expression
+            if isinstance(expression, BinaryOp):
+                expression.left = replace(expression.left)
+                expression.right = replace(expression.right)
+            elif isinstance(expression, UnaryOp):
+                expression.operand = replace(expression.operand)
+            return expression
+
+        if reduced:
+            node.condition = replace(node.condition)
+            rewrite_expressions(node.body, replace)
+
+
+def fold_constants(ast: Program) -> Program:
+    return ConstantFolder().fold(ast)
+
+
+def eliminate_dead_code(ast: Program) -> Program:
+    return DeadCodeEliminator().eliminate(ast)
+
+
+def optimize_loops(ast: Program) -> Program:
+    return LoopOptimizer().optimize(ast)
+
+
+def optimize_program(ast: Program) -> Program:
+    """Run every AST pass, in order."""
+    return optimize_loops(eliminate_dead_code(fold_constants(ast)))
@@ -0,0 +1,109 @@
+"""Output sinks for the PRINT instruction.
+
+A sink has ``write(value)``, called once per printed value, and ``flush()``,
+called when a run ends. Every sink formats a value exactly like the builtin
+``print(value)`` does (``str(value)`` followed by a newline), so switching
+sinks never changes the bytes produced.
+"""
+import os
+import sys
+
+
+class TextSink:
+    """Writes each value straight to a text stream, like ``print`` does.
+
+    Without a stream it writes to whatever ``sys.stdout`` is at the time of
+    the call, so ``contextlib.redirect_stdout`` keeps working.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream
+
+    def write(self, value):
+        (self.stream or sys.stdout).write(str(value) + "\n")
+
+    def flush(self):
+        (self.stream or sys.stdout).flush()
+
+
+class BufferedTextSink:
+    """Collects formatted values and writes them in chunks of ``flush_size``
+    characters, turning thousands of small writes into a few large ones."""
+
+    def __init__(self, stream=None, flush_size: int = 64 * 1024):
+        self.stream = stream
+        self.flush_size = flush_size
+        self.pending = []
+        self.pending_size = 0
+
+    def write(self, value):
+        text = str(value) + "\n"
+        self.pending.append(text)
+        self.pending_size += len(text)
+        if self.pending_size >= self.flush_size:
+            self.flush()
+
+    def flush(self):
+        stream = self.stream or sys.stdout
+        if self.pending:
+            stream.write("".join(self.pending))
+            self.pending.clear()
+            self.pending_size = 0
+        stream.flush()
+
+
+class ListSink:
+    """Keeps the printed values in memory, for embedding the VM in a host
+    program. ``getvalue()`` returns the text ``print`` would have produced."""
+
+    def __init__(self):
+        self.values = []
+        self.write = self.values.append
+
+    def flush(self):
+        pass
+
+    def getvalue(self) -> str:
+        return "".join(str(value) + "\n" for value in self.values)
+
+
+class AsyncQueueSink:
+    """Delivers each printed value to an ``asyncio.Queue`` with
+    ``put_nowait``, for VMs time-sliced by scheduler.Scheduler."""
+
+    def __init__(self, queue):
+        self.queue = queue
+        self.write = queue.put_nowait
+
+    def flush(self):
+        pass
+
+
+class FdSink:
+    """Encodes output to bytes and writes it to a raw file descriptor with
+    ``os.write``, bypassing Python's text I/O stack."""
+
+    def __init__(self, fd: int = 1, flush_size: int = 64 * 1024, encoding: str = "utf-8"):
+        self.fd = fd
+        self.flush_size = flush_size
+        self.encoding = encoding
+        self.pending = []
+        self.pending_size = 0
+
+    def write(self, value):
+        text = str(value) + "\n"
+        self.pending.append(text)
+        self.pending_size += len(text)
+        if self.pending_size >= self.flush_size:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        data = "".join(self.pending).encode(self.encoding)
+        self.pending.clear()
+        self.pending_size = 0
+        view = memoryview(data)
+        while view:
+            written = os.write(self.fd, view)
+            view = view[written:]
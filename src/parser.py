@@ -45,16 +45,19 @@ class UnaryOp(ASTNode):
     def __init__(self, operator: TokenType, operand: ASTNode):
         self.operator = operator
         self.operand = operand
+        self.type: str | None = None  # set by SemanticAnalyzer
 
 class BinaryOp(ASTNode):
     def __init__(self, left: ASTNode, operator: TokenType, right: ASTNode):
         self.left = left
         self.operator = operator
         self.right = right
+        self.type: str | None = None  # set by SemanticAnalyzer
 
 class Identifier(ASTNode):
     def __init__(self, name: str):
         self.name = name
+        self.type: str | None = None  # set by SemanticAnalyzer
 
 class Literal(ASTNode):
     def __init__(self, value, type: str):
@@ -346,10 +349,14 @@ class SemanticAnalyzer:
             raise Exception("Break statement outside of loop")
     
     def visit_PrintStatement(self, node: PrintStatement):
-        pass
+        self.visit(node.expr)
 
 
     def visit_BinaryOp(self, node: BinaryOp):
+        node.type = self.binary_type(node)
+        return node.type
+
+    def binary_type(self, node: BinaryOp) -> str:
         left_type = self.visit(node.left)
         right_type = self.visit(node.right)
         if left_type != right_type:
@@ -372,6 +379,10 @@ class SemanticAnalyzer:
             raise Exception(f"Unknown binary operator: {node.operator}")
 
     def visit_UnaryOp(self, node: UnaryOp):
+        node.type = self.unary_type(node)
+        return node.type
+
+    def unary_type(self, node: UnaryOp) -> str:
         operand_type = self.visit(node.operand)
         if node.operator == TokenType.MINUS:
             if operand_type not in ['int', 'float']:
@@ -388,6 +399,7 @@ class SemanticAnalyzer:
         var_type = self.lookup(node.name)
         if var_type is None:
             raise Exception(f"Variable '{node.name}' not declared")
+        node.type = var_type
         return var_type
 
     def visit_Literal(self, node: Literal):
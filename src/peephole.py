@@ -0,0 +1,194 @@
+"""Peephole optimization of the unlinked instruction stream.
+
+Works on the output of CodeGenerator (labels still in place, before
+superinstructions.fuse and linker.link) and repeats until nothing changes:
+
+- jumps to jumps are threaded to the final target, and a JMP to HALT
+  becomes HALT
+- instructions after a JMP or HALT that no label leads to are dropped,
+  as are labels no jump refers to
+- a JMP to the next instruction is dropped and a JZ to it becomes a POP
+- ``PUSH k; JZ L`` becomes ``JMP L`` or nothing, depending on ``k``
+- sliding windows drop PUSH/LOAD/DUP followed by POP, SWAP; SWAP, a LOAD
+  stored straight back, algebraic identities (``x * 1``, ``x / 1``,
+  ``x - 0``, ``x + 0`` for ints) and rewrite ``PUSH 0; SWAP; SUB`` as NEG
+"""
+from linker import is_label
+from sam_vm import Instruction, Opcode
+
+JUMP_OPCODES = {Opcode.JMP, Opcode.JZ}
+# Instructions with no effect but pushing one value
+PURE_PUSHES = {Opcode.PUSH, Opcode.LOAD, Opcode.DUP}
+
+
+def _is_constant(instruction, value) -> bool:
+    return (instruction.opcode == Opcode.PUSH and type(instruction.operand) in (int, float)
+            and instruction.operand == value)
+
+
+def _is_int_zero(instruction) -> bool:
+    return instruction.opcode == Opcode.PUSH and type(instruction.operand) is int and instruction.operand == 0
+
+
+def _rewrite_at(window: list) -> tuple[list, int] | None:
+    """Return the replacement for the start of ``window`` (a run of
+    instructions with no label in between) and how many entries it replaces."""
+    first = window[0]
+    second = window[1] if len(window) > 1 else None
+    if second is None:
+        return None
+
+    # PUSH 0; SWAP; SUB  ->  NEG
+    if (len(window) > 2 and _is_int_zero(first) and second.opcode == Opcode.SWAP
+            and window[2].opcode == Opcode.SUB):
+        return [Instruction(Opcode.NEG)], 3
+
+    # PUSH k; POP, LOAD a; POP, DUP; POP  ->  nothing
+    if first.opcode in PURE_PUSHES and second.opcode == Opcode.POP:
+        return [], 2
+    # SWAP; SWAP  ->  nothing
+    if first.opcode == second.opcode == Opcode.SWAP:
+        return [], 2
+    # LOAD a; STORE a  ->  nothing
+    if first.opcode == Opcode.LOAD and second.opcode == Opcode.STORE and first.operand == second.operand:
+        return [], 2
+
+    # x * 1, x / 1, x - 0  ->  x. x + 0 only for ints: -0.0 + 0 is 0.0, and
+    # SemanticAnalyzer only lets an int 0 be added to an int
+    if _is_constant(first, 1) and second.opcode in (Opcode.MUL, Opcode.DIV, Opcode.IDIV, Opcode.FDIV):
+        return [], 2
+    if _is_constant(first, 0) and second.opcode == Opcode.SUB:
+        return [], 2
+    if _is_int_zero(first) and second.opcode == Opcode.ADD:
+        return [], 2
+
+    # PUSH k; JZ L  ->  JMP L if k is false, nothing otherwise
+    if first.opcode == Opcode.PUSH and second.opcode == Opcode.JZ:
+        return ([] if first.operand else [Instruction(Opcode.JMP, second.operand)]), 2
+    return None
+
+
+class PeepholeOptimizer:
+    """``removed`` is how many instructions the last ``optimize`` call
+    removed; ``passes`` how many times it went over the stream."""
+
+    def __init__(self):
+        self.removed = 0
+        self.passes = 0
+
+    def optimize(self, program: list) -> list:
+        before = _instruction_count(program)
+        self.passes = 0
+        changed = True
+        while changed:
+            self.passes += 1
+            program, threaded = self.thread_jumps(program)
+            program, cleaned = self.remove_unreachable(program)
+            program, shortened = self.remove_jumps_to_next(program)
+            program, rewritten = self.rewrite_windows(program)
+            changed = threaded or cleaned or shortened or rewritten
+        self.removed = before - _instruction_count(program)
+        return program
+
+    def thread_jumps(self, program: list) -> tuple[list, bool]:
+        targets = _label_targets(program)
+
+        def final_target(label):
+            seen = {label}
+            while True:
+                target = targets.get(label)
+                if target is None or target.opcode != Opcode.JMP or target.operand in seen:
+                    return label
+                label = target.operand
+                seen.add(label)
+
+        changed = False
+        threaded = []
+        for entry in program:
+            if isinstance(entry, Instruction) and entry.opcode in JUMP_OPCODES:
+                label = final_target(entry.operand)
+                if entry.opcode == Opcode.JMP and targets.get(label) is not None \
+                        and targets[label].opcode == Opcode.HALT:
+                    entry = Instruction(Opcode.HALT)
+                    changed = True
+                elif label != entry.operand:
+                    entry = Instruction(entry.opcode, label)
+                    changed = True
+            threaded.append(entry)
+        return threaded, changed
+
+    def remove_unreachable(self, program: list) -> tuple[list, bool]:
+        used = {entry.operand for entry in program
+                if isinstance(entry, Instruction) and entry.opcode in JUMP_OPCODES}
+        kept = []
+        reachable = True
+        for entry in program:
+            if is_label(entry):
+                if entry[:-1] in used:
+                    kept.append(entry)
+                    reachable = True
+                continue
+            if reachable:
+                kept.append(entry)
+                if entry.opcode in (Opcode.JMP, Opcode.HALT):
+                    reachable = False
+        return kept, len(kept) != len(program)
+
+    def remove_jumps_to_next(self, program: list) -> tuple[list, bool]:
+        changed = False
+        kept = []
+        for i, entry in enumerate(program):
+            if isinstance(entry, Instruction) and entry.opcode in JUMP_OPCODES:
+                following = set()
+                j = i + 1
+                while j < len(program) and is_label(program[j]):
+                    following.add(program[j][:-1])
+                    j += 1
+                if entry.operand in following:
+                    changed = True
+                    if entry.opcode == Opcode.JZ:
+                        kept.append(Instruction(Opcode.POP))
+                    continue
+            kept.append(entry)
+        return kept, changed
+
+    def rewrite_windows(self, program: list) -> tuple[list, bool]:
+        changed = False
+        rewritten = []
+        i = 0
+        while i < len(program):
+            window = []
+            for entry in program[i:i + 3]:
+                if not isinstance(entry, Instruction):
+                    break
+                window.append(entry)
+            match = _rewrite_at(window) if window else None
+            if match is None:
+                rewritten.append(program[i])
+                i += 1
+            else:
+                replacement, length = match
+                rewritten.extend(replacement)
+                i += length
+                changed = True
+        return rewritten, changed
+
+
+def _instruction_count(program: list) -> int:
+    return sum(isinstance(entry, Instruction) for entry in program)
+
+
+def _label_targets(program: list) -> dict:
+    """Map each label to the first instruction after it (None at the end)."""
+    targets = {}
+    pending = []
+    for entry in program:
+        if is_label(entry):
+            pending.append(entry[:-1])
+        elif isinstance(entry, Instruction):
+            for label in pending:
+                targets[label] = entry
+            pending = []
+    for label in pending:
+        targets[label] = None
+    return targets
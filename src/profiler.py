@@ -0,0 +1,94 @@
+import json
+import sys
+
+from sam_vm import CONDITIONAL_JUMPS
+
+
+class Profiler:
+    """Per-opcode and per-pc execution profile for SAMVirtualMachine.
+
+    Pass one as ``SAMVirtualMachine(..., profiler=Profiler())`` and the VM
+    runs a separate instrumented loop that records execution counts and
+    cumulative time for every pc, plus taken/not-taken counts for conditional
+    branches. When the program halts the profile is written to ``stream``
+    (stderr by default) as a text report sorted by time, or as JSON with
+    ``format="json"``; a run that stops on ``max_steps`` or a deadline does
+    not write it, so call ``dump()`` to report one that never halts.
+    """
+
+    def __init__(self, format: str = "text", stream=None, top: int | None = 20):
+        if format not in ("text", "json"):
+            raise ValueError(f"Unknown profile format: {format}")
+        self.format = format
+        self.stream = stream
+        self.top = top
+        self.opcodes = []
+        self.counts = []
+        self.times = []
+        self.taken = []
+        self.not_taken = []
+
+    def attach(self, opcodes: list):
+        self.opcodes = opcodes
+        self.counts = [0] * len(opcodes)
+        self.times = [0.0] * len(opcodes)
+        self.taken = [0] * len(opcodes)
+        self.not_taken = [0] * len(opcodes)
+
+    def by_opcode(self) -> dict:
+        totals = {}
+        for opcode, count, elapsed in zip(self.opcodes, self.counts, self.times):
+            entry = totals.setdefault(opcode, {"count": 0, "time": 0.0})
+            entry["count"] += count
+            entry["time"] += elapsed
+        return dict(sorted(totals.items(), key=lambda item: item[1]["time"], reverse=True))
+
+    def by_pc(self) -> list:
+        rows = [
+            {"pc": pc, "opcode": opcode, "count": count, "time": elapsed}
+            for pc, (opcode, count, elapsed) in enumerate(zip(self.opcodes, self.counts, self.times))
+            if count
+        ]
+        return sorted(rows, key=lambda row: row["time"], reverse=True)
+
+    def branches(self) -> list:
+        return [
+            {"pc": pc, "opcode": opcode, "taken": self.taken[pc], "not_taken": self.not_taken[pc]}
+            for pc, opcode in enumerate(self.opcodes)
+            if opcode in CONDITIONAL_JUMPS and (self.taken[pc] or self.not_taken[pc])
+        ]
+
+    def to_dict(self) -> dict:
+        return {
+            "instructions": sum(self.counts),
+            "time": sum(self.times),
+            "opcodes": self.by_opcode(),
+            "pcs": self.by_pc(),
+            "branches": self.branches(),
+        }
+
+    def report(self) -> str:
+        total_time = sum(self.times) or 1.0
+        lines = [f"{sum(self.counts)} instructions in {sum(self.times) * 1000:.3f} ms", ""]
+        lines.append(f"{'opcode':<14} {'count':>10} {'time (ms)':>10} {'%':>6}")
+        for opcode, entry in self.by_opcode().items():
+            lines.append(f"{opcode:<14} {entry['count']:>10} {entry['time'] * 1000:>10.3f} "
+                         f"{entry['time'] / total_time:>6.1%}")
+        lines.append("")
+        lines.append(f"{'pc':>6} {'opcode':<14} {'count':>10} {'time (ms)':>10}")
+        for row in self.by_pc()[:self.top]:
+            lines.append(f"{row['pc']:>6} {row['opcode']:<14} {row['count']:>10} {row['time'] * 1000:>10.3f}")
+        branches = self.branches()
+        if branches:
+            lines.append("")
+            lines.append(f"{'pc':>6} {'branch':<14} {'taken':>10} {'not taken':>10}")
+            for row in branches:
+                lines.append(f"{row['pc']:>6} {row['opcode']:<14} {row['taken']:>10} {row['not_taken']:>10}")
+        return "\n".join(lines)
+
+    def dump(self):
+        stream = self.stream or sys.stderr
+        if self.format == "json":
+            stream.write(json.dumps(self.to_dict(), indent=2) + "\n")
+        else:
+            stream.write(self.report() + "\n")
@@ -0,0 +1,236 @@
+from lexer import TokenType
+from parser import (
+    ASTNode,
+    Program,
+    VariableDecl,
+    WhileLoop,
+    IfStatement,
+    AssignmentStmt,
+    BinaryOp,
+    UnaryOp,
+    Identifier,
+    Literal,
+    BreakStatement,
+    PrintStatement,
+    ElseStatement
+)
+from register_vm import RegisterOpcode, RegisterInstruction, RegisterProgram
+
+BINARY_OPCODES = {
+    TokenType.PLUS: RegisterOpcode.ADD,
+    TokenType.MINUS: RegisterOpcode.SUB,
+    TokenType.MULTIPLY: RegisterOpcode.MUL,
+    TokenType.LESS_THAN: RegisterOpcode.LT,
+    TokenType.GREATER_THAN: RegisterOpcode.GT,
+    TokenType.LESS_EQUAL: RegisterOpcode.LE,
+    TokenType.GREATER_EQUAL: RegisterOpcode.GE,
+    TokenType.EQUAL_EQUAL: RegisterOpcode.EQ,
+    TokenType.NOT_EQUAL: RegisterOpcode.NE,
+    TokenType.AND: RegisterOpcode.AND,
+    TokenType.OR: RegisterOpcode.OR,
+}
+
+
+class RegisterCodeGenerator:
+    """Generates three-address register code from the same AST as CodeGenerator.
+
+    Every variable, constant and temporary gets a register. Expressions return
+    the register holding their value; the outermost operation of an
+    assignment writes straight into the variable's register, so ``c = a + b``
+    becomes ``ADD r_c, r_a, r_b``.
+    """
+
+    def __init__(self):
+        self.instructions = []
+        self.scopes: list[dict[str, int]] = [{}]
+        self.register_count = 0
+        self.constants = {}  # (type, repr) -> register
+        self.constant_values = {}  # register -> value
+        self.free_temps = []
+        self.temps = set()
+        self.label_counter = 0
+        self.label_addresses = {}
+        self.loop_end_labels = []
+
+    def generate(self, ast: Program) -> RegisterProgram:
+        self.visit(ast)
+        self.emit(RegisterOpcode.HALT)
+        return RegisterProgram(self.link(), self.register_count, self.constant_values)
+
+    def visit(self, node: ASTNode, *args):
+        method_name = f"visit_{type(node).__name__}"
+        visit_method = getattr(self, method_name, self.generic_visit)
+        return visit_method(node, *args)
+
+    def generic_visit(self, node: ASTNode, *args):
+        raise Exception(f"No visit method for {type(node).__name__}")
+
+    def emit(self, opcode: RegisterOpcode, *operands):
+        self.instructions.append(RegisterInstruction(opcode, *operands))
+
+    def create_label(self):
+        self.label_counter += 1
+        return f"L{self.label_counter}"
+
+    def place_label(self, label: str):
+        self.label_addresses[label] = len(self.instructions)
+
+    def link(self) -> list[RegisterInstruction]:
+        for instruction in self.instructions:
+            if instruction.opcode in (RegisterOpcode.JMP, RegisterOpcode.JZ):
+                *registers, label = instruction.operands
+                instruction.operands = (*registers, self.label_addresses[label])
+        return self.instructions
+
+    def new_register(self) -> int:
+        self.register_count += 1
+        return self.register_count - 1
+
+    def new_temp(self) -> int:
+        register = self.free_temps.pop() if self.free_temps else self.new_register()
+        self.temps.add(register)
+        return register
+
+    def release(self, register: int):
+        if register in self.temps:
+            self.temps.remove(register)
+            self.free_temps.append(register)
+
+    def constant(self, value) -> int:
+        key = (type(value), repr(value))
+        if key not in self.constants:
+            register = self.new_register()
+            self.constants[key] = register
+            self.constant_values[register] = value
+        return self.constants[key]
+
+    def lookup(self, name: str) -> int:
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        raise Exception(f"Variable '{name}' not declared")
+
+    def evaluate_into(self, node: ASTNode, dest: int):
+        register = self.visit(node, dest)
+        if register != dest:
+            self.emit(RegisterOpcode.MOVE, dest, register)
+            self.release(register)
+
+    def visit_block(self, statements: list[ASTNode]):
+        self.scopes.append({})
+        for statement in statements:
+            self.visit(statement)
+        self.scopes.pop()
+
+    def visit_Program(self, node: Program):
+        for statement in node.statements:
+            self.visit(statement)
+
+    def visit_VariableDecl(self, node: VariableDecl):
+        register = self.new_register()
+        self.evaluate_into(node.value, register)
+        self.scopes[-1][node.name] = register
+
+    def visit_WhileLoop(self, node: WhileLoop):
+        start_label = self.create_label()
+        end_label = self.create_label()
+        self.loop_end_labels.append(end_label)
+
+        self.place_label(start_label)
+        condition = self.visit(node.condition)
+        self.release(condition)
+        self.emit(RegisterOpcode.JZ, condition, end_label)
+        self.visit_block(node.body)
+        self.emit(RegisterOpcode.JMP, start_label)
+        self.place_label(end_label)
+
+        self.loop_end_labels.pop()
+
+    def visit_IfStatement(self, node: IfStatement):
+        end_label = self.create_label()
+        branches = [node] + node.else_if_list
+        for branch in branches:
+            if isinstance(branch, ElseStatement):  # This is the final 'else'
+                self.visit_block(branch.body)
+                continue
+            next_label = self.create_label()
+            condition = self.visit(branch.condition)
+            self.release(condition)
+            self.emit(RegisterOpcode.JZ, condition, next_label)
+            self.visit_block(branch.if_body)
+            self.emit(RegisterOpcode.JMP, end_label)
+            self.place_label(next_label)
+        self.place_label(end_label)
+
+    def visit_AssignmentStmt(self, node: AssignmentStmt):
+        self.evaluate_into(node.value, self.lookup(node.name))
+
+    def visit_BinaryOp(self, node: BinaryOp, dest: int | None = None) -> int:
+        if node.operator in (TokenType.AND, TokenType.OR):
+            return self.logical(node, dest)
+        left = self.visit(node.left)
+        right = self.visit(node.right)
+        if node.operator == TokenType.DIVIDE:
+            opcode = RegisterOpcode.IDIV if node.type == 'int' else RegisterOpcode.FDIV
+        else:
+            opcode = BINARY_OPCODES[node.operator]
+        self.release(left)
+        self.release(right)
+        if dest is None:
+            dest = self.new_temp()
+        self.emit(opcode, dest, left, right)
+        return dest
+
+    def logical(self, node: BinaryOp, dest: int | None) -> int:
+        """``&&``/``||`` with short-circuit jumps, leaving 0 or 1 in ``dest``."""
+        false_label = self.create_label()
+        true_label = self.create_label()
+        end_label = self.create_label()
+        if dest is None:
+            dest = self.new_temp()
+        left = self.visit(node.left)
+        self.release(left)
+        if node.operator == TokenType.AND:
+            self.emit(RegisterOpcode.JZ, left, false_label)
+        else:
+            right_label = self.create_label()
+            self.emit(RegisterOpcode.JZ, left, right_label)
+            self.emit(RegisterOpcode.JMP, true_label)
+            self.place_label(right_label)
+        right = self.visit(node.right)
+        self.release(right)
+        self.emit(RegisterOpcode.JZ, right, false_label)
+        self.place_label(true_label)
+        self.emit(RegisterOpcode.MOVE, dest, self.constant(1))
+        self.emit(RegisterOpcode.JMP, end_label)
+        self.place_label(false_label)
+        self.emit(RegisterOpcode.MOVE, dest, self.constant(0))
+        self.place_label(end_label)
+        return dest
+
+    def visit_UnaryOp(self, node: UnaryOp, dest: int | None = None) -> int:
+        operand = self.visit(node.operand)
+        self.release(operand)
+        if dest is None:
+            dest = self.new_temp()
+        if node.operator == TokenType.MINUS:
+            self.emit(RegisterOpcode.NEG, dest, operand)
+        elif node.operator == TokenType.NOT:
+            self.emit(RegisterOpcode.NOT, dest, operand)
+        return dest
+
+    def visit_Identifier(self, node: Identifier, dest: int | None = None) -> int:
+        return self.lookup(node.name)
+
+    def visit_Literal(self, node: Literal, dest: int | None = None) -> int:
+        return self.constant(node.value)
+
+    def visit_BreakStatement(self, node: BreakStatement):
+        if not self.loop_end_labels:
+            raise Exception("Break statement outside of loop")
+        self.emit(RegisterOpcode.JMP, self.loop_end_labels[-1])
+
+    def visit_PrintStatement(self, node: PrintStatement):
+        value = self.visit(node.expr)
+        self.release(value)
+        self.emit(RegisterOpcode.PRINT, value)
@@ -0,0 +1,310 @@
+from output import TextSink
+
+
+class RegisterOpcode:
+    MOVE = "MOVE"  # MOVE d, a
+    ADD = "ADD"    # ADD d, a, b
+    SUB = "SUB"
+    MUL = "MUL"
+    IDIV = "IDIV"
+    FDIV = "FDIV"
+    LT = "LT"
+    GT = "GT"
+    LE = "LE"
+    GE = "GE"
+    EQ = "EQ"
+    NE = "NE"
+    AND = "AND"
+    OR = "OR"
+    NOT = "NOT"    # NOT d, a
+    NEG = "NEG"    # NEG d, a
+    JMP = "JMP"    # JMP target
+    JZ = "JZ"      # JZ a, target
+    PRINT = "PRINT"  # PRINT a
+    HALT = "HALT"
+
+
+class RegisterInstruction:
+    def __init__(self, opcode, *operands):
+        self.opcode = opcode
+        self.operands = operands
+
+    def __str__(self):
+        if not self.operands:
+            return f"{self.opcode}"
+        if self.opcode == RegisterOpcode.JMP:
+            return f"{self.opcode} {self.operands[0]}"
+        if self.opcode == RegisterOpcode.JZ:
+            return f"{self.opcode} r{self.operands[0]}, {self.operands[1]}"
+        return f"{self.opcode} {', '.join(f'r{register}' for register in self.operands)}"
+
+
+class RegisterProgram:
+    """Output of RegisterCodeGenerator: code plus the initial register file.
+
+    Variables, temporaries and constants all live in registers; constant
+    registers are filled in ``constants`` (register -> value) before running.
+    """
+
+    def __init__(self, instructions: list[RegisterInstruction], register_count: int, constants: dict):
+        self.instructions = instructions
+        self.register_count = register_count
+        self.constants = constants
+
+
+def _build_move(vm, operands, next_pc):
+    registers = vm.registers
+    d, a = operands
+
+    def move():
+        registers[d] = registers[a]
+        return next_pc
+    return move
+
+
+def _build_add(vm, operands, next_pc):
+    registers = vm.registers
+    d, a, b = operands
+
+    def add():
+        registers[d] = registers[a] + registers[b]
+        return next_pc
+    return add
+
+
+def _build_sub(vm, operands, next_pc):
+    registers = vm.registers
+    d, a, b = operands
+
+    def sub():
+        registers[d] = registers[a] - registers[b]
+        return next_pc
+    return sub
+
+
+def _build_mul(vm, operands, next_pc):
+    registers = vm.registers
+    d, a, b = operands
+
+    def mul():
+        registers[d] = registers[a] * registers[b]
+        return next_pc
+    return mul
+
+
+def _build_lt(vm, operands, next_pc):
+    registers = vm.registers
+    d, a, b = operands
+
+    def lt():
+        registers[d] = int(registers[a] < registers[b])
+        return next_pc
+    return lt
+
+
+def _build_gt(vm, operands, next_pc):
+    registers = vm.registers
+    d, a, b = operands
+
+    def gt():
+        registers[d] = int(registers[a] > registers[b])
+        return next_pc
+    return gt
+
+
+def _build_idiv(vm, operands, next_pc):
+    registers = vm.registers
+    d, a, b = operands
+
+    def idiv():
+        registers[d] = registers[a] // registers[b]
+        return next_pc
+    return idiv
+
+
+def _build_fdiv(vm, operands, next_pc):
+    registers = vm.registers
+    d, a, b = operands
+
+    def fdiv():
+        registers[d] = registers[a] / registers[b]
+        return next_pc
+    return fdiv
+
+
+def _build_le(vm, operands, next_pc):
+    registers = vm.registers
+    d, a, b = operands
+
+    def le():
+        registers[d] = int(registers[a] <= registers[b])
+        return next_pc
+    return le
+
+
+def _build_ge(vm, operands, next_pc):
+    registers = vm.registers
+    d, a, b = operands
+
+    def ge():
+        registers[d] = int(registers[a] >= registers[b])
+        return next_pc
+    return ge
+
+
+def _build_eq(vm, operands, next_pc):
+    registers = vm.registers
+    d, a, b = operands
+
+    def eq():
+        registers[d] = int(registers[a] == registers[b])
+        return next_pc
+    return eq
+
+
+def _build_ne(vm, operands, next_pc):
+    registers = vm.registers
+    d, a, b = operands
+
+    def ne():
+        registers[d] = int(registers[a] != registers[b])
+        return next_pc
+    return ne
+
+
+def _build_and(vm, operands, next_pc):
+    registers = vm.registers
+    d, a, b = operands
+
+    def and_():
+        registers[d] = int(registers[a] and registers[b])
+        return next_pc
+    return and_
+
+
+def _build_or(vm, operands, next_pc):
+    registers = vm.registers
+    d, a, b = operands
+
+    def or_():
+        registers[d] = int(registers[a] or registers[b])
+        return next_pc
+    return or_
+
+
+def _build_not(vm, operands, next_pc):
+    registers = vm.registers
+    d, a = operands
+
+    def not_():
+        registers[d] = int(not registers[a])
+        return next_pc
+    return not_
+
+
+def _build_neg(vm, operands, next_pc):
+    registers = vm.registers
+    d, a = operands
+
+    def neg():
+        registers[d] = 0 - registers[a]  # see CodeGenerator.visit_UnaryOp
+        return next_pc
+    return neg
+
+
+def _build_jmp(vm, operands, next_pc):
+    target, = operands
+
+    def jmp():
+        return target
+    return jmp
+
+
+def _build_jz(vm, operands, next_pc):
+    registers = vm.registers
+    a, target = operands
+
+    def jz():
+        if registers[a] == 0:
+            return target
+        return next_pc
+    return jz
+
+
+def _build_print(vm, operands, next_pc):
+    registers = vm.registers
+    write = vm.output.write
+    a, = operands
+
+    def print_():
+        write(registers[a])
+        return next_pc
+    return print_
+
+
+def _build_halt(vm, operands, next_pc):
+    end = len(vm.instructions)
+
+    def halt():
+        return end
+    return halt
+
+
+DISPATCH_TABLE = {
+    RegisterOpcode.MOVE: _build_move,
+    RegisterOpcode.ADD: _build_add,
+    RegisterOpcode.SUB: _build_sub,
+    RegisterOpcode.MUL: _build_mul,
+    RegisterOpcode.IDIV: _build_idiv,
+    RegisterOpcode.FDIV: _build_fdiv,
+    RegisterOpcode.LT: _build_lt,
+    RegisterOpcode.GT: _build_gt,
+    RegisterOpcode.LE: _build_le,
+    RegisterOpcode.GE: _build_ge,
+    RegisterOpcode.EQ: _build_eq,
+    RegisterOpcode.NE: _build_ne,
+    RegisterOpcode.AND: _build_and,
+    RegisterOpcode.OR: _build_or,
+    RegisterOpcode.NOT: _build_not,
+    RegisterOpcode.NEG: _build_neg,
+    RegisterOpcode.JMP: _build_jmp,
+    RegisterOpcode.JZ: _build_jz,
+    RegisterOpcode.PRINT: _build_print,
+    RegisterOpcode.HALT: _build_halt,
+}
+
+
+class RegisterVirtualMachine:
+    """Runs three-address code from RegisterCodeGenerator on a register file.
+
+    Uses the same closure dispatch scheme as SAMVirtualMachine, but operands
+    are register numbers, so ``c = a + b`` is a single ``ADD`` with no stack
+    traffic.
+    """
+
+    def __init__(self, program: RegisterProgram, output=None):
+        self.program = program
+        self.output = output if output is not None else TextSink()
+        self.instructions = program.instructions
+        self.registers = [0] * program.register_count
+        for register, value in program.constants.items():
+            self.registers[register] = value
+        self.pc = 0
+        self.code = self.compile()
+
+    def compile(self) -> list:
+        return [
+            DISPATCH_TABLE[instruction.opcode](self, instruction.operands, pc + 1)
+            for pc, instruction in enumerate(self.instructions)
+        ]
+
+    def run(self):
+        code = self.code
+        end = len(code)
+        pc = self.pc
+        try:
+            while pc < end:
+                pc = code[pc]()
+        finally:
+            self.pc = pc
+            self.output.flush()
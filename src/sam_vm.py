@@ -1,3 +1,10 @@
+import time
+from array import array
+from itertools import repeat
+
+from output import TextSink
+
+
 class Opcode:
     PUSH = "PUSH"
     POP = "POP"
@@ -19,6 +26,46 @@ class Opcode:
     SWAP = "SWAP"
     DUP = "DUP"
     PRINT = "PRINT"
+    # Superinstructions produced by superinstructions.fuse
+    LOAD_LOAD_ADD = "LOAD_LOAD_ADD"
+    LOAD_LOAD_SUB = "LOAD_LOAD_SUB"
+    LOAD_LOAD_MUL = "LOAD_LOAD_MUL"
+    CMP_LT_JZ = "CMP_LT_JZ"
+    CMP_GT_JZ = "CMP_GT_JZ"
+    CMP_EQ_JZ = "CMP_EQ_JZ"
+    INC_SLOT = "INC_SLOT"
+    NEG = "NEG"
+    # Typed opcodes, picked by CodeGenerator from the types SemanticAnalyzer
+    # stores on the AST
+    IDIV = "IDIV"
+    FDIV = "FDIV"
+    LE = "LE"
+    GE = "GE"
+    NE = "NE"
+
+
+# How many leading operand entries of each opcode are memory slot numbers
+SLOT_OPERAND_COUNTS = {
+    Opcode.LOAD: 1,
+    Opcode.STORE: 1,
+    Opcode.LOAD_LOAD_ADD: 2,
+    Opcode.LOAD_LOAD_SUB: 2,
+    Opcode.LOAD_LOAD_MUL: 2,
+    Opcode.CMP_LT_JZ: 2,
+    Opcode.CMP_GT_JZ: 2,
+    Opcode.CMP_EQ_JZ: 2,
+    Opcode.INC_SLOT: 1,
+}
+
+
+def slot_operands(opcode, operand) -> tuple:
+    """The memory slots an instruction reads or writes."""
+    count = SLOT_OPERAND_COUNTS.get(opcode, 0)
+    if count == 0:
+        return ()
+    if isinstance(operand, tuple):
+        return operand[:count]
+    return (operand,)
 
 
 class Instruction:
@@ -29,86 +76,702 @@ class Instruction:
     def __str__(self):
         if self.operand is None:
             return f"{self.opcode}"
+        if isinstance(self.operand, tuple):
+            return f"{self.opcode} {' '.join(str(operand) for operand in self.operand)}"
         return f"{self.opcode} {self.operand}"
 
 
+# Every builder gets the stack depth before its instruction, as computed by
+# verify_stack, so stack operands live at fixed positions of the preallocated
+# vm.stack: ``depth - 1`` is the top of the stack.
+
+def _build_push(vm, operand, next_pc, depth):
+    stack = vm.stack
+
+    def push_():
+        stack[depth] = operand
+        return next_pc
+    return push_
+
+
+def _build_pop(vm, operand, next_pc, depth):
+    def pop_():
+        return next_pc
+    return pop_
+
+
+def _build_swap(vm, operand, next_pc, depth):
+    stack = vm.stack
+    a, b = depth - 2, depth - 1
+
+    def swap():
+        stack[a], stack[b] = stack[b], stack[a]
+        return next_pc
+    return swap
+
+
+def _build_dup(vm, operand, next_pc, depth):
+    stack = vm.stack
+    top = depth - 1
+
+    def dup():
+        stack[depth] = stack[top]
+        return next_pc
+    return dup
+
+
+def _build_add(vm, operand, next_pc, depth):
+    stack = vm.stack
+    a, b = depth - 2, depth - 1
+
+    def add():
+        stack[a] = stack[a] + stack[b]
+        return next_pc
+    return add
+
+
+def _build_sub(vm, operand, next_pc, depth):
+    stack = vm.stack
+    a, b = depth - 2, depth - 1
+
+    def sub():
+        stack[a] = stack[a] - stack[b]
+        return next_pc
+    return sub
+
+
+def _build_mul(vm, operand, next_pc, depth):
+    stack = vm.stack
+    a, b = depth - 2, depth - 1
+
+    def mul():
+        stack[a] = stack[a] * stack[b]
+        return next_pc
+    return mul
+
+
+def _build_div(vm, operand, next_pc, depth):
+    stack = vm.stack
+    a, b = depth - 2, depth - 1
+
+    def div():
+        x, y = stack[a], stack[b]
+        if type(x) is int and type(y) is int:
+            stack[a] = x // y  # Integer division
+        else:
+            stack[a] = x / y
+        return next_pc
+    return div
+
+
+def _build_idiv(vm, operand, next_pc, depth):
+    stack = vm.stack
+    a, b = depth - 2, depth - 1
+
+    def idiv():
+        stack[a] = stack[a] // stack[b]
+        return next_pc
+    return idiv
+
+
+def _build_fdiv(vm, operand, next_pc, depth):
+    stack = vm.stack
+    a, b = depth - 2, depth - 1
+
+    def fdiv():
+        stack[a] = stack[a] / stack[b]
+        return next_pc
+    return fdiv
+
+
+def _build_lt(vm, operand, next_pc, depth):
+    stack = vm.stack
+    a, b = depth - 2, depth - 1
+
+    def lt():
+        stack[a] = int(stack[a] < stack[b])
+        return next_pc
+    return lt
+
+
+def _build_gt(vm, operand, next_pc, depth):
+    stack = vm.stack
+    a, b = depth - 2, depth - 1
+
+    def gt():
+        stack[a] = int(stack[a] > stack[b])
+        return next_pc
+    return gt
+
+
+def _build_eq(vm, operand, next_pc, depth):
+    stack = vm.stack
+    a, b = depth - 2, depth - 1
+
+    def eq():
+        stack[a] = int(stack[a] == stack[b])
+        return next_pc
+    return eq
+
+
+def _build_le(vm, operand, next_pc, depth):
+    stack = vm.stack
+    a, b = depth - 2, depth - 1
+
+    def le():
+        stack[a] = int(stack[a] <= stack[b])
+        return next_pc
+    return le
+
+
+def _build_ge(vm, operand, next_pc, depth):
+    stack = vm.stack
+    a, b = depth - 2, depth - 1
+
+    def ge():
+        stack[a] = int(stack[a] >= stack[b])
+        return next_pc
+    return ge
+
+
+def _build_ne(vm, operand, next_pc, depth):
+    stack = vm.stack
+    a, b = depth - 2, depth - 1
+
+    def ne():
+        stack[a] = int(stack[a] != stack[b])
+        return next_pc
+    return ne
+
+
+def _build_and(vm, operand, next_pc, depth):
+    stack = vm.stack
+    a, b = depth - 2, depth - 1
+
+    def and_():
+        stack[a] = int(stack[a] and stack[b])
+        return next_pc
+    return and_
+
+
+def _build_or(vm, operand, next_pc, depth):
+    stack = vm.stack
+    a, b = depth - 2, depth - 1
+
+    def or_():
+        stack[a] = int(stack[a] or stack[b])
+        return next_pc
+    return or_
+
+
+def _build_not(vm, operand, next_pc, depth):
+    stack = vm.stack
+    top = depth - 1
+
+    def not_():
+        stack[top] = int(not stack[top])
+        return next_pc
+    return not_
+
+
+def _build_jmp(vm, operand, next_pc, depth):
+    def jmp():
+        return operand
+    return jmp
+
+
+def _build_jz(vm, operand, next_pc, depth):
+    stack = vm.stack
+    top = depth - 1
+
+    def jz():
+        if stack[top] == 0:
+            return operand
+        return next_pc
+    return jz
+
+
+def _build_store(vm, operand, next_pc, depth):
+    memory, slot = vm.cell(operand)
+    stack = vm.stack
+    top = depth - 1
+
+    def store():
+        memory[slot] = stack[top]
+        return next_pc
+    return store
+
+
+def _build_load(vm, operand, next_pc, depth):
+    memory, slot = vm.cell(operand)
+    stack = vm.stack
+
+    def load():
+        stack[depth] = memory[slot]
+        return next_pc
+    return load
+
+
+def _build_print(vm, operand, next_pc, depth):
+    stack = vm.stack
+    top = depth - 1
+    write = vm.output.write
+
+    def print_():
+        write(stack[top])
+        return next_pc
+    return print_
+
+
+def _build_halt(vm, operand, next_pc, depth):
+    end = len(vm.instructions)
+
+    def halt():
+        return end  # End execution
+    return halt
+
+
+def _build_load_load_add(vm, operand, next_pc, depth):
+    memory_a, a = vm.cell(operand[0])
+    memory_b, b = vm.cell(operand[1])
+    stack = vm.stack
+
+    def load_load_add():
+        stack[depth] = memory_a[a] + memory_b[b]
+        return next_pc
+    return load_load_add
+
+
+def _build_load_load_sub(vm, operand, next_pc, depth):
+    memory_a, a = vm.cell(operand[0])
+    memory_b, b = vm.cell(operand[1])
+    stack = vm.stack
+
+    def load_load_sub():
+        stack[depth] = memory_a[a] - memory_b[b]
+        return next_pc
+    return load_load_sub
+
+
+def _build_load_load_mul(vm, operand, next_pc, depth):
+    memory_a, a = vm.cell(operand[0])
+    memory_b, b = vm.cell(operand[1])
+    stack = vm.stack
+
+    def load_load_mul():
+        stack[depth] = memory_a[a] * memory_b[b]
+        return next_pc
+    return load_load_mul
+
+
+def _build_cmp_lt_jz(vm, operand, next_pc, depth):
+    memory_a, a = vm.cell(operand[0])
+    memory_b, b = vm.cell(operand[1])
+    target = operand[2]
+
+    def cmp_lt_jz():
+        if memory_a[a] < memory_b[b]:
+            return next_pc
+        return target
+    return cmp_lt_jz
+
+
+def _build_cmp_gt_jz(vm, operand, next_pc, depth):
+    memory_a, a = vm.cell(operand[0])
+    memory_b, b = vm.cell(operand[1])
+    target = operand[2]
+
+    def cmp_gt_jz():
+        if memory_a[a] > memory_b[b]:
+            return next_pc
+        return target
+    return cmp_gt_jz
+
+
+def _build_cmp_eq_jz(vm, operand, next_pc, depth):
+    memory_a, a = vm.cell(operand[0])
+    memory_b, b = vm.cell(operand[1])
+    target = operand[2]
+
+    def cmp_eq_jz():
+        if memory_a[a] == memory_b[b]:
+            return next_pc
+        return target
+    return cmp_eq_jz
+
+
+def _build_inc_slot(vm, operand, next_pc, depth):
+    memory, slot = vm.cell(operand[0])
+    step = operand[1]
+
+    def inc_slot():
+        memory[slot] = memory[slot] + step
+        return next_pc
+    return inc_slot
+
+
+def _build_neg(vm, operand, next_pc, depth):
+    stack = vm.stack
+    top = depth - 1
+
+    def neg():
+        # 0 - x, see CodeGenerator.visit_UnaryOp
+        stack[top] = 0 - stack[top]
+        return next_pc
+    return neg
+
+
+def _build_unreachable(vm, operand, next_pc, depth):
+    def unreachable():
+        raise RuntimeError(f"Jumped into unreachable code at pc {next_pc - 1}")
+    return unreachable
+
+
+# Maps every opcode to a builder that turns one instruction into a closure.
+# The closure performs the instruction and returns the pc of the next one.
+DISPATCH_TABLE = {
+    Opcode.PUSH: _build_push,
+    Opcode.POP: _build_pop,
+    Opcode.SWAP: _build_swap,
+    Opcode.DUP: _build_dup,
+    Opcode.ADD: _build_add,
+    Opcode.SUB: _build_sub,
+    Opcode.MUL: _build_mul,
+    Opcode.DIV: _build_div,
+    Opcode.LT: _build_lt,
+    Opcode.GT: _build_gt,
+    Opcode.EQ: _build_eq,
+    Opcode.AND: _build_and,
+    Opcode.OR: _build_or,
+    Opcode.NOT: _build_not,
+    Opcode.JMP: _build_jmp,
+    Opcode.JZ: _build_jz,
+    Opcode.STORE: _build_store,
+    Opcode.LOAD: _build_load,
+    Opcode.PRINT: _build_print,
+    Opcode.HALT: _build_halt,
+    Opcode.LOAD_LOAD_ADD: _build_load_load_add,
+    Opcode.LOAD_LOAD_SUB: _build_load_load_sub,
+    Opcode.LOAD_LOAD_MUL: _build_load_load_mul,
+    Opcode.CMP_LT_JZ: _build_cmp_lt_jz,
+    Opcode.CMP_GT_JZ: _build_cmp_gt_jz,
+    Opcode.CMP_EQ_JZ: _build_cmp_eq_jz,
+    Opcode.INC_SLOT: _build_inc_slot,
+    Opcode.NEG: _build_neg,
+    Opcode.IDIV: _build_idiv,
+    Opcode.FDIV: _build_fdiv,
+    Opcode.LE: _build_le,
+    Opcode.GE: _build_ge,
+    Opcode.NE: _build_ne,
+}
+
+
+# (values popped, values pushed) by every opcode, for verify_stack
+STACK_EFFECTS = {
+    Opcode.PUSH: (0, 1),
+    Opcode.POP: (1, 0),
+    Opcode.SWAP: (2, 2),
+    Opcode.DUP: (1, 2),
+    Opcode.ADD: (2, 1),
+    Opcode.SUB: (2, 1),
+    Opcode.MUL: (2, 1),
+    Opcode.DIV: (2, 1),
+    Opcode.LT: (2, 1),
+    Opcode.GT: (2, 1),
+    Opcode.EQ: (2, 1),
+    Opcode.AND: (2, 1),
+    Opcode.OR: (2, 1),
+    Opcode.NOT: (1, 1),
+    Opcode.JMP: (0, 0),
+    Opcode.JZ: (1, 0),
+    Opcode.STORE: (1, 0),
+    Opcode.LOAD: (0, 1),
+    Opcode.PRINT: (1, 0),
+    Opcode.HALT: (0, 0),
+    Opcode.LOAD_LOAD_ADD: (0, 1),
+    Opcode.LOAD_LOAD_SUB: (0, 1),
+    Opcode.LOAD_LOAD_MUL: (0, 1),
+    Opcode.CMP_LT_JZ: (0, 0),
+    Opcode.CMP_GT_JZ: (0, 0),
+    Opcode.CMP_EQ_JZ: (0, 0),
+    Opcode.INC_SLOT: (0, 0),
+    Opcode.NEG: (1, 1),
+    Opcode.IDIV: (2, 1),
+    Opcode.FDIV: (2, 1),
+    Opcode.LE: (2, 1),
+    Opcode.GE: (2, 1),
+    Opcode.NE: (2, 1),
+}
+
+CONDITIONAL_JUMPS = {Opcode.JZ, Opcode.CMP_LT_JZ, Opcode.CMP_GT_JZ, Opcode.CMP_EQ_JZ}
+
+
+def verify_stack(operations: list) -> tuple[list, int]:
+    """Check the stack discipline of a linked program by abstract
+    interpretation over its control-flow graph.
+
+    Returns ``(depths, max_depth)``: ``depths[pc]`` is the stack depth before
+    instruction ``pc`` (``depths[len(operations)]`` the depth on halting) or
+    None for unreachable code, and ``max_depth`` the most stack the program
+    ever uses. Raises ValueError on stack underflow, on a jump outside the
+    program, or where paths meet with different stack depths.
+    """
+    end = len(operations)
+    depths = [None] * (end + 1)
+    depths[0] = 0
+    max_depth = 0
+    pending = [0] if operations else []
+    while pending:
+        pc = pending.pop()
+        opcode, operand = operations[pc]
+        depth = depths[pc]
+        pops, pushes = STACK_EFFECTS[opcode]
+        if depth < pops:
+            raise ValueError(f"Stack underflow at pc {pc} ({opcode}): needs {pops}, has {depth}")
+        after = depth - pops + pushes
+        max_depth = max(max_depth, depth, after)
+        if opcode == Opcode.JMP:
+            successors = [operand]
+        elif opcode in CONDITIONAL_JUMPS:
+            successors = [pc + 1, operand[-1] if isinstance(operand, tuple) else operand]
+        elif opcode == Opcode.HALT:
+            successors = [end]
+        else:
+            successors = [pc + 1]
+        for successor in successors:
+            if not isinstance(successor, int) or not 0 <= successor <= end:
+                raise ValueError(f"Jump outside the program at pc {pc}: {successor}")
+            if depths[successor] is None:
+                depths[successor] = after
+                if successor < end:
+                    pending.append(successor)
+            elif depths[successor] != after:
+                raise ValueError(f"Stack depth mismatch at pc {successor}: "
+                                 f"{depths[successor]} on one path, {after} from pc {pc}")
+    return depths, max_depth
+
+
+class FrameLayout:
+    """Memory layout of a program, exported by CodeGenerator.frame_layout.
+
+    ``slot_types[slot]`` is the declared type ('int', 'float' or 'bool') of
+    the variable living in that slot.
+    """
+
+    def __init__(self, slot_types: list[str]):
+        self.slot_types = slot_types
+
+    @property
+    def slot_count(self) -> int:
+        return len(self.slot_types)
+
+
+class TypedMemory:
+    """VM memory split into typed backing stores.
+
+    int slots live in an ``array('q')`` and float slots in an ``array('d')``;
+    bool slots stay in a list so that ``True`` still prints as ``True``. Note
+    that int slots are then limited to 64 bits. ``locate`` maps a slot to its
+    store and index, which is what the dispatch closures bind to.
+    """
+
+    def __init__(self, layout: FrameLayout):
+        self.ints = array('q')
+        self.floats = array('d')
+        self.objects = []
+        self.cells = []
+        for slot_type in layout.slot_types:
+            if slot_type == 'int':
+                self.cells.append((self.ints, len(self.ints)))
+                self.ints.append(0)
+            elif slot_type == 'float':
+                self.cells.append((self.floats, len(self.floats)))
+                self.floats.append(0.0)
+            else:
+                self.cells.append((self.objects, len(self.objects)))
+                self.objects.append(0)
+
+    def locate(self, slot: int) -> tuple:
+        return self.cells[slot]
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    def __getitem__(self, slot: int):
+        store, index = self.cells[slot]
+        return store[index]
+
+    def __setitem__(self, slot: int, value):
+        store, index = self.cells[slot]
+        store[index] = value
+
+
+class VMStatus:
+    HALTED = "HALTED"                        # ran off the end of the program or hit HALT
+    BUDGET_EXHAUSTED = "BUDGET_EXHAUSTED"    # max_steps or the deadline ran out; resumable
+    RUNNING = "RUNNING"                      # step() executed an instruction; more to go
+
+
+# Budgeted runs execute in chunks of this many steps, checking the deadline
+# between chunks
+BUDGET_CHUNK = 1024
+
+
 class SAMVirtualMachine:
-    def __init__(self, instructions: list[Instruction]):
+    """Runs a linked SAM program (see linker.link).
+
+    The program is either a list of Instructions or a bytecode.Bytecode, which
+    is loaded straight from its arrays. Each instruction is translated once,
+    through DISPATCH_TABLE, into a closure that has the stack and memory
+    pre-bound and returns the next pc, so the run loop does a single indexed
+    call per step.
+
+    Programs are checked by verify_stack first, which rejects stack
+    underflows and inconsistent stack depths with a ValueError. Since the
+    depth before every instruction is then known, the operand stack is a
+    list preallocated to the maximum depth and each closure reads and writes
+    fixed positions in it instead of calling ``append``/``pop``.
+    """
+
+    def __init__(self, instructions, output=None, frame: FrameLayout | None = None,
+                 typed_memory: bool = False, profiler=None, hot_loops=None, vectorizer=None):
         self.instructions = instructions
-        self.stack = []
-        self.memory = [0] * 1024  # Simplified memory model with 1024 cells
+        self.output = output if output is not None else TextSink()  # see output.py
+        self.memory = self.allocate_memory(frame, typed_memory)
         self.pc = 0  # Program counter
+        self.depths, max_depth = verify_stack(list(self.operations()))
+        self.stack = [None] * max_depth  # operand stack, see stack_values
+        self.code = self.compile()
+        self.profiler = profiler  # see profiler.py
+        if profiler is not None:
+            profiler.attach([opcode for opcode, _ in self.operations()])
+        self.hot_loops = hot_loops  # see hotloop.py
+        if hot_loops is not None:
+            hot_loops.attach(self)
+        self.vectorizer = vectorizer  # see vectorize.py; its loops are not counted by hot_loops
+        if vectorizer is not None:
+            vectorizer.attach(self)
 
-    def run(self):
-        while True:
-            if self.pc >= len(self.instructions):
-                break
-            instruction = self.instructions[self.pc]
-            self.execute(instruction)
-            self.pc += 1
-
-    def execute(self, instruction: Instruction):
-        if not isinstance(instruction, Instruction):
-            return
-
-        if instruction.opcode == Opcode.PUSH:
-            self.stack.append(instruction.operand)
-        elif instruction.opcode == Opcode.POP:
-            self.stack.pop()
-        elif instruction.opcode == Opcode.SWAP:
-            a, b = self.stack.pop(), self.stack.pop()
-            self.stack.append(a)
-            self.stack.append(b)
-        elif instruction.opcode == Opcode.ADD:
-            b, a = self.stack.pop(), self.stack.pop()
-            self.stack.append(a + b)
-        elif instruction.opcode == Opcode.SUB:
-            b, a = self.stack.pop(), self.stack.pop()
-            self.stack.append(a - b)
-        elif instruction.opcode == Opcode.MUL:
-            b, a = self.stack.pop(), self.stack.pop()
-            self.stack.append(a * b)
-        elif instruction.opcode == Opcode.DIV:
-            b, a = self.stack.pop(), self.stack.pop()
-            if type(a) is int and type(b) is int:
-                self.stack.append(a // b)  # Integer division
-            else:
-                self.stack.append(a / b)
-        elif instruction.opcode == Opcode.LT:
-            b, a = self.stack.pop(), self.stack.pop()
-            self.stack.append(int(a < b))
-        elif instruction.opcode == Opcode.GT:
-            b, a = self.stack.pop(), self.stack.pop()
-            self.stack.append(int(a > b))
-        elif instruction.opcode == Opcode.EQ:
-            b, a = self.stack.pop(), self.stack.pop()
-            self.stack.append(int(a == b))
-        elif instruction.opcode == Opcode.AND:
-            b, a = self.stack.pop(), self.stack.pop()
-            self.stack.append(int(a and b))
-        elif instruction.opcode == Opcode.OR:
-            b, a = self.stack.pop(), self.stack.pop()
-            self.stack.append(int(a or b))
-        elif instruction.opcode == Opcode.NOT:
-            a = self.stack.pop()
-            self.stack.append(int(not a))
-        elif instruction.opcode == Opcode.JMP:
-            self.pc = self.find_label(instruction.operand) - 1  # -1 because pc will be incremented
-        elif instruction.opcode == Opcode.JZ:
-            if self.stack.pop() == 0:
-                self.pc = self.find_label(instruction.operand) - 1
-        elif instruction.opcode == Opcode.STORE:
-            self.memory[instruction.operand] = self.stack.pop()
-        elif instruction.opcode == Opcode.LOAD:
-            self.stack.append(self.memory[instruction.operand])
-        elif instruction.opcode == Opcode.PRINT:
-            print(self.stack.pop())
-        elif instruction.opcode == Opcode.HALT:
-            self.pc = len(self.instructions)  # End execution
-
-    def find_label(self, label):
-        for i, instruction in enumerate(self.instructions):
-            if isinstance(instruction, str) and instruction.endswith(':'):
-                if instruction[:-1] == label:
-                    return i
-        raise ValueError(f"Label not found: {label}")
+    def allocate_memory(self, frame: FrameLayout | None, typed_memory: bool):
+        """Exactly as many cells as the program uses: the frame's slot count,
+        or one past the highest slot the instructions mention."""
+        if frame is None:
+            if typed_memory:
+                raise ValueError("Typed memory needs the frame layout from CodeGenerator")
+            slots = [slot for opcode, operand in self.operations() for slot in slot_operands(opcode, operand)]
+            return [0] * (max(slots) + 1 if slots else 0)
+        if typed_memory:
+            return TypedMemory(frame)
+        return [0] * frame.slot_count
+
+    def cell(self, slot: int) -> tuple:
+        """The store and index backing a memory slot."""
+        if isinstance(self.memory, TypedMemory):
+            return self.memory.locate(slot)
+        return self.memory, slot
+
+    def operations(self):
+        """Iterate over the program as ``(opcode, operand)`` pairs."""
+        if isinstance(self.instructions, list):
+            return ((instruction.opcode, instruction.operand) for instruction in self.instructions)
+        return self.instructions.operations()
+
+    def compile(self) -> list:
+        depths = self.depths
+        return [
+            DISPATCH_TABLE[opcode](self, operand, pc + 1, depths[pc])
+            if depths[pc] is not None else _build_unreachable(self, operand, pc + 1, None)
+            for pc, (opcode, operand) in enumerate(self.operations())
+        ]
+
+    def stack_values(self) -> list:
+        """The values on the operand stack at the current pc, bottom first.
+
+        ``stack`` is preallocated to the verified maximum depth and every
+        instruction addresses fixed positions in it, so only the first
+        ``depths[pc]`` entries are live.
+        """
+        return self.stack[:self.depths[self.pc]]
+
+    def load_stack(self, values: list):
+        """Refill the operand stack for the current pc (see stack_values)."""
+        if len(values) != self.depths[self.pc]:
+            raise ValueError(f"Stack depth at pc {self.pc} is {self.depths[self.pc]}, got {len(values)} values")
+        self.stack[:len(values)] = values
+
+    def run(self, max_steps: int | None = None, deadline: float | None = None) -> str:
+        """Run until the program halts, returning a VMStatus.
+
+        ``max_steps`` caps the number of instructions executed and
+        ``deadline`` is a time.monotonic() timestamp after which execution
+        stops. Either way the run ends with BUDGET_EXHAUSTED and the next
+        call resumes exactly where it stopped.
+        """
+        if self.profiler is not None:
+            # Separate loop, so the unprofiled one pays nothing for profiling
+            return self.run_profiled(max_steps, deadline)
+        code = self.code
+        end = len(code)
+        pc = self.pc
+        remaining = max_steps if max_steps is not None else float('inf')
+        clock = time.monotonic
+        try:
+            while pc < end:
+                if remaining <= 0 or (deadline is not None and clock() >= deadline):
+                    return VMStatus.BUDGET_EXHAUSTED
+                # Running in fixed chunks keeps the budget checks off the
+                # per-instruction path
+                chunk = BUDGET_CHUNK if remaining > BUDGET_CHUNK else remaining
+                remaining -= chunk
+                for _ in repeat(None, chunk):
+                    pc = code[pc]()
+                    if pc >= end:
+                        break
+        finally:
+            self.pc = pc
+            self.output.flush()
+        return VMStatus.HALTED
+
+    def step(self) -> str:
+        """Execute a single instruction; RUNNING until the program halts."""
+        if self.pc < len(self.code):
+            self.pc = self.code[self.pc]()
+        if self.pc < len(self.code):
+            return VMStatus.RUNNING
+        self.output.flush()
+        return VMStatus.HALTED
+
+    def run_profiled(self, max_steps: int | None = None, deadline: float | None = None) -> str:
+        profiler = self.profiler
+        counts, times = profiler.counts, profiler.times
+        taken, not_taken = profiler.taken, profiler.not_taken
+        # Only conditional jumps are reported, so only they are counted
+        branches = {pc for pc, opcode in enumerate(profiler.opcodes) if opcode in CONDITIONAL_JUMPS}
+        clock = time.perf_counter
+        code = self.code
+        end = len(code)
+        pc = self.pc
+        steps = 0
+        try:
+            while pc < end:
+                if max_steps is not None and steps >= max_steps:
+                    return VMStatus.BUDGET_EXHAUSTED
+                if deadline is not None and time.monotonic() >= deadline:
+                    return VMStatus.BUDGET_EXHAUSTED
+                steps += 1
+                start = clock()
+                next_pc = code[pc]()
+                times[pc] += clock() - start
+                counts[pc] += 1
+                if pc in branches:
+                    if next_pc == pc + 1:
+                        not_taken[pc] += 1
+                    else:
+                        taken[pc] += 1
+                pc = next_pc
+        finally:
+            self.pc = pc
+            self.output.flush()
+        # A run sliced by max_steps or a deadline reports once, when it halts
+        profiler.dump()
+        return VMStatus.HALTED
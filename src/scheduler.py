@@ -0,0 +1,138 @@
+"""Time-slicing many SAM VMs inside one asyncio event loop.
+
+Each tenant's VM runs for at most ``quantum`` instructions (see
+SAMVirtualMachine.run's ``max_steps``) before the scheduler yields to the
+event loop and moves on to the next tenant, round-robin. A runaway loop
+therefore only ever delays the others by one quantum.
+"""
+import asyncio
+from collections import deque
+
+from output import AsyncQueueSink
+from sam_vm import SAMVirtualMachine, VMStatus
+
+
+class TenantStatus:
+    WAITING = "WAITING"
+    RUNNING = "RUNNING"
+    HALTED = "HALTED"
+    FAILED = "FAILED"
+    CANCELLED = "CANCELLED"
+
+
+class Tenant:
+    """One script managed by the Scheduler.
+
+    Printed values arrive on the ``output`` queue as they are produced, with
+    ``None`` marking the end of the stream; iterate them
+    with ``async for value in tenant.values()``. ``wait()`` returns the final
+    TenantStatus and ``error`` holds the exception of a failed script.
+    """
+
+    def __init__(self, tenant_id, instructions):
+        self.tenant_id = tenant_id
+        self.output = asyncio.Queue()
+        self.vm = SAMVirtualMachine(instructions, AsyncQueueSink(self.output))
+        self.status = TenantStatus.WAITING
+        self.error = None
+        self.finished = asyncio.Event()
+
+    def finish(self, status: str, error: Exception | None = None):
+        self.status = status
+        self.error = error
+        self.output.put_nowait(None)
+        self.finished.set()
+
+    async def wait(self) -> str:
+        await self.finished.wait()
+        return self.status
+
+    async def values(self):
+        while (value := await self.output.get()) is not None:
+            yield value
+
+
+class Scheduler:
+    """Round-robin scheduler for many VM instances in one event loop.
+
+    Use it as ``async with Scheduler(quantum=1000) as scheduler:`` and
+    ``submit`` linked programs; leaving the block waits for every tenant.
+    """
+
+    def __init__(self, quantum: int = 1000):
+        self.quantum = quantum
+        self.tenants = {}
+        self.ready = deque()
+        self.wakeup = asyncio.Event()
+        self.worker = None
+
+    async def __aenter__(self) -> 'Scheduler':
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        if exc_info[0] is None:
+            await self.join()
+        await self.close()
+
+    def start(self):
+        if self.worker is None:
+            self.worker = asyncio.get_running_loop().create_task(self.loop())
+
+    def submit(self, tenant_id, instructions) -> Tenant:
+        if tenant_id in self.tenants and not self.tenants[tenant_id].finished.is_set():
+            raise ValueError(f"Tenant already running: {tenant_id}")
+        tenant = Tenant(tenant_id, instructions)
+        self.tenants[tenant_id] = tenant
+        self.ready.append(tenant)
+        self.wakeup.set()
+        return tenant
+
+    def cancel(self, tenant_id) -> bool:
+        """Stop a tenant before its next quantum; False if it already ended."""
+        tenant = self.tenants.get(tenant_id)
+        if tenant is None or tenant.finished.is_set():
+            return False
+        tenant.finish(TenantStatus.CANCELLED)
+        return True
+
+    async def join(self):
+        for tenant in list(self.tenants.values()):
+            await tenant.wait()
+
+    async def close(self):
+        if self.worker is not None:
+            self.worker.cancel()
+            try:
+                await self.worker
+            except asyncio.CancelledError:
+                pass
+            self.worker = None
+        for tenant in self.tenants.values():
+            if not tenant.finished.is_set():
+                tenant.finish(TenantStatus.CANCELLED)
+
+    async def loop(self):
+        quantum = self.quantum
+        ready = self.ready
+        while True:
+            if not ready:
+                self.wakeup.clear()
+                await self.wakeup.wait()
+                continue
+            tenant = ready.popleft()
+            if tenant.finished.is_set():  # cancelled while waiting
+                continue
+            tenant.status = TenantStatus.RUNNING
+            try:
+                status = tenant.vm.run(max_steps=quantum)
+            except Exception as error:
+                tenant.finish(TenantStatus.FAILED, error)
+            else:
+                if status == VMStatus.HALTED:
+                    tenant.finish(TenantStatus.HALTED)
+                else:
+                    tenant.status = TenantStatus.WAITING
+                    ready.append(tenant)
+            # Let the event loop (consumers, timers, other coroutines) run
+            await asyncio.sleep(0)
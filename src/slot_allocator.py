@@ -0,0 +1,92 @@
+"""Memory slot allocation for CodeGenerator.
+
+Names are resolved with the block scopes SemanticAnalyzer uses, so a
+shadowing ``let`` gets its own slot and the outer variable is visible again
+once the block ends. Each declaration is then given a live range over a
+numbering of the program's references in source order: from the ``let`` to
+the last statement that reads or assigns it, stretched to the end of every
+loop it is used in but declared outside of (the loop may come back to that
+use). Slots are handed out by linear scan: a declaration takes the lowest
+free slot of its type whose previous variable's range has ended. Sharing
+is limited to slots of one type so that FrameLayout still gives each slot
+a single type for TypedMemory.
+"""
+import heapq
+
+from optimizer import NameResolver, identifiers
+from parser import AssignmentStmt, Program, VariableDecl, WhileLoop
+
+
+class SlotAllocator(NameResolver):
+    """``slots`` maps every VariableDecl, by id, to its slot and
+    ``slot_types`` gives each slot's type. With ``reuse=False`` every
+    declaration gets a slot of its own."""
+
+    def __init__(self, reuse: bool = True):
+        super().__init__()
+        self.reuse = reuse
+        self.position = 0
+        self.order = []
+        self.starts = {}
+        self.ends = {}
+        self.loops = []  # (start position, ids of the declarations used inside)
+        self.slots = {}
+        self.slot_types = []
+
+    def allocate(self, ast: Program) -> dict:
+        self.resolve(ast)
+        free = {}
+        expiring = []
+        for declaration in self.order:
+            start = self.starts[id(declaration)]
+            while self.reuse and expiring and expiring[0][0] < start:
+                _, slot, slot_type = heapq.heappop(expiring)
+                heapq.heappush(free.setdefault(slot_type, []), slot)
+            if free.get(declaration.type):
+                slot = heapq.heappop(free[declaration.type])
+            else:
+                slot = len(self.slot_types)
+                self.slot_types.append(declaration.type)
+            self.slots[id(declaration)] = slot
+            heapq.heappush(expiring, (self.ends[id(declaration)], slot, declaration.type))
+        return self.slots
+
+    def slot(self, node) -> int:
+        """Slot of a VariableDecl, or of the variable an Identifier or
+        AssignmentStmt refers to."""
+        if not isinstance(node, VariableDecl):
+            node = self.declarations[id(node)]
+        return self.slots[id(node)]
+
+    def tick(self) -> int:
+        self.position += 1
+        return self.position
+
+    def reference(self, declaration: VariableDecl):
+        self.ends[id(declaration)] = self.tick()
+        for _, used in self.loops:
+            used.add(id(declaration))
+
+    def expression(self, node):
+        super().expression(node)
+        for identifier in identifiers(node):
+            self.reference(self.declarations[id(identifier)])
+
+    def visit_VariableDecl(self, node: VariableDecl):
+        super().visit_VariableDecl(node)
+        self.order.append(node)
+        self.starts[id(node)] = self.ends[id(node)] = self.tick()
+
+    def visit_WhileLoop(self, node: WhileLoop):
+        # The condition is inside the loop: it runs again on every iteration
+        self.loops.append((self.tick(), set()))
+        super().visit_WhileLoop(node)
+        start, used = self.loops.pop()
+        end = self.tick()
+        for key in used:
+            if self.starts[key] < start:
+                self.ends[key] = end
+
+    def visit_AssignmentStmt(self, node: AssignmentStmt):
+        super().visit_AssignmentStmt(node)
+        self.reference(self.declarations[id(node)])
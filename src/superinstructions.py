@@ -0,0 +1,72 @@
+from sam_vm import Opcode, Instruction
+
+LOAD_LOAD_OPS = {
+    Opcode.ADD: Opcode.LOAD_LOAD_ADD,
+    Opcode.SUB: Opcode.LOAD_LOAD_SUB,
+    Opcode.MUL: Opcode.LOAD_LOAD_MUL,
+}
+COMPARE_JUMP_OPS = {
+    Opcode.LT: Opcode.CMP_LT_JZ,
+    Opcode.GT: Opcode.CMP_GT_JZ,
+    Opcode.EQ: Opcode.CMP_EQ_JZ,
+}
+
+
+def _opcodes(window: list) -> list:
+    return [entry.opcode if isinstance(entry, Instruction) else None for entry in window]
+
+
+def _is_number(value) -> bool:
+    return type(value) in (int, float)
+
+
+def _fuse_at(program: list, i: int) -> tuple[Instruction, int] | None:
+    """Return the superinstruction starting at ``program[i]`` and its length."""
+    window = program[i:i + 4]
+    ops = _opcodes(window)
+
+    # LOAD a; LOAD b; LT; JZ L  ->  CMP_LT_JZ a b L
+    if (len(ops) == 4 and ops[0] == ops[1] == Opcode.LOAD
+            and ops[2] in COMPARE_JUMP_OPS and ops[3] == Opcode.JZ):
+        operand = (window[0].operand, window[1].operand, window[3].operand)
+        return Instruction(COMPARE_JUMP_OPS[ops[2]], operand), 4
+
+    # LOAD a; PUSH k; ADD|SUB; STORE a  ->  INC_SLOT a (+/-)k
+    if (len(ops) == 4 and ops[0] == Opcode.LOAD and ops[1] == Opcode.PUSH
+            and ops[2] in (Opcode.ADD, Opcode.SUB) and ops[3] == Opcode.STORE
+            and window[0].operand == window[3].operand and _is_number(window[1].operand)):
+        step = window[1].operand if ops[2] == Opcode.ADD else -window[1].operand
+        return Instruction(Opcode.INC_SLOT, (window[0].operand, step)), 4
+
+    # LOAD a; LOAD b; ADD  ->  LOAD_LOAD_ADD a b
+    if len(ops) >= 3 and ops[0] == ops[1] == Opcode.LOAD and ops[2] in LOAD_LOAD_OPS:
+        operand = (window[0].operand, window[1].operand)
+        return Instruction(LOAD_LOAD_OPS[ops[2]], operand), 3
+
+    # PUSH 0; SWAP; SUB  ->  NEG
+    if (len(ops) >= 3 and ops[:3] == [Opcode.PUSH, Opcode.SWAP, Opcode.SUB]
+            and type(window[0].operand) is int and window[0].operand == 0):
+        return Instruction(Opcode.NEG), 3
+
+    return None
+
+
+def fuse(program: list) -> list:
+    """Rewrite common instruction sequences into superinstructions.
+
+    Works on the unlinked stream from CodeGenerator.generate, before
+    linker.link. A label entry breaks any window, so no fused instruction ever
+    swallows a jump target.
+    """
+    fused = []
+    i = 0
+    while i < len(program):
+        match = _fuse_at(program, i)
+        if match is None:
+            fused.append(program[i])
+            i += 1
+        else:
+            instruction, length = match
+            fused.append(instruction)
+            i += length
+    return fused
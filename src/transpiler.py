@@ -0,0 +1,210 @@
+import marshal
+
+from lexer import TokenType
+from output import TextSink
+from parser import (
+    ASTNode,
+    Program,
+    VariableDecl,
+    WhileLoop,
+    IfStatement,
+    AssignmentStmt,
+    BinaryOp,
+    UnaryOp,
+    Identifier,
+    Literal,
+    BreakStatement,
+    PrintStatement,
+    ElseStatement
+)
+
+ENTRY_POINT = "__script__"
+
+PYTHON_OPERATORS = {
+    TokenType.PLUS: "+",
+    TokenType.MINUS: "-",
+    TokenType.MULTIPLY: "*",
+    TokenType.LESS_THAN: "<",
+    TokenType.GREATER_THAN: ">",
+    TokenType.EQUAL_EQUAL: "==",
+    TokenType.NOT_EQUAL: "!=",
+    TokenType.LESS_EQUAL: "<=",
+    TokenType.GREATER_EQUAL: ">=",
+}
+COMPARISONS = {
+    TokenType.LESS_THAN,
+    TokenType.GREATER_THAN,
+    TokenType.EQUAL_EQUAL,
+    TokenType.NOT_EQUAL,
+    TokenType.LESS_EQUAL,
+    TokenType.GREATER_EQUAL,
+}
+
+
+class PythonTranspiler:
+    """Translates the analyzed AST into the source of a Python function.
+
+    Variables become function locals (renamed per declaration, so shadowed
+    names stay distinct), loops become native ``while``/``break`` and ``/``
+    turns into ``//`` or ``/`` from the types SemanticAnalyzer stored on the
+    nodes. Values match the SAM VM: comparisons and logic produce 0/1 and
+    ``&&``/``||`` short-circuit.
+    """
+
+    def __init__(self):
+        self.lines = []
+        self.indent = 1
+        self.scopes: list[dict[str, str]] = [{}]
+        self.local_counter = 0
+
+    def transpile(self, ast: Program) -> str:
+        self.lines = [f"def {ENTRY_POINT}():"]
+        self.visit(ast)
+        if len(self.lines) == 1:
+            self.line("pass")
+        return "\n".join(self.lines) + "\n"
+
+    def visit(self, node: ASTNode):
+        method_name = f"visit_{type(node).__name__}"
+        visit_method = getattr(self, method_name, self.generic_visit)
+        return visit_method(node)
+
+    def generic_visit(self, node: ASTNode):
+        raise Exception(f"No visit method for {type(node).__name__}")
+
+    def line(self, text: str):
+        self.lines.append("    " * self.indent + text)
+
+    def lookup(self, name: str) -> str:
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        raise Exception(f"Variable '{name}' not declared")
+
+    def block(self, statements: list[ASTNode]):
+        self.indent += 1
+        self.scopes.append({})
+        for statement in statements:
+            self.visit(statement)
+        if not statements:
+            self.line("pass")
+        self.scopes.pop()
+        self.indent -= 1
+
+    def condition(self, node: ASTNode) -> str:
+        """Branch condition; comparisons and logic are used without the 0/1
+        conversion."""
+        if isinstance(node, BinaryOp) and node.operator in COMPARISONS:
+            return self.comparison(node)
+        if isinstance(node, BinaryOp) and node.operator == TokenType.AND:
+            return f"({self.condition(node.left)} and {self.condition(node.right)})"
+        if isinstance(node, BinaryOp) and node.operator == TokenType.OR:
+            return f"({self.condition(node.left)} or {self.condition(node.right)})"
+        if isinstance(node, UnaryOp) and node.operator == TokenType.NOT:
+            return f"(not {self.condition(node.operand)})"
+        return self.visit(node)
+
+    def visit_Program(self, node: Program):
+        for statement in node.statements:
+            self.visit(statement)
+
+    def visit_VariableDecl(self, node: VariableDecl):
+        value = self.visit(node.value)
+        self.local_counter += 1
+        local = f"{node.name}_{self.local_counter}"
+        self.scopes[-1][node.name] = local
+        self.line(f"{local} = {value}")
+
+    def visit_WhileLoop(self, node: WhileLoop):
+        self.line(f"while {self.condition(node.condition)}:")
+        self.block(node.body)
+
+    def visit_IfStatement(self, node: IfStatement):
+        self.line(f"if {self.condition(node.condition)}:")
+        self.block(node.if_body)
+        for else_if in node.else_if_list:
+            if isinstance(else_if, ElseStatement):  # This is the final 'else'
+                self.line("else:")
+                self.block(else_if.body)
+            else:
+                self.line(f"elif {self.condition(else_if.condition)}:")
+                self.block(else_if.if_body)
+
+    def visit_AssignmentStmt(self, node: AssignmentStmt):
+        self.line(f"{self.lookup(node.name)} = {self.visit(node.value)}")
+
+    def visit_BreakStatement(self, node: BreakStatement):
+        self.line("break")
+
+    def visit_PrintStatement(self, node: PrintStatement):
+        self.line(f"_print({self.visit(node.expr)})")
+
+    def comparison(self, node: BinaryOp) -> str:
+        left, right = self.visit(node.left), self.visit(node.right)
+        return f"({left} {PYTHON_OPERATORS[node.operator]} {right})"
+
+    def visit_BinaryOp(self, node: BinaryOp) -> str:
+        if node.operator in COMPARISONS:
+            return f"int{self.comparison(node)}"
+        left, right = self.visit(node.left), self.visit(node.right)
+        if node.operator == TokenType.DIVIDE:
+            operator = "//" if node.type == 'int' else "/"
+            return f"({left} {operator} {right})"
+        if node.operator == TokenType.AND:
+            return f"int({left} and {right})"  # short-circuits, as in the SAM VM
+        if node.operator == TokenType.OR:
+            return f"int({left} or {right})"
+        return f"({left} {PYTHON_OPERATORS[node.operator]} {right})"
+
+    def visit_UnaryOp(self, node: UnaryOp) -> str:
+        operand = self.visit(node.operand)
+        if node.operator == TokenType.MINUS:
+            return f"(0 - {operand})"  # see CodeGenerator.visit_UnaryOp
+        return f"int(not {operand})"
+
+    def visit_Identifier(self, node: Identifier) -> str:
+        return self.lookup(node.name)
+
+    def visit_Literal(self, node: Literal) -> str:
+        return repr(node.value)
+
+
+class PythonProgram:
+    """Generated Python source compiled to a code object.
+
+    ``code`` is a plain code object, so it can be cached in memory or on disk
+    with ``dumps``/``loads`` and reused without transpiling again. ``_print``
+    in the generated code writes to ``output`` (an output.py sink).
+    """
+
+    def __init__(self, code, source: str | None = None, output=None):
+        self.code = code
+        self.source = source
+        self.output = output if output is not None else TextSink()
+
+    @classmethod
+    def from_source(cls, source: str, output=None) -> 'PythonProgram':
+        return cls(compile(source, "<statically-typed-script>", "exec"), source, output)
+
+    def dumps(self) -> bytes:
+        return marshal.dumps(self.code)
+
+    @classmethod
+    def loads(cls, data: bytes, output=None) -> 'PythonProgram':
+        return cls(marshal.loads(data), output=output)
+
+    def run(self):
+        namespace = {"_print": self.output.write}
+        exec(self.code, namespace)
+        try:
+            namespace[ENTRY_POINT]()
+        finally:
+            self.output.flush()
+
+
+def transpile(ast: Program, show_source: bool = False, output=None) -> PythonProgram:
+    """Transpile an analyzed AST and compile it; optionally print the source."""
+    source = PythonTranspiler().transpile(ast)
+    if show_source:
+        print(source)
+    return PythonProgram.from_source(source, output)
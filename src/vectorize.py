@@ -0,0 +1,392 @@
+"""Vectorized execution of simple counted SAM loops with NumPy.
+
+LoopVectorizer looks for loops of the shape::
+
+    while (i < n) { x = x + i * k; y = i / 2; i = i + 1; }
+
+in a linked SAM program: a condition comparing an induction variable ``i``
+(stepped by a constant) against a loop-invariant bound, and a straight-line
+body (no ``print``, ``break`` or nested control flow) whose other stores are
+either reductions like ``x = x + f(i)`` or ``x = x - f(i) + g(i)``, or
+assignments ``y = f(i)``, where ``f`` and ``g`` use only ``+ - * /``, ``i``
+and loop-invariant values. When such a loop is entered, the trip count is computed exactly and
+the updates are evaluated on ``numpy.arange`` blocks: integer reductions with
+``numpy.sum``, float reductions with ``numpy.cumsum`` (which adds
+sequentially, so rounding matches the interpreter step by step).
+
+Every entry first checks the run-time values: only ``int``/``float``
+operands, no integer that could leave 64 bits, no zero divisor (which would
+raise in the VM) and a trip count worth the setup. If anything fails the
+check, the loop runs in the interpreter exactly as before. NumPy is
+optional; without it ``attach`` leaves the VM untouched.
+"""
+import math
+from fractions import Fraction
+
+from sam_vm import Opcode
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Loops with fewer iterations than this stay in the interpreter
+MIN_TRIP_COUNT = 32
+# Iterations evaluated per NumPy block, bounding temporary array sizes
+BLOCK_SIZE = 1 << 16
+# Bound on every integer intermediate, so that int64 arrays never overflow
+INT_LIMIT = 1 << 63
+
+ARITHMETIC = {
+    Opcode.ADD: "add",
+    Opcode.SUB: "sub",
+    Opcode.MUL: "mul",
+    Opcode.DIV: "div",
+    Opcode.IDIV: "div",
+    Opcode.FDIV: "div",
+}
+
+LOAD_LOAD_ARITHMETIC = {
+    Opcode.LOAD_LOAD_ADD: "add",
+    Opcode.LOAD_LOAD_SUB: "sub",
+    Opcode.LOAD_LOAD_MUL: "mul",
+}
+
+COMPARE_JUMPS = {Opcode.CMP_LT_JZ: Opcode.LT, Opcode.CMP_GT_JZ: Opcode.GT}
+# Loop conditions, and the ones that are true when both sides are equal
+COMPARISONS = {Opcode.LT, Opcode.GT, Opcode.LE, Opcode.GE}
+INCLUSIVE = {Opcode.LE, Opcode.GE}
+
+
+class Fallback(Exception):
+    """Raised while matching or evaluating a loop that must stay interpreted."""
+
+
+def dependencies(expr) -> set:
+    if expr[0] == "slot":
+        return {expr[1]}
+    if expr[0] == "const":
+        return set()
+    return dependencies(expr[1]) | dependencies(expr[2])
+
+
+def evaluate(expr, values: dict):
+    """Evaluate an expression on Python scalars, with SAM semantics."""
+    if expr[0] == "slot":
+        return values[expr[1]]
+    if expr[0] == "const":
+        return expr[1]
+    a, b = evaluate(expr[1], values), evaluate(expr[2], values)
+    if expr[0] == "add":
+        return a + b
+    if expr[0] == "sub":
+        return a - b
+    if expr[0] == "mul":
+        return a * b
+    if type(a) is int and type(b) is int:
+        return a // b  # Integer division
+    return a / b
+
+
+def trip_count(start: int, step: int, bound, upward: bool, inclusive: bool = False) -> int:
+    """Iterations of ``i < bound`` (``i > bound`` if not ``upward``, and
+    ``<=``/``>=`` if ``inclusive``) from ``start`` in steps of ``step``,
+    computed exactly."""
+    bound = Fraction(bound)
+    distance = (bound - start) / step if upward else (start - bound) / -step
+    if inclusive:
+        return max(0, math.floor(distance) + 1)
+    return max(0, math.ceil(distance))
+
+
+class LoopPlan:
+    """A matched loop: ``induction`` is stepped by ``step`` while it compares
+    ``LT``/``GT``/``LE``/``GE`` against ``bound``; ``reductions`` maps a slot to the
+    ``(sign, term)`` list added to it per iteration (see reduction_terms) and
+    ``assignments`` a slot to its expression."""
+
+    def __init__(self, head: int, exit: int, induction: int, step: int, comparison: str, bound,
+                 reductions: dict, assignments: dict):
+        self.head = head
+        self.exit = exit
+        self.induction = induction
+        self.step = step
+        self.comparison = comparison
+        self.bound = bound
+        self.reductions = reductions
+        self.assignments = assignments
+        self.invariants = set(dependencies(bound))
+        for terms in reductions.values():
+            for _, term in terms:
+                self.invariants |= dependencies(term)
+        for expr in assignments.values():
+            self.invariants |= dependencies(expr)
+        self.invariants -= {induction}
+
+
+def reduction_terms(expr, slot: int) -> list:
+    """Split ``x + a - b + ...`` into ``[(1, a), (-1, b), ...]``, in the order
+    the VM adds them to ``x``; ``a + x`` counts as ``x + a``."""
+    if expr == ("slot", slot):
+        return []
+    if expr[0] in ("add", "sub") and slot not in dependencies(expr[2]):
+        return reduction_terms(expr[1], slot) + [(1 if expr[0] == "add" else -1, expr[2])]
+    if expr[0] == "add" and slot not in dependencies(expr[1]):
+        return reduction_terms(expr[2], slot) + [(1, expr[1])]
+    raise Fallback(f"slot {slot} is not a reduction or assignment")
+
+
+def match_loop(operations: list, head: int, back: int) -> LoopPlan:
+    """Match the loop ``operations[head:back + 1]`` (ending in ``JMP head``)
+    against the counted-loop shape, raising Fallback if it does not fit."""
+    stack, env = [], {}
+    condition, exit = None, None
+
+    def read(slot):
+        return env.get(slot, ("slot", slot))
+
+    def pop():
+        if not stack:
+            raise Fallback("stack underflow")
+        return stack.pop()
+
+    for pc in range(head, back):
+        opcode, operand = operations[pc]
+        if condition is None and env:
+            raise Fallback("store before the loop condition")
+        if opcode == Opcode.PUSH:
+            if type(operand) not in (int, float):
+                raise Fallback("non-numeric constant")
+            stack.append(("const", operand))
+        elif opcode == Opcode.LOAD:
+            stack.append(read(operand))
+        elif opcode == Opcode.STORE:
+            env[operand] = pop()
+        elif opcode in ARITHMETIC:
+            b, a = pop(), pop()
+            stack.append((ARITHMETIC[opcode], a, b))
+        elif opcode in LOAD_LOAD_ARITHMETIC:
+            stack.append((LOAD_LOAD_ARITHMETIC[opcode], read(operand[0]), read(operand[1])))
+        elif opcode == Opcode.NEG:
+            stack.append(("sub", ("const", 0), pop()))
+        elif opcode == Opcode.INC_SLOT:
+            slot, step = operand
+            env[slot] = ("add", read(slot), ("const", step))
+        elif opcode == Opcode.DUP:
+            value = pop()
+            stack.extend([value, value])
+        elif opcode == Opcode.SWAP:
+            b, a = pop(), pop()
+            stack.extend([b, a])
+        elif opcode in COMPARISONS and condition is None:
+            b, a = pop(), pop()
+            stack.append((opcode, a, b))
+        elif opcode == Opcode.JZ and condition is None:
+            condition, exit = pop(), operand
+            if condition[0] not in COMPARISONS or stack:
+                raise Fallback("unsupported loop condition")
+        elif opcode in COMPARE_JUMPS and condition is None:
+            a, b, exit = operand
+            condition = (COMPARE_JUMPS[opcode], read(a), read(b))
+        else:
+            raise Fallback(f"{opcode} in loop")
+    if condition is None or stack or exit != back + 1:
+        raise Fallback("not a counted loop")
+    stored = set(env)
+
+    # The induction variable is the compared slot that is stepped by a constant
+    comparison, left, right = condition
+    for candidate, bound, upward in ((left, right, comparison in (Opcode.LT, Opcode.LE)),
+                                     (right, left, comparison in (Opcode.GT, Opcode.GE))):
+        if candidate[0] != "slot" or candidate[1] not in stored:
+            continue
+        induction = candidate[1]
+        update = env[induction]
+        if update[0] in ("add", "sub") and update[1] == candidate and update[2][0] == "const":
+            step = update[2][1] if update[0] == "add" else -update[2][1]
+            if type(step) is int and (step > 0 if upward else step < 0):
+                break
+    else:
+        raise Fallback("no induction variable")
+    if dependencies(bound) & stored:
+        raise Fallback("loop bound changes inside the loop")
+
+    reductions, assignments = {}, {}
+    for slot, expr in env.items():
+        if slot == induction:
+            continue
+        if slot not in dependencies(expr):
+            assignments[slot] = expr
+        else:
+            reductions[slot] = reduction_terms(expr, slot)
+    for terms in reductions.values():
+        for _, term in terms:
+            if dependencies(term) & stored - {induction}:
+                raise Fallback("reduction depends on another updated slot")
+    for expr in assignments.values():
+        if dependencies(expr) & stored - {induction}:
+            raise Fallback("assignment depends on another updated slot")
+    return LoopPlan(head, exit, induction, step, comparison, bound, reductions, assignments)
+
+
+class BlockEvaluator:
+    """Evaluates loop expressions over one block of induction values.
+
+    Results are ``(value, is_int, bound)``: a NumPy array or scalar, whether
+    the VM would compute an int, and for ints a bound on the magnitude.
+    """
+
+    def __init__(self, plan: LoopPlan, values: dict, indices, index_bound: int):
+        self.plan = plan
+        self.values = values
+        self.indices = indices
+        self.index_bound = index_bound
+
+    def scalar(self, value):
+        if type(value) is int:
+            if abs(value) >= INT_LIMIT:
+                raise Fallback("integer out of range")
+            return numpy.int64(value), True, abs(value)
+        if type(value) is float:
+            return numpy.float64(value), False, None
+        raise Fallback(f"unsupported value {value!r}")
+
+    def evaluate(self, expr):
+        if expr[0] == "slot" and expr[1] == self.plan.induction:
+            return self.indices, True, self.index_bound
+        if expr[0] == "slot":
+            return self.scalar(self.values[expr[1]])
+        if expr[0] == "const":
+            return self.scalar(expr[1])
+        a, a_int, a_bound = self.evaluate(expr[1])
+        b, b_int, b_bound = self.evaluate(expr[2])
+        is_int = a_int and b_int
+        if expr[0] == "add":
+            value, bound = a + b, is_int and a_bound + b_bound
+        elif expr[0] == "sub":
+            value, bound = a - b, is_int and a_bound + b_bound
+        elif expr[0] == "mul":
+            value, bound = a * b, is_int and a_bound * b_bound
+        else:
+            if numpy.any(b == 0):
+                raise Fallback("division by zero")
+            value, bound = (numpy.floor_divide(a, b), a_bound) if is_int else (numpy.true_divide(a, b), None)
+        if is_int and bound >= INT_LIMIT:
+            raise Fallback("integer out of range")
+        return value, is_int, bound
+
+
+class LoopVectorizer:
+    """Installs vectorized entry points for the counted loops of a VM.
+
+    Use ``SAMVirtualMachine(..., vectorizer=LoopVectorizer())``. ``plans``
+    maps loop heads to their LoopPlan; ``vectorized`` and ``fallbacks``
+    count loop entries that ran in NumPy and in the interpreter.
+    """
+
+    def __init__(self, min_trip_count: int = MIN_TRIP_COUNT):
+        self.min_trip_count = min_trip_count
+        self.plans = {}
+        self.vectorized = 0
+        self.fallbacks = 0
+
+    def attach(self, vm):
+        if numpy is None:
+            return
+        operations = list(vm.operations())
+        for back, (opcode, head) in enumerate(operations):
+            if opcode != Opcode.JMP or head > back:
+                continue
+            try:
+                plan = match_loop(operations, head, back)
+            except Fallback:
+                continue
+            self.plans[head] = plan
+            interpreted = vm.code[head]
+            vm.code[head] = self.entry(vm, plan, interpreted)
+            # Later iterations go straight to the interpreted head instead of
+            # re-checking the plan on every back edge
+            vm.code[back] = self.back_edge(interpreted)
+
+    def back_edge(self, interpreted):
+        def jmp():
+            return interpreted()
+        return jmp
+
+    def entry(self, vm, plan: LoopPlan, interpreted):
+        def vectorized_loop():
+            try:
+                self.run(vm, plan)
+            except Fallback:
+                self.fallbacks += 1
+                return interpreted()
+            self.vectorized += 1
+            return plan.exit
+        return vectorized_loop
+
+    def run(self, vm, plan: LoopPlan):
+        memory = vm.memory
+        values = {slot: memory[slot] for slot in plan.invariants}
+        start = memory[plan.induction]
+        if type(start) is not int:
+            raise Fallback("induction variable is not an int")
+        try:
+            bound = evaluate(plan.bound, values)
+        except ArithmeticError:
+            raise Fallback("loop bound raises")
+        if type(bound) not in (int, float) or not math.isfinite(bound):
+            raise Fallback("unsupported loop bound")
+        trips = trip_count(start, plan.step, bound, plan.step > 0, plan.comparison in INCLUSIVE)
+        if trips < self.min_trip_count:
+            raise Fallback("too few iterations")
+        last = start + (trips - 1) * plan.step
+        index_bound = max(abs(start), abs(last))
+        if index_bound + abs(plan.step) >= INT_LIMIT:
+            raise Fallback("induction variable out of range")
+
+        totals = {}
+        for slot in plan.reductions:
+            total = memory[slot]
+            if type(total) not in (int, float):
+                raise Fallback("reduction over a non-numeric value")
+            totals[slot] = total
+        results = {}
+        with numpy.errstate(all="ignore"):
+            for first in range(0, trips, BLOCK_SIZE):
+                count = min(BLOCK_SIZE, trips - first)
+                indices = numpy.arange(count, dtype=numpy.int64) * plan.step + (start + first * plan.step)
+                evaluator = BlockEvaluator(plan, values, indices, index_bound)
+                for slot, terms in plan.reductions.items():
+                    evaluated = [(sign, *evaluator.evaluate(term)) for sign, term in terms]
+                    totals[slot] = self.reduce(totals[slot], evaluated, count, trips)
+                for slot, expr in plan.assignments.items():
+                    value, is_int, _ = evaluator.evaluate(expr)
+                    last_value = value[-1] if numpy.ndim(value) else value
+                    results[slot] = int(last_value) if is_int else float(last_value)
+        # Nothing is written until every block has been checked
+        for slot, value in results.items():
+            memory[slot] = value
+        for slot, total in totals.items():
+            memory[slot] = total
+        memory[plan.induction] = start + trips * plan.step
+
+    def reduce(self, total, terms: list, count: int, trips: int):
+        """Add one block of ``(sign, value, is_int, bound)`` terms to ``total``."""
+        if type(total) is int and all(is_int for _, _, is_int, _ in terms):
+            if abs(total) + sum(bound for _, _, _, bound in terms) * trips >= INT_LIMIT:
+                raise Fallback("reduction out of range")
+            for sign, value, _, _ in terms:
+                block_sum = int(numpy.sum(value)) if numpy.ndim(value) else int(value) * count
+                total += sign * block_sum
+            return total
+        if type(total) is int and terms[0][2]:
+            # x + int would stay exact before turning into a float
+            raise Fallback("int reduction turning float")
+        # Float reduction: one sequential addition per term and iteration,
+        # like the VM; x - t is computed as x + (-t), which is the same in IEEE
+        steps = numpy.empty((count, len(terms)), dtype=numpy.float64)
+        for column, (sign, value, _, _) in enumerate(terms):
+            steps[:, column] = value
+            if sign < 0:
+                steps[:, column] = -steps[:, column]
+        return float(numpy.cumsum(numpy.concatenate(([total], steps.ravel())))[-1])